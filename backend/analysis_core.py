@@ -0,0 +1,217 @@
+"""
+Array-native implementation of the statistical operations. The functions
+take and return numpy arrays, so the endpoints skip building, validating and
+serializing a DataFrame per request. The DataFrame functions in
+data_analysis_tools wrap these for compatibility.
+"""
+
+from typing import List, Optional, Tuple
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from polynomial_fitting import (
+    fit_all_degrees,
+    kfold_all_degrees,
+    loo_all_degrees,
+    polynomial_fit,
+    scaled_positions,
+)
+from rolling_statistics import rolling_statistics
+from summary_statistics import SummaryStatistics
+
+
+def as_values(data) -> np.ndarray:
+    """
+    converts the data to a float array.
+
+    Args:
+        data (array_like): numbers.
+
+    Raises:
+        ValueError: If the data is empty.
+
+    Returns:
+        np.ndarray: values
+    """
+    values = np.asarray(data, dtype=float)
+    if len(values) == 0:
+        raise ValueError("The input data is empty.")
+    return values
+
+
+def time_axis(n: int, duration_s: float) -> np.ndarray:
+    """
+    returns n equally spaced times from 0 to duration_s.
+
+    Args:
+        n (int): number of values.
+        duration_s (float): total duration in seconds.
+
+    Returns:
+        np.ndarray: times in seconds.
+    """
+    return np.linspace(0, duration_s, n)
+
+
+def _fill_missing(distances: np.ndarray) -> np.ndarray:
+    missing = np.isnan(distances)
+    if missing.any() and not missing.all():
+        distances[missing] = np.nanmin(distances)
+    return distances
+
+
+def distance_to_before(values: np.ndarray) -> np.ndarray:
+    """
+    returns the absolute distance of every value to the previous one, the
+    first value is compared to the last. Missing distances are filled with
+    the smallest distance.
+
+    Args:
+        values (np.ndarray): series.
+
+    Returns:
+        np.ndarray: distances
+    """
+    distances = np.empty(len(values))
+    distances[1:] = np.abs(np.diff(values))
+    distances[0] = abs(values[0] - values[-1])
+    return _fill_missing(distances)
+
+
+def distance_to_next(values: np.ndarray) -> np.ndarray:
+    """
+    returns the absolute distance of every value to the next one, the last
+    value is compared to the first. Missing distances are filled with the
+    smallest distance.
+
+    Args:
+        values (np.ndarray): series.
+
+    Returns:
+        np.ndarray: distances
+    """
+    distances = np.empty(len(values))
+    distances[:-1] = np.abs(np.diff(values))
+    distances[-1] = abs(values[0] - values[-1])
+    return _fill_missing(distances)
+
+
+def rolling_average(values: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    returns the centered rolling average, windows shrink at the edges.
+
+    Args:
+        values (np.ndarray): series.
+        window_size (int): window size.
+
+    Raises:
+        ValueError: If the series is shorter than the window size.
+
+    Returns:
+        np.ndarray: rolling average
+    """
+    return rolling_statistics(values, [window_size], statistic="mean")[0]
+
+
+def best_polynomial_degree(
+    values: np.ndarray,
+    max_degree: int = 24,
+    random_state: int = 42,
+    test_size: float = 0.2,
+    method: str = "holdout",
+    folds: int = 5,
+) -> Tuple[List[float], List[float], int]:
+    """
+    finds the polynomial degree with the lowest validation MSE, see
+    data_analysis_tools.find_best_polynomial_fit.
+
+    Args:
+        values (np.ndarray): series.
+        max_degree (int, optional): highest degree to test. Defaults to 24.
+        random_state (int, optional): seed of the splits. Defaults to 42.
+        test_size (float, optional): test fraction for "holdout". Defaults to 0.2.
+        method (str, optional): "holdout", "kfold" or "loo". Defaults to "holdout".
+        folds (int, optional): number of folds for "kfold". Defaults to 5.
+
+    Raises:
+        ValueError: If an unsupported `method` is provided.
+        ValueError: If the fit produces invalid values.
+
+    Returns:
+        Tuple[List[float], List[float], int]: training MSE per degree,
+            validation MSE per degree and the best degree.
+    """
+    max_degree = min(max_degree, len(values) - 1)
+    x = scaled_positions(len(values))
+    y = np.asarray(values, dtype=float)
+
+    if method == "holdout":
+        x_train, x_test, y_train, y_test = train_test_split(
+            x, y, test_size=test_size, random_state=random_state
+        )
+        mse_train, mse_val = fit_all_degrees(
+            x_train, y_train, x_test, y_test, max_degree=max_degree
+        )
+    elif method == "kfold":
+        mse_train, mse_val = kfold_all_degrees(
+            x, y, max_degree=max_degree, folds=folds, random_state=random_state
+        )
+    elif method == "loo":
+        mse_train, mse_val = loo_all_degrees(x, y, max_degree=max_degree)
+    else:
+        raise ValueError(f"Unsupported selection method: '{method}'")
+    if not (np.isfinite(mse_train).all() and np.isfinite(mse_val).all()):
+        raise ValueError("Polynomial fit produced invalid values.")
+
+    best_degree = int(np.argmin(mse_val)) + 1 if len(mse_val) else 1
+    return mse_train.tolist(), mse_val.tolist(), best_degree
+
+
+def polynomial_values(values: np.ndarray, degree: int) -> np.ndarray:
+    """
+    returns the least squares polynomial fit evaluated at the samples.
+
+    Args:
+        values (np.ndarray): series.
+        degree (int): degree of the polynomial.
+
+    Returns:
+        np.ndarray: fitted values
+    """
+    return polynomial_fit(np.asarray(values, dtype=float), degree)
+
+
+def summary_statistic(
+    values: np.ndarray, aggregation_type: str, percentile: Optional[float] = None
+) -> float:
+    """
+    returns one summary statistic of the series, see SummaryStatistics.
+
+    Args:
+        values (np.ndarray): series.
+        aggregation_type (str): name of the statistic.
+        percentile (Optional[float], optional): between 0 and 1 for
+            "percentile". Defaults to None.
+
+    Raises:
+        ValueError: If `percentile` is missing or not between 0 and 1.
+        ValueError: If an unsupported aggregation type is provided.
+
+    Returns:
+        float: statistic
+    """
+    return SummaryStatistics(values).get(aggregation_type, percentile=percentile)
+
+
+def deviation(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """
+    returns the absolute deviation of the values from the reference.
+
+    Args:
+        values (np.ndarray): series.
+        reference (np.ndarray): reference values or a single reference value.
+
+    Returns:
+        np.ndarray: deviations
+    """
+    return np.abs(values - reference)
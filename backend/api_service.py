@@ -1,12 +1,19 @@
 """ service functions to retrieve environment data from API """
 
+import asyncio
 import datetime
-import functools
-from typing import Optional
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import httpx
+import numpy as np
 import pandas as pd
-import requests
 
+from cache import DataFrameCache
 from config import settings
+from data_store import date_range, store
+from resampling import is_base_interval, resample_aggregates, select_aggregate
+from resilience import CircuitBreaker, FallbackStore, TokenBucket, backoff_delay
 
 LON = settings.LONGITUDE
 LAT = settings.LATITUDE
@@ -14,8 +21,167 @@ LAT = settings.LATITUDE
 BASE_URL_CURRENT = settings.API_CURRENT_DATA_BASE_URL
 BASE_URL_HIST = settings.API_HISTORICAL_DATA_BASE_URL
 
+_client: Optional[httpx.AsyncClient] = None
 
-def get_current_data(
+BASE_INTERVAL = "h"
+
+historical_cache = DataFrameCache(max_bytes=settings.CACHE_MAX_BYTES)
+resampled_cache = DataFrameCache(max_bytes=settings.RESAMPLED_CACHE_MAX_BYTES)
+
+circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.CIRCUIT_BREAKER_FAILURES,
+    reset_timeout_s=settings.CIRCUIT_BREAKER_RESET_S,
+)
+rate_limiter = TokenBucket(
+    rate=settings.UPSTREAM_RATE_PER_S, capacity=settings.UPSTREAM_BURST
+)
+fallback_store = FallbackStore(settings.FALLBACK_DATA_DIR)
+
+logger = logging.getLogger(__name__)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    returns the shared connection-pooled client, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: client with keep-alive pool and connect/read timeouts
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT_S, connect=settings.HTTP_CONNECT_TIMEOUT_S
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_S,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    """closes the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller starts the
+    call, everyone arriving while it is in flight awaits the same result.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        awaits the in-flight call for the key or starts a new one.
+
+        Args:
+            key (Hashable): identifies identical calls.
+            func (Callable[[], Awaitable[Any]]): starts the call if none is in flight.
+
+        Returns:
+            Any: result of the shared call, its exception is raised for every caller.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # a cancelled caller must not cancel the call the others are waiting for
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+
+upstream_requests = SingleFlight()
+
+
+async def _get_json(url: str, params: Dict[str, Any]) -> Optional[Any]:
+    """
+    GETs the url and parses the JSON body. Identical concurrent requests share
+    one upstream call, see _request_json for retries and fast failing.
+
+    Args:
+        url (str): to request.
+        params (Dict[str, Any]): query parameters.
+
+    Returns:
+        Optional[Any]: parsed body, None if the upstream API is not available.
+    """
+    key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+    return await upstream_requests.do(key, lambda: _request_json(url, params))
+
+
+async def _request_json(url: str, params: Dict[str, Any]) -> Optional[Any]:
+    """
+    GETs the url with bounded, jittered retries for transport errors, 429 and
+    5xx responses. The call is skipped while the circuit breaker is open, when
+    the rate limiter has no token in time or when the next retry would exceed
+    settings.UPSTREAM_RETRY_BUDGET_S.
+
+    Args:
+        url (str): to request.
+        params (Dict[str, Any]): query parameters.
+
+    Returns:
+        Optional[Any]: parsed body, None if the upstream API is not available.
+    """
+    ticket = circuit_breaker.allow()
+    if ticket is None:
+        return None
+    try:
+        started_at = time.monotonic()
+        for attempt in range(settings.UPSTREAM_RETRIES + 1):
+            if not await rate_limiter.acquire(settings.UPSTREAM_RATE_LIMIT_WAIT_S):
+                # not an upstream failure, keep the breaker state as it is
+                return None
+            try:
+                response = await get_http_client().get(url=url, params=params)
+            except httpx.HTTPError as e:
+                logger.warning("upstream request failed: %r", e)
+            else:
+                if response.status_code == 200:
+                    circuit_breaker.record_success(ticket)
+                    return response.json()
+                if response.status_code != 429 and response.status_code < 500:
+                    return None
+                logger.warning("upstream responded with %s", response.status_code)
+            delay = backoff_delay(
+                attempt,
+                settings.UPSTREAM_RETRY_BASE_DELAY_S,
+                settings.UPSTREAM_RETRY_MAX_DELAY_S,
+            )
+            if (
+                attempt == settings.UPSTREAM_RETRIES
+                or time.monotonic() - started_at + delay
+                > settings.UPSTREAM_RETRY_BUDGET_S
+            ):
+                break
+            await asyncio.sleep(delay)
+        circuit_breaker.record_failure(ticket)
+        return None
+    finally:
+        # a trial that ended undecided (cancelled, rejected by the rate
+        # limiter, client error) lets the next call try again
+        circuit_breaker.release_trial(ticket)
+
+
+async def get_current_data(
     base_url: Optional[str] = BASE_URL_CURRENT,
     lon: Optional[float] = LON,
     lat: Optional[float] = LAT,
@@ -32,26 +198,141 @@ def get_current_data(
     Returns:
         float: current value
     """
+    reading = await get_current_reading(
+        base_url=base_url, lon=lon, lat=lat, data_field=data_field
+    )
+    assert reading is not None, "no current data available"
+    return reading[1]
+
+
+async def get_current_reading(
+    base_url: Optional[str] = BASE_URL_CURRENT,
+    lon: Optional[float] = LON,
+    lat: Optional[float] = LAT,
+    data_field: Optional[str] = "temperature_2m",
+) -> Optional[Tuple[datetime.datetime, float]]:
+    """
+    fetches the current value together with the time it was measured.
+
+    Args:
+        lon (Optional[float], optional): of location. Defaults to LON.
+        lat (Optional[float], optional): of location. Defaults to LAT.
+        data_field (Optional[str], optional): type of data. Defaults to "temperature_2m".
+
+    Returns:
+        Optional[Tuple[datetime.datetime, float]]: time and value, None if the
+            API is not available or has no value.
+    """
     params = {"latitude": lat, "longitude": lon, "current": data_field}
-    response = requests.get(url=base_url, params=params)
-    assert response.status_code == 200, "no current data available"
-    data = response.json()
-    value = data["current"][data_field]
-    return value
+    data = await _get_json(base_url, params)
+    if data is None or data["current"].get(data_field) is None:
+        return None
+    current = data["current"]
+    return datetime.datetime.fromisoformat(current["time"]), float(current[data_field])
+
+
+async def fetch_hourly_data(
+    base_url: str,
+    lon: float,
+    lat: float,
+    data_fields: List[str],
+    start_date: datetime.date,
+    end_date: datetime.date,
+) -> Optional[pd.DataFrame]:
+    """
+    fetches the raw hourly series of several data fields in one API call.
+
+    Args:
+        base_url (str): of the historical API.
+        lon (float): of location.
+        lat (float): of location.
+        data_fields (List[str]): types of data.
+        start_date (datetime.date): first day.
+        end_date (datetime.date): last day.
+
+    Returns:
+        Optional[pd.DataFrame]: with column time and one column per data field
+            (missing values as NaN), None if the API is not available.
+    """
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "hourly": ",".join(data_fields),
+    }
+    data = await _get_json(base_url, params)
+    if data is None:
+        return None
+    data = data["hourly"]
+    df = pd.DataFrame({"time": pd.to_datetime(data["time"])})
+    for data_field in data_fields:
+        df[data_field] = pd.Series(data[data_field], dtype=float)
+    return df
 
 
-@functools.lru_cache(maxsize=512)
-def get_historical_data(
+async def fetch_hourly_locations(
+    base_url: str,
+    locations: List[Tuple[float, float]],
+    data_field: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+) -> Optional[pd.DataFrame]:
+    """
+    fetches the raw hourly series of one data field for many locations, using
+    comma separated coordinate lists with up to
+    settings.MAX_LOCATIONS_PER_REQUEST locations per API call.
+
+    Args:
+        base_url (str): of the historical API.
+        locations (List[Tuple[float, float]]): (lon, lat) pairs.
+        data_field (str): type of data.
+        start_date (datetime.date): first day.
+        end_date (datetime.date): last day.
+
+    Returns:
+        Optional[pd.DataFrame]: indexed by time with one column per location in
+            the given order (missing values as NaN), None if the API is not available.
+    """
+    chunk_size = settings.MAX_LOCATIONS_PER_REQUEST
+    time, values = None, []
+    for i in range(0, len(locations), chunk_size):
+        chunk = locations[i : i + chunk_size]
+        params = {
+            "latitude": ",".join(str(lat) for _, lat in chunk),
+            "longitude": ",".join(str(lon) for lon, _ in chunk),
+            "start_date": str(start_date),
+            "end_date": str(end_date),
+            "hourly": data_field,
+        }
+        data = await _get_json(base_url, params)
+        if data is None:
+            return None
+        if isinstance(data, dict):
+            data = [data]
+        if time is None:
+            time = pd.to_datetime(data[0]["hourly"]["time"])
+        values.append(
+            np.array([location["hourly"][data_field] for location in data], dtype=float)
+        )
+    return pd.DataFrame(np.vstack(values).T, index=time)
+
+
+async def get_historical_data(
     base_url: Optional[str] = BASE_URL_HIST,
     lon: Optional[float] = LON,
     lat: Optional[float] = LAT,
     data_field: Optional[str] = "temperature_2m",
-    start_date: Optional[datetime.date] = settings.START_DATE,
-    end_date: Optional[datetime.date] = settings.END_DATE,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
     interval: Optional[str] = "1h",
+    aggregation: Optional[str] = "mean",
 ) -> pd.DataFrame:
     """
-    fetches historical sensor data from API for given parameters and returns dataframe.
+    returns historical sensor data for given parameters as dataframe.
+    Results are kept in a size bounded in-memory cache and returned as
+    read-only dataframes, days already in the on-disk store are read from
+    there and only the missing days are fetched from the API.
 
     Args:
         lon (Optional[float], optional): of location. Defaults to LON.
@@ -60,34 +341,370 @@ def get_historical_data(
         start_date (Optional[datetime.date], optional): Defaults to settings.START_DATE.
         end_date (Optional[datetime.date], optional): Defaults to settings.END_DATE.
         interval (Optional[str], optional): Defaults to "hourly".
+        aggregation (Optional[str], optional): of the values within an interval,
+            one of min, mean, max, std and count. Defaults to "mean".
 
     Returns:
         pd.DataFrame: with columns time and value
     """
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start_date,
-        "end_date": end_date,
-        "hourly": data_field,
-    }
-    response = requests.get(url=base_url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        data = data["hourly"]
-        df = pd.DataFrame(data)
-        df["time"] = pd.to_datetime(df["time"])
-        df = df[df["time"] <= datetime.datetime.now()]
-        df = df.dropna()
-        df = df.rename(columns={data_field: "value"})
-        if interval and (interval != "h"):
-            df = (
-                df.groupby(
-                    pd.Grouper(key="time", freq=interval, origin=df["time"].min())
+    start_date = start_date or settings.START_DATE
+    end_date = end_date or settings.END_DATE
+    dfs = await _get_historical_fields(
+        base_url=base_url,
+        lon=lon,
+        lat=lat,
+        data_fields=[data_field],
+        start_date=start_date,
+        end_date=end_date,
+        interval=interval,
+        aggregation=aggregation,
+    )
+    if dfs is None:
+        return fallback_store.get(data_field, start_date, end_date, interval)
+    return dfs[data_field]
+
+
+async def get_historical_data_fields(
+    base_url: Optional[str] = BASE_URL_HIST,
+    lon: Optional[float] = LON,
+    lat: Optional[float] = LAT,
+    data_fields: Optional[List[str]] = ["temperature_2m"],
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    interval: Optional[str] = "1h",
+    aggregation: Optional[str] = "mean",
+) -> pd.DataFrame:
+    """
+    returns several historical data fields as aligned columns. Fields that
+    are not cached are fetched together in one API call.
+
+    Args:
+        lon (Optional[float], optional): of location. Defaults to LON.
+        lat (Optional[float], optional): of location. Defaults to LAT.
+        data_fields (Optional[List[str]], optional): types of data. Defaults to ["temperature_2m"].
+        start_date (Optional[datetime.date], optional): Defaults to settings.START_DATE.
+        end_date (Optional[datetime.date], optional): Defaults to settings.END_DATE.
+        interval (Optional[str], optional): Defaults to "hourly".
+        aggregation (Optional[str], optional): of the values within an interval,
+            one of min, mean, max, std and count. Defaults to "mean".
+
+    Returns:
+        pd.DataFrame: with column time and one column per data field, only
+            times with values for all fields are kept.
+    """
+    start_date = start_date or settings.START_DATE
+    end_date = end_date or settings.END_DATE
+    data_fields = list(dict.fromkeys(data_fields))
+    dfs = await _get_historical_fields(
+        base_url=base_url,
+        lon=lon,
+        lat=lat,
+        data_fields=data_fields,
+        start_date=start_date,
+        end_date=end_date,
+        interval=interval,
+        aggregation=aggregation,
+    )
+    if dfs is None:
+        dfs = {
+            data_field: fallback_store.get(data_field, start_date, end_date, interval)
+            for data_field in data_fields
+        }
+    df = None
+    for data_field in data_fields:
+        field_df = dfs[data_field].rename(columns={"value": data_field})
+        df = field_df if df is None else df.merge(field_df, on="time", how="inner")
+    return df
+
+
+async def get_historical_locations(
+    base_url: Optional[str] = BASE_URL_HIST,
+    locations: Optional[List[Tuple[float, float]]] = [(LON, LAT)],
+    data_field: Optional[str] = "temperature_2m",
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    interval: Optional[str] = "1h",
+) -> Optional[pd.DataFrame]:
+    """
+    returns one data field for many locations as a location x time matrix.
+    Cached locations are taken from the in-memory cache, the others are read
+    from the on-disk store and their missing days are fetched in batched API
+    calls. Post-processing runs on all fetched locations at once.
+
+    Args:
+        locations (Optional[List[Tuple[float, float]]], optional): (lon, lat) pairs.
+            Defaults to [(LON, LAT)].
+        data_field (Optional[str], optional): type of data. Defaults to "temperature_2m".
+        start_date (Optional[datetime.date], optional): Defaults to settings.START_DATE.
+        end_date (Optional[datetime.date], optional): Defaults to settings.END_DATE.
+        interval (Optional[str], optional): Defaults to "hourly".
+
+    Returns:
+        Optional[pd.DataFrame]: indexed by time with one column per location in the
+            given order, only times with values for all locations are kept.
+            None if the API is not available.
+    """
+    start_date = start_date or settings.START_DATE
+    end_date = end_date or settings.END_DATE
+    series, missing = {}, []
+    for i, (lon, lat) in enumerate(locations):
+        key = historical_cache_key(
+            base_url, lon, lat, data_field, start_date, end_date, interval
+        )
+        df = historical_cache.get(key)
+        if df is None:
+            missing.append(i)
+        else:
+            series[i] = df.set_index("time")["value"]
+    if missing:
+        days = date_range(start_date, end_date)
+        # the store touches the disk, keep it off the event loop
+        missing_days = {
+            i: await asyncio.to_thread(
+                store.missing_days, *locations[i], data_field, days
+            )
+            for i in missing
+        }
+        to_fetch = [i for i in missing if missing_days[i]]
+        fetched = None
+        if to_fetch:
+            fetch_days = sorted({day for i in to_fetch for day in missing_days[i]})
+            fetched = await fetch_hourly_locations(
+                base_url=base_url,
+                locations=[locations[i] for i in to_fetch],
+                data_field=data_field,
+                start_date=fetch_days[0],
+                end_date=fetch_days[-1],
+            )
+            if fetched is None:
+                return None
+            fetched.columns = to_fetch
+        columns = {}
+        for i in missing:
+            stored = await asyncio.to_thread(
+                store.read, *locations[i], data_field, days
+            )
+            stored = stored.set_index("time")
+            column = stored["value"]
+            if fetched is not None and i in fetched.columns:
+                fetched_field = fetched[i].rename("value").rename_axis("time")
+                await asyncio.to_thread(
+                    store.write, *locations[i], data_field, fetched_field.reset_index()
                 )
-                .agg(value=("value", "mean"))
-                .reset_index()
+                column = fetched_field.combine_first(column)
+            columns[i] = column
+        wide = _postprocess_wide(pd.DataFrame(columns), interval)
+        for i in missing:
+            lon, lat = locations[i]
+            key = historical_cache_key(
+                base_url, lon, lat, data_field, start_date, end_date, interval
             )
-    else:
-        df = pd.read_csv("./backup_data/df.csv")
-    return df
+            df = historical_cache.put(
+                key, wide[i].dropna().rename("value").reset_index()
+            )
+            series[i] = df.set_index("time")["value"]
+    matrix = pd.DataFrame({i: series[i] for i in range(len(locations))})
+    return matrix.dropna()
+
+
+def historical_cache_key(
+    base_url: str,
+    lon: float,
+    lat: float,
+    data_field: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    interval: Optional[str],
+) -> Tuple:
+    """
+    returns the in-memory cache key of one data field for one location.
+
+    Returns:
+        Tuple: hashable cache key.
+    """
+    return (base_url, lon, lat, data_field, start_date, end_date, interval)
+
+
+def evict_historical_data(
+    base_url: str,
+    lon: float,
+    lat: float,
+    data_field: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+):
+    """
+    drops the cached base data of one data field for one location and date
+    range, together with every interval derived from it.
+    """
+    key = historical_cache_key(
+        base_url, lon, lat, data_field, start_date, end_date, BASE_INTERVAL
+    )
+    historical_cache.pop(key)
+    resampled_cache.pop_prefix(key[:-1])
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    returns the counters of the historical data cache and, prefixed with
+    "resampled_", of the cache for data derived from it.
+
+    Returns:
+        Dict[str, int]: hits, misses, evictions, entries, bytes and max_bytes.
+    """
+    return {
+        **historical_cache.stats(),
+        **{f"resampled_{k}": v for k, v in resampled_cache.stats().items()},
+    }
+
+
+async def _get_historical_fields(
+    base_url: str,
+    lon: float,
+    lat: float,
+    data_fields: List[str],
+    start_date: datetime.date,
+    end_date: datetime.date,
+    interval: Optional[str],
+    aggregation: str = "mean",
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    looks up the hourly base data of every data field in the in-memory cache,
+    loads the missing ones together and derives the interval from the base.
+
+    Returns:
+        Optional[Dict[str, pd.DataFrame]]: dataframe with columns time and
+            value per data field, None if the API is not available.
+    """
+    dfs, missing_fields = {}, []
+    for data_field in data_fields:
+        key = historical_cache_key(
+            base_url, lon, lat, data_field, start_date, end_date, BASE_INTERVAL
+        )
+        df = historical_cache.get(key)
+        if df is None:
+            missing_fields.append(data_field)
+        else:
+            dfs[data_field] = df
+    if missing_fields:
+        loaded = await _load_historical_data(
+            base_url=base_url,
+            lon=lon,
+            lat=lat,
+            data_fields=missing_fields,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if loaded is None:
+            return None
+        for data_field, df in loaded.items():
+            key = historical_cache_key(
+                base_url, lon, lat, data_field, start_date, end_date, BASE_INTERVAL
+            )
+            dfs[data_field] = historical_cache.put(key, df)
+    if is_base_interval(interval):
+        return dfs
+    resampled = {}
+    for data_field, df in dfs.items():
+        key = historical_cache_key(
+            base_url, lon, lat, data_field, start_date, end_date, interval
+        )
+        aggregates = resampled_cache.get(key)
+        if aggregates is None:
+            aggregates = resampled_cache.put(key, resample_aggregates(df, interval))
+        resampled[data_field] = select_aggregate(aggregates, aggregation)
+    return resampled
+
+
+async def _load_historical_data(
+    base_url: str,
+    lon: float,
+    lat: float,
+    data_fields: List[str],
+    start_date: datetime.date,
+    end_date: datetime.date,
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    reads the requested range from the on-disk store, fetching the missing
+    days of all data fields in one API call.
+
+    Returns:
+        Optional[Dict[str, pd.DataFrame]]: dataframe with columns time and
+            value per data field, None if the API is not available.
+    """
+    days = date_range(start_date, end_date)
+    # the store touches the disk, keep it off the event loop
+    missing_days = sorted(
+        {
+            day
+            for data_field in data_fields
+            for day in await asyncio.to_thread(
+                store.missing_days, lon, lat, data_field, days
+            )
+        }
+    )
+    fetched = None
+    if missing_days:
+        fetched = await fetch_hourly_data(
+            base_url=base_url,
+            lon=lon,
+            lat=lat,
+            data_fields=data_fields,
+            start_date=missing_days[0],
+            end_date=missing_days[-1],
+        )
+        if fetched is None:
+            return None
+    dfs = {}
+    for data_field in data_fields:
+        fetched_field = None
+        if fetched is not None:
+            fetched_field = fetched[["time", data_field]].rename(
+                columns={data_field: "value"}
+            )
+            await asyncio.to_thread(store.write, lon, lat, data_field, fetched_field)
+        df = await asyncio.to_thread(store.read, lon, lat, data_field, days)
+        if fetched_field is not None:
+            # days that were incomplete upstream are not stored, take them as fetched
+            not_stored = (
+                ~fetched_field["time"].dt.normalize().isin(df["time"].dt.normalize())
+            )
+            df = pd.concat([df, fetched_field[not_stored]], ignore_index=True)
+            df = df.sort_values("time", ignore_index=True)
+        dfs[data_field] = _postprocess(df)
+    return dfs
+
+
+def _postprocess(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    drops future and missing values of hourly data.
+
+    Args:
+        df (pd.DataFrame): hourly data with columns time and value.
+
+    Returns:
+        pd.DataFrame: with columns time and value
+    """
+    wide = _postprocess_wide(df.set_index("time")[["value"]], BASE_INTERVAL)
+    return wide.dropna().reset_index()
+
+
+def _postprocess_wide(wide: pd.DataFrame, interval: Optional[str]) -> pd.DataFrame:
+    """
+    drops future values and aggregates all columns of a time indexed
+    dataframe to the given interval in one pass. Bins are aligned to the
+    first time with any value.
+
+    Args:
+        wide (pd.DataFrame): hourly data indexed by time, one column per series.
+        interval (Optional[str]): pandas frequency string, "h" keeps hourly data.
+
+    Returns:
+        pd.DataFrame: indexed by time, missing values as NaN.
+    """
+    wide = wide[wide.index <= datetime.datetime.now()]
+    wide = wide.dropna(how="all")
+    wide.index.name = "time"
+    if not is_base_interval(interval) and not wide.empty:
+        wide = wide.resample(interval, origin=wide.index.min()).mean()
+    return wide
@@ -0,0 +1,108 @@
+"""
+Per-request latency of the statistical operations on 1000 values, computed
+the DataFrame way the endpoints used to (build, validate, add column, round,
+to_dict) and the array way they do now.
+
+Run from the backend directory:
+    python -m benchmarks.bench_analysis_core
+"""
+
+import timeit
+import numpy as np
+import pandas as pd
+
+import analysis_core as core
+from data_analysis_tools import (
+    add_deviation,
+    add_distance_to_before,
+    add_distance_to_next,
+    add_polynomial_fit,
+    add_rolling_average,
+    add_summary_statistic,
+)
+
+N_VALUES = 1000
+DURATION_S = 300
+REPEAT = 200
+
+
+def _dataframe(data):
+    return pd.DataFrame({"time": np.linspace(0, DURATION_S, len(data)), "value": data})
+
+
+def _respond_dataframe(df):
+    return df.round(1).to_dict(orient="list")
+
+
+def _respond_array(values):
+    return {
+        "time": core.time_axis(len(values), DURATION_S).round(1).tolist(),
+        "value": np.round(values, 1).tolist(),
+    }
+
+
+def _rolling_deviation_dataframe(data):
+    df = add_rolling_average(_dataframe(data), "value", "value_abs", window_size=8)
+    df = add_deviation(df, "value_abs", "value", "value")
+    return _respond_dataframe(df)
+
+
+def _rolling_deviation_array(data):
+    values = core.as_values(data)
+    return _respond_array(
+        core.deviation(values, core.rolling_average(values, window_size=8))
+    )
+
+
+CASES = {
+    "distance_to_before": (
+        lambda data: _respond_dataframe(
+            add_distance_to_before(_dataframe(data), "value", "value")
+        ),
+        lambda data: _respond_array(core.distance_to_before(core.as_values(data))),
+    ),
+    "distance_to_next": (
+        lambda data: _respond_dataframe(
+            add_distance_to_next(_dataframe(data), "value", "value")
+        ),
+        lambda data: _respond_array(core.distance_to_next(core.as_values(data))),
+    ),
+    "polynomial_fit": (
+        lambda data: _respond_dataframe(
+            add_polynomial_fit(_dataframe(data), "value", "value", degree=5)
+        ),
+        lambda data: _respond_array(core.polynomial_values(core.as_values(data), 5)),
+    ),
+    "rolling_average_deviation": (
+        _rolling_deviation_dataframe,
+        _rolling_deviation_array,
+    ),
+    "summary_statistic": (
+        lambda data: _respond_dataframe(
+            add_summary_statistic(_dataframe(data), "median", "value", "value")
+        ),
+        lambda data: _respond_array(
+            np.full(len(data), core.summary_statistic(core.as_values(data), "median"))
+        ),
+    ),
+}
+
+
+def main():
+    data = np.random.default_rng(0).normal(size=N_VALUES).cumsum().tolist()
+    print(f"{'operation':<28}{'dataframe µs':>14}{'array µs':>12}{'speedup':>10}")
+    for name, (with_dataframe, with_array) in CASES.items():
+        timings = []
+        for function in (with_dataframe, with_array):
+            seconds = min(
+                timeit.repeat(lambda: function(data), number=REPEAT, repeat=5)
+            )
+            timings.append(seconds / REPEAT * 1e6)
+        print(
+            f"{name:<28}{timings[0]:>14.1f}{timings[1]:>12.1f}"
+            f"{timings[0] / timings[1]:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
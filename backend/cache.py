@@ -0,0 +1,138 @@
+"""
+In-memory cache for dataframes, bounded by the total size of the cached
+arrays. Entries are stored as read-only numpy arrays and handed out as new
+dataframes over those arrays, so callers get zero-copy results that cannot
+modify what is cached.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def _to_read_only_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    columns = {}
+    for column in df.columns:
+        array = df[column].to_numpy(copy=True)
+        array.flags.writeable = False
+        columns[column] = array
+    return columns
+
+
+class DataFrameCache:
+    """
+    LRU cache that evicts the least recently used dataframes once the
+    cached arrays exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Dict[str, np.ndarray]]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """
+        returns a read-only view of the cached dataframe.
+
+        Args:
+            key (Hashable): cache key.
+
+        Returns:
+            Optional[pd.DataFrame]: cached dataframe or None on a miss.
+        """
+        with self._lock:
+            columns = self._entries.get(key)
+            if columns is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pd.DataFrame(columns, copy=False)
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        stores the dataframe and returns a read-only view of it. Dataframes
+        larger than the whole cache are returned without being stored.
+
+        Args:
+            key (Hashable): cache key.
+            df (pd.DataFrame): dataframe to cache.
+
+        Returns:
+            pd.DataFrame: read-only view of the cached data.
+        """
+        columns = _to_read_only_columns(df)
+        size = sum(array.nbytes for array in columns.values())
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if size <= self.max_bytes:
+                self._entries[key] = columns
+                self._sizes[key] = size
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    old_key, _ = self._entries.popitem(last=False)
+                    self.current_bytes -= self._sizes.pop(old_key)
+                    self.evictions += 1
+        return pd.DataFrame(columns, copy=False)
+
+    def pop(self, key: Hashable):
+        """
+        removes the entry for the key if it is cached.
+
+        Args:
+            key (Hashable): cache key.
+        """
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self.current_bytes -= self._sizes.pop(key)
+
+    def pop_prefix(self, prefix: Tuple):
+        """
+        removes the entries of all tuple keys that start with the prefix.
+
+        Args:
+            prefix (Tuple): leading elements of the keys.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if isinstance(key, tuple) and key[: len(prefix)] == prefix
+            ]
+            for key in keys:
+                del self._entries[key]
+                self.current_bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        """removes all entries, the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        returns the cache counters.
+
+        Returns:
+            Dict[str, int]: hits, misses, evictions, entries, bytes and max_bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,213 @@
+"""
+CC automation of several synthesizer parameters at once. The parameter
+names and their CC numbers come from cc_parameter_mapping.json, every lane
+maps one data series to the CC values of one parameter. All lanes are
+sampled on a shared time grid and scaled in one pass over a lane × time
+matrix, with the semantics of data_to_midi_tools.set_cc_values.
+"""
+
+import json
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def load_cc_parameters(path: str) -> Dict[str, int]:
+    """
+    reads the parameter name -> CC number mapping.
+
+    Args:
+        path (str): path of the JSON file.
+
+    Returns:
+        Dict[str, int]: CC number by parameter name, empty if the file is missing or invalid.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            mapping = json.load(f)
+        return {str(name): int(number) for name, number in mapping.items()}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning("CC parameter mapping '%s' not loaded: %s", path, e)
+        return {}
+
+
+def scale_cc(
+    values: np.ndarray,
+    midi_min: Sequence[int],
+    midi_max: Sequence[int],
+    reverse: Sequence[bool],
+    from_min: np.ndarray = None,
+    from_max: np.ndarray = None,
+) -> np.ndarray:
+    """
+    scales every row of a lane × time matrix linearly from its value range
+    to its MIDI range and truncates to integers. Rows without a value range
+    are set to their minimum.
+
+    Args:
+        values (np.ndarray): lane × time matrix.
+        midi_min (Sequence[int]): minimum CC value per lane.
+        midi_max (Sequence[int]): maximum CC value per lane.
+        reverse (Sequence[bool]): reverse the mapping per lane.
+        from_min (np.ndarray, optional): lower end of the value range per
+            lane. Defaults to None, the minimum of the row.
+        from_max (np.ndarray, optional): upper end of the value range per
+            lane. Defaults to None, the maximum of the row.
+
+    Returns:
+        np.ndarray: lane × time matrix of CC values.
+    """
+    values = np.asarray(values, dtype=float)
+    midi_min = np.asarray(midi_min, dtype=float)[:, None]
+    midi_max = np.asarray(midi_max, dtype=float)[:, None]
+    reverse = np.asarray(reverse, dtype=bool)[:, None]
+    from_min = (values.min(axis=1) if from_min is None else from_min)[:, None]
+    from_max = (values.max(axis=1) if from_max is None else from_max)[:, None]
+    span = from_max - from_min
+    with np.errstate(invalid="ignore", divide="ignore"):
+        position = np.where(reverse, from_max - values, values - from_min) / span
+        scaled = position * (midi_max - midi_min) + midi_min
+    scaled = np.where(span == 0, midi_min, scaled)
+    return scaled.astype(int)
+
+
+def shared_grid(series: Sequence[np.ndarray], n_steps: int) -> np.ndarray:
+    """
+    samples series of any length on a grid of n_steps points by linear
+    interpolation, the first and last values of every series stay on the
+    first and last point.
+
+    Args:
+        series (Sequence[np.ndarray]): data series, spread over the same duration.
+        n_steps (int): number of grid points.
+
+    Returns:
+        np.ndarray: series × n_steps matrix.
+    """
+    grid = np.linspace(0.0, 1.0, n_steps)
+    result = np.empty((len(series), n_steps))
+    for i, values in enumerate(series):
+        if len(values) == n_steps:
+            result[i] = values
+        else:
+            result[i] = np.interp(grid, np.linspace(0.0, 1.0, len(values)), values)
+    return result
+
+
+def resample_steps(
+    values: np.ndarray,
+    duration_s: float,
+    step_s: float,
+    max_steps: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    resamples a series spread over duration_s to steps of step_s seconds,
+    which may be fractions of a second. Downsampling averages the values
+    falling into every step, upsampling interpolates linearly at the start
+    of every step. The last step takes the remainder of the duration.
+
+    Args:
+        values (np.ndarray): data series.
+        duration_s (float): total duration in seconds.
+        step_s (float): duration of a step in seconds. Steps of zero or
+            beyond the duration give a single step holding the mean.
+        max_steps (int, optional): largest allowed number of steps. Defaults to None.
+
+    Raises:
+        ValueError: If the steps would exceed max_steps.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: value and duration per step.
+    """
+    values = np.asarray(values, dtype=float)
+    if not 0 < step_s < duration_s:
+        step_s = duration_s
+    # the tolerance keeps e.g. 300 / 0.01 from rounding down to 29999 steps
+    n_steps = max(1, int(np.floor(duration_s / step_s + 1e-6)))
+    if max_steps is not None and n_steps > max_steps:
+        raise ValueError(
+            f"{duration_s} s in steps of {step_s} s are {n_steps} CC values, "
+            f"at most {max_steps} are allowed."
+        )
+    starts = np.arange(n_steps) * step_s
+    durations = np.full(n_steps, float(step_s))
+    durations[-1] = duration_s - starts[-1]
+    times = np.linspace(0, duration_s, len(values))
+    if n_steps < len(values):
+        steps = np.minimum((times / step_s).astype(int), n_steps - 1)
+        counts = np.bincount(steps, minlength=n_steps)
+        sums = np.bincount(steps, weights=values, minlength=n_steps)
+        # steps without a value of their own are interpolated at their center
+        resampled = np.interp(starts + durations / 2, times, values)
+        np.divide(sums, counts, out=resampled, where=counts > 0)
+    else:
+        resampled = np.interp(starts, times, values)
+    return resampled, durations
+
+
+def _run_ends(values: np.ndarray, max_error: int) -> np.ndarray:
+    # for every event the index of the first later event that deviates more
+    # than max_error from it, found for all events at once by binary lifting
+    # over sparse tables of the range minima and maxima
+    n = len(values)
+    low, high = values - max_error, values + max_error
+    maxima, minima = [values], [values]
+    while 2 ** len(maxima) <= n:
+        half = 2 ** (len(maxima) - 1)
+        maxima.append(np.maximum(maxima[-1][:-half], maxima[-1][half:]))
+        minima.append(np.minimum(minima[-1][:-half], minima[-1][half:]))
+    ends = np.arange(1, n + 1)
+    for level in range(len(maxima) - 1, -1, -1):
+        block = 2**level
+        fits = ends + block <= n
+        at = np.where(fits, ends, 0)
+        fits &= (maxima[level][at] <= high) & (minima[level][at] >= low)
+        ends[fits] += block
+    return ends
+
+
+def _chain(jumps: np.ndarray) -> np.ndarray:
+    # indices visited from 0 by following jumps until len(jumps), by pointer
+    # doubling: after k rounds every index within 2**k jumps is reached
+    n = len(jumps)
+    jumps = np.append(jumps, n)
+    reached = np.zeros(n + 1, dtype=bool)
+    reached[0] = True
+    while True:
+        targets = jumps[np.flatnonzero(reached)]
+        reached[targets] = True
+        if (targets == n).all():
+            break
+        jumps = jumps[jumps]
+    return np.flatnonzero(reached[:n])
+
+
+def thin_cc(
+    cc_messages: np.ndarray, durations: np.ndarray, max_error: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    merges consecutive CC events into longer events. The frontend holds every
+    CC value until the next event (piecewise constant, "held steps"), so a
+    line-simplification like RDP that interpolates between kept points does
+    not apply: instead an event is held for as long as the following values
+    stay within max_error of it, and absorbs their durations. Every kept
+    event sends one of the original values, and while it is held every
+    replaced value is off by at most max_error CC steps. With max_error 0
+    only runs of identical values are merged.
+
+    Args:
+        cc_messages (np.ndarray): CC value per event.
+        durations (np.ndarray): duration per event.
+        max_error (int, optional): largest allowed deviation in CC steps. Defaults to 0.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: CC value and duration per remaining event.
+    """
+    cc_messages = np.asarray(cc_messages, dtype=int)
+    durations = np.asarray(durations, dtype=float)
+    if len(cc_messages) == 0:
+        return cc_messages, durations
+    starts = _chain(_run_ends(cc_messages, max_error))
+    return cc_messages[starts], np.add.reduceat(durations, starts)
@@ -0,0 +1,202 @@
+"""
+Chord progressions and permutations as lookup tables. A chord type is a generator that
+returns the progression from a start note as a (length × notes per chord)
+array; the tables are built once per chord type, start note and length,
+clamped to the MIDI range and cached as read-only uint8 arrays. Values are
+mapped to chords by ranking them and indexing the table. The notes of a
+chord are permuted by a permutation picked from the table of all orders
+with a stable hash of a seed value, without any global random state.
+
+New chord families are added with the `register_chord_type` decorator and
+are then available to the chord endpoints:
+
+    @register_chord_type("sixths")
+    def _sixths(start_note: int, length: int) -> np.ndarray:
+        first = [start_note, start_note + 4, start_note + 9]
+        return voice_leading(first, voices=(2, 1, 0), steps=(2,), length=length)
+"""
+
+from functools import lru_cache
+from itertools import permutations
+from typing import Callable, Dict, Sequence
+import numpy as np
+
+ChordGenerator = Callable[[int, int], np.ndarray]
+
+CHORD_GENERATORS: Dict[str, ChordGenerator] = {}
+
+
+def register_chord_type(name: str):
+    """
+    registers a chord generator under a name.
+
+    Args:
+        name (str): chord type, e.g. "triads".
+
+    Returns:
+        Callable: decorator for a function (start_note, length) -> np.ndarray.
+    """
+
+    def decorator(generator: ChordGenerator) -> ChordGenerator:
+        CHORD_GENERATORS[name] = generator
+        chord_table.cache_clear()
+        return generator
+
+    return decorator
+
+
+@lru_cache(maxsize=256)
+def chord_table(chord_type: str, start_note: int, length: int) -> np.ndarray:
+    """
+    returns the cached progression of a chord type.
+
+    Args:
+        chord_type (str): registered chord type.
+        start_note (int): lowest note of the first chord.
+        length (int): number of chords.
+
+    Raises:
+        ValueError: If the chord type is not registered.
+
+    Returns:
+        np.ndarray: read-only uint8 array with one chord per row, clamped to 0-127.
+    """
+    if chord_type not in CHORD_GENERATORS:
+        raise ValueError(f"Unsupported chord type: '{chord_type}'")
+    table = np.clip(CHORD_GENERATORS[chord_type](start_note, length), 0, 127)
+    table = table.astype(np.uint8)
+    table.flags.writeable = False
+    return table
+
+
+def voice_leading(
+    first_chord: Sequence[int],
+    voices: Sequence[int],
+    steps: Sequence[int],
+    length: int,
+) -> np.ndarray:
+    """
+    builds a progression in which every chord moves one voice of the
+    previous chord up. The moved voice and the step size cycle through the
+    given sequences.
+
+    Args:
+        first_chord (Sequence[int]): notes of the first chord.
+        voices (Sequence[int]): indices of the voices to move, in turn.
+        steps (Sequence[int]): semitones to move them by, in turn.
+        length (int): number of chords.
+
+    Returns:
+        np.ndarray: chords as rows.
+    """
+    moves = np.arange(length - 1)
+    moved_voices = np.asarray(voices)[moves % len(voices)]
+    move_steps = np.asarray(steps)[moves % len(steps)]
+    changes = np.zeros((length, len(first_chord)), dtype=int)
+    changes[moves + 1, moved_voices] = move_steps
+    return np.asarray(first_chord) + changes.cumsum(axis=0)
+
+
+@register_chord_type("triads")
+def _triads(start_note: int, length: int) -> np.ndarray:
+    # minor triad, alternating half and whole tone steps from the top voice down
+    first = [start_note, start_note + 3, start_note + 7]
+    return voice_leading(first, voices=(2, 1, 0), steps=(1, 2), length=length)
+
+
+@register_chord_type("tetrads")
+def _tetrads(start_note: int, length: int) -> np.ndarray:
+    first = [start_note, start_note + 7, start_note + 9, start_note + 16]
+    return voice_leading(first, voices=(2, 1, 0, 3), steps=(2,), length=length)
+
+
+@register_chord_type("sus4")
+def _sus4(start_note: int, length: int) -> np.ndarray:
+    first = [start_note, start_note + 5, start_note + 7]
+    return voice_leading(first, voices=(2, 1, 0), steps=(2, 1), length=length)
+
+
+@register_chord_type("sevenths")
+def _sevenths(start_note: int, length: int) -> np.ndarray:
+    # starting from a dominant seventh chord
+    first = [start_note, start_note + 4, start_note + 7, start_note + 10]
+    return voice_leading(first, voices=(3, 2, 1, 0), steps=(1, 2), length=length)
+
+
+@register_chord_type("clusters")
+def _clusters(start_note: int, length: int) -> np.ndarray:
+    # three adjacent semitones, the lowest voice jumps over the others
+    first = [start_note, start_note + 1, start_note + 2]
+    return voice_leading(first, voices=(0, 1, 2), steps=(3,), length=length)
+
+
+def map_to_chords(values: np.ndarray, chord_type: str, start_note: int) -> np.ndarray:
+    """
+    maps every distinct value, in sorted order, to the next chord of the
+    progression.
+
+    Args:
+        values (np.ndarray): values.
+        chord_type (str): registered chord type.
+        start_note (int): lowest note of the first chord.
+
+    Raises:
+        ValueError: If the chord type is not registered.
+
+    Returns:
+        np.ndarray: uint8 array with the chord of every value as a row.
+    """
+    uniques, ranks = np.unique(np.asarray(values, dtype=float), return_inverse=True)
+    return chord_table(chord_type, start_note, len(uniques))[ranks]
+
+
+@lru_cache(maxsize=8)
+def permutation_table(size: int) -> np.ndarray:
+    """
+    returns all permutations of `size` elements in lexicographic order.
+
+    Args:
+        size (int): number of elements.
+
+    Returns:
+        np.ndarray: read-only uint8 array with size! rows.
+    """
+    table = np.array(list(permutations(range(size))), dtype=np.uint8)
+    table.flags.writeable = False
+    return table
+
+
+def stable_hash(values: np.ndarray) -> np.ndarray:
+    """
+    hashes floats by their bit pattern with the splitmix64 finalizer, so
+    equal values get equal hashes in every process and on every platform.
+
+    Args:
+        values (np.ndarray): values, -0.0 and 0.0 hash alike.
+
+    Returns:
+        np.ndarray: uint64 hashes.
+    """
+    bits = (np.asarray(values, dtype="<f8") + 0.0).view(np.uint64)
+    bits = (bits ^ (bits >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    bits = (bits ^ (bits >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return bits ^ (bits >> np.uint64(31))
+
+
+def permute_chords(chords: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    """
+    reorders the notes of every chord deterministically by its seed value.
+
+    Args:
+        chords (np.ndarray): one chord per row.
+        seeds (np.ndarray): seed value per chord.
+
+    Returns:
+        np.ndarray: new array with the permuted chords.
+    """
+    chords = np.asarray(chords)
+    if chords.ndim != 2 or len(chords) == 0:
+        return chords.copy()
+    table = permutation_table(chords.shape[1])
+    orders = table[stable_hash(seeds) % np.uint64(len(table))]
+    return np.take_along_axis(chords, orders.astype(np.intp), axis=1)
@@ -1,4 +1,5 @@
 from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
 from pydantic_settings import BaseSettings
 import pytz
 
@@ -17,6 +18,60 @@ class Settings(BaseSettings):
     DURATION: int = 300
     MIDI_DEVICE_NAME: str = "Arturia MicroFreak 1"
     LOWEST_MIDI_NOTE: int = 36
+    CC_PARAMETER_MAPPING_PATH: str = "../cc_parameter_mapping.json"
+    MAX_CC_LANES: int = 32
+    MIN_CC_STEP_S: float = 0.001
+    HIGHEST_MIDI_NOTE: int = 127
+    CV_MAX_WORKERS: int = 4
+    CV_WORK_BUDGET: int = 400_000_000
+    MAX_ROLLING_WINDOWS: int = 32
+    MAX_DATA_ITEMS: int = 100_000
+    MAX_PIPELINE_NODES: int = 32
+    HTTP_CONNECT_TIMEOUT_S: float = 5.0
+    HTTP_READ_TIMEOUT_S: float = 20.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY_S: float = 30.0
+    DATA_STORE_DIR: str = "./data_store"
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESAMPLED_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    MAX_LOCATIONS: int = 100
+    MAX_LOCATIONS_PER_REQUEST: int = 50
+    UPSTREAM_RETRIES: int = 2
+    UPSTREAM_RETRY_BASE_DELAY_S: float = 0.2
+    UPSTREAM_RETRY_MAX_DELAY_S: float = 2.0
+    UPSTREAM_RETRY_BUDGET_S: float = 8.0
+    UPSTREAM_RATE_PER_S: float = 5.0
+    UPSTREAM_BURST: int = 10
+    UPSTREAM_RATE_LIMIT_WAIT_S: float = 1.0
+    CIRCUIT_BREAKER_FAILURES: int = 5
+    CIRCUIT_BREAKER_RESET_S: float = 30.0
+    FALLBACK_DATA_DIR: str = "./backup_data"
+    LIVE_POLL_INTERVAL_S: float = 60.0
+    LIVE_BUFFER_SIZE: int = 1000
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_CHECK_INTERVAL_S: int = 900
+    PREFETCH_LOCATIONS: List[Tuple[float, float]] = []
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_DIR: Optional[str] = None
+    RESPONSE_CACHE_DIR_MAX_BYTES: int = 256 * 1024 * 1024
+
+    def roll_default_dates(self) -> bool:
+        """
+        moves END_DATE to yesterday and START_DATE along with it, keeping the
+        length of the default window.
+
+        Returns:
+            bool: True if the dates changed.
+        """
+        end_date = datetime.now(tz=pytz.timezone(self.TIMEZONE)).date() - timedelta(
+            days=1
+        )
+        if end_date == self.END_DATE:
+            return False
+        self.START_DATE = end_date - (self.END_DATE - self.START_DATE)
+        self.END_DATE = end_date
+        return True
 
 
 settings = Settings()
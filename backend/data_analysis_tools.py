@@ -4,13 +4,17 @@ based on a column as a new column and return the DataFrame.
 """
 
 from typing import List, Literal, Optional, Tuple
-import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import PolynomialFeatures
 
+from analysis_core import (
+    best_polynomial_degree,
+    deviation,
+    distance_to_before,
+    distance_to_next,
+    polynomial_values,
+    rolling_average,
+    summary_statistic,
+)
 from exceptions import validate_dataframe
 
 
@@ -35,13 +39,7 @@ def add_distance_to_before(
     with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
         if to_column is None:
             to_column = f"{on_column}_distance_to_before"
-        distances = df[on_column].diff().abs()
-        distances.iloc[0] = abs(df[on_column].iloc[0] - df[on_column].iloc[-1])
-
-        min_distance = np.nanmin(distances)
-        distances = distances.fillna(min_distance)
-
-        df[to_column] = distances
+        df[to_column] = distance_to_before(df[on_column].to_numpy(dtype=float))
         return df
 
 
@@ -66,13 +64,7 @@ def add_distance_to_next(
     with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
         if to_column is None:
             to_column = f"{on_column}_distance_to_next"
-        distances = abs(df[on_column].shift(-1) - df[on_column])
-        distances.iloc[-1] = abs(df[on_column].iloc[0] - df[on_column].iloc[-1])
-
-        min_distance = np.nanmin(distances)
-        distances = distances.fillna(min_distance)
-
-        df[to_column] = distances
+        df[to_column] = distance_to_next(df[on_column].to_numpy(dtype=float))
         return df
 
 
@@ -82,16 +74,23 @@ def find_best_polynomial_fit(
     max_degree: int = 24,
     random_state: int = 42,
     test_size: float = 0.2,
+    method: Literal["holdout", "kfold", "loo"] = "holdout",
+    folds: int = 5,
 ) -> Tuple[List[float], List[float], int]:
     """
     Finds the best polynomial degree for fitting a regression model based on validation MSE.
+    All degrees are evaluated from one QR factorization in an orthogonal basis,
+    see polynomial_fitting.
 
     Args:
         df (pd.DataFrame): Input DataFrame containing the data.
         on_column (str): Column name to fit the polynomial regression on.
         max_degree (int): Maximum polynomial degree to test.
         random_state (int): Random seed for reproducibility.
-        test_size (float): Fraction of data to use as the test set.
+        test_size (float): Fraction of data to use as the test set (holdout only).
+        method (Literal["holdout", "kfold", "loo"]): Validation scheme, a single
+            train/test split, k-fold cross-validation or leave-one-out.
+        folds (int): Number of folds for k-fold cross-validation.
 
     Returns:
         Tuple[List[float], List[float], int]:
@@ -101,43 +100,18 @@ def find_best_polynomial_fit(
 
     Raises:
         ValueError: If the DataFrame is empty or the `on_column` is invalid.
+        ValueError: If an unsupported `method` is provided.
     """
     with validate_dataframe(df, on_column, expected_type=[float, int]):
-        if max_degree > len(df) - 1:
-            max_degree = len(df) - 1
-        df = df.reset_index(drop=True)
-        x = df.index.values.reshape(-1, 1)
-        y = df[on_column].values
-
-        x_train, x_test, y_train, y_test = train_test_split(
-            x, y, test_size=test_size, random_state=random_state
+        return best_polynomial_degree(
+            df[on_column].to_numpy(dtype=float),
+            max_degree=max_degree,
+            random_state=random_state,
+            test_size=test_size,
+            method=method,
+            folds=folds,
         )
 
-        mse_train, mse_val = [], []
-        degrees = range(1, max_degree + 1)
-
-        for degree in degrees:
-            poly = PolynomialFeatures(degree=degree)
-            x_poly_train = poly.fit_transform(x_train)
-            x_poly_test = poly.transform(x_test)
-
-            if not np.isfinite(x_poly_train).all():
-                raise ValueError(
-                    f"PolynomialFeatures produced invalid values at degree {degree}."
-                )
-
-            model = LinearRegression()
-            model.fit(x_poly_train, y_train)
-
-            y_train_pred = model.predict(x_poly_train)
-            y_test_pred = model.predict(x_poly_test)
-
-            mse_train.append(mean_squared_error(y_train, y_train_pred))
-            mse_val.append(mean_squared_error(y_test, y_test_pred))
-
-        best_degree = degrees[np.argmin(mse_val)]
-        return mse_train, mse_val, best_degree
-
 
 def add_polynomial_fit(
     df: pd.DataFrame,
@@ -162,16 +136,7 @@ def add_polynomial_fit(
     """
     with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
         df = df.reset_index(drop=True)
-        x = df.index.values.reshape(-1, 1)
-        y = df[on_column].values
-
-        poly = PolynomialFeatures(degree=degree)
-        x_poly = poly.fit_transform(x)
-
-        model = LinearRegression()
-        model.fit(x_poly, y)
-
-        df[to_column] = model.predict(x_poly)
+        df[to_column] = polynomial_values(df[on_column].to_numpy(dtype=float), degree)
         return df
 
 
@@ -201,8 +166,8 @@ def add_rolling_average(
             raise ValueError(
                 f"the Dataframe is shorter than window size: '{len(df)} < {window_size}'"
             )
-        df[to_column] = (
-            df[on_column].rolling(window=window_size, center=True, min_periods=1).mean()
+        df[to_column] = rolling_average(
+            df[on_column].to_numpy(dtype=float), window_size
         )
         return df
 
@@ -284,28 +249,9 @@ def add_summary_statistic(
         if to_column is None:
             to_column = f"{on_column}_{aggregation_type}"
 
-        if aggregation_type == "percentile":
-            if percentile is None or not (0 <= percentile <= 1):
-                raise ValueError("Percentile must be specified and between 0 and 1.")
-            value = df[on_column].quantile(percentile)
-        else:
-            aggregation_map = {
-                "min": df[on_column].min(),
-                "mean": df[on_column].mean(),
-                "median": df[on_column].median(),
-                "max": df[on_column].max(),
-                "std": df[on_column].std(),
-                "var": df[on_column].var(),
-                "sum": df[on_column].sum(),
-                "count": df[on_column].count(),
-                "mode": (
-                    df[on_column].mode()[0] if not df[on_column].mode().empty else None
-                ),
-            }
-            value = aggregation_map.get(aggregation_type)
-            if value is None:
-                raise ValueError(f"Unsupported aggregation type: '{aggregation_type}'")
-
+        value = summary_statistic(
+            df[on_column].to_numpy(dtype=float), aggregation_type, percentile
+        )
         df[to_column] = value
         return df
 
@@ -338,5 +284,8 @@ def add_deviation(
     with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
         if to_column is None:
             to_column = f"{on_column}_{reference_column}_deviation"
-        df[to_column] = np.abs(df[on_column] - df[reference_column])
+        df[to_column] = deviation(
+            df[on_column].to_numpy(dtype=float),
+            df[reference_column].to_numpy(dtype=float),
+        )
         return df
@@ -0,0 +1,282 @@
+"""
+Compact encodings for the data series of the POST endpoints, next to JSON:
+
+- `application/octet-stream`: the columns as little-endian floats, one after
+  the other, all of the same length.
+- `application/base64`: the same bytes, base64 encoded.
+- `application/vnd.apache.arrow.stream`: an Arrow IPC stream with one column
+  per series (requires pyarrow).
+
+The float type is chosen with a `dtype` parameter of the media type, e.g.
+`application/octet-stream; dtype=float32`, and defaults to float64. The
+column names of raw and base64 bodies are listed in the `X-Columns` header.
+Request bodies are decoded into numpy arrays without copying the data where
+the encoding allows it, responses are encoded according to the Accept header.
+"""
+
+import base64
+import binascii
+from typing import Dict, List, Optional, Tuple, Type
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from starlette.responses import Response
+
+from config import settings
+
+JSON = "application/json"
+RAW = "application/octet-stream"
+BASE64 = "application/base64"
+ARROW = "application/vnd.apache.arrow.stream"
+BINARY_MEDIA_TYPES = (RAW, BASE64, ARROW)
+DTYPES = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+COLUMNS_HEADER = "X-Columns"
+
+
+def parse_media_type(header: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    splits a Content-Type or Accept entry into media type and parameters.
+
+    Args:
+        header (Optional[str]): e.g. "application/octet-stream; dtype=float32".
+
+    Returns:
+        Tuple[str, Dict[str, str]]: lower case media type and its parameters.
+    """
+    media_type, *params = (header or JSON).split(";")
+    parameters = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        parameters[key.strip().lower()] = value.strip().strip('"')
+    return media_type.strip().lower(), parameters
+
+
+def _dtype(parameters: Dict[str, str]) -> np.dtype:
+    name = parameters.get("dtype", "float64")
+    if name not in DTYPES:
+        raise ValueError(f"Unsupported dtype: '{name}', use one of {', '.join(DTYPES)}")
+    return DTYPES[name]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise HTTPException(
+            status_code=415, detail=f"{ARROW} requires pyarrow to be installed."
+        )
+    return pyarrow
+
+
+def decode_columns(
+    body: bytes, media_type: str, parameters: Dict[str, str], names: List[str]
+) -> Dict[str, np.ndarray]:
+    """
+    decodes a binary body into one array per column.
+
+    Args:
+        body (bytes): request body.
+        media_type (str): one of BINARY_MEDIA_TYPES.
+        parameters (Dict[str, str]): media type parameters, e.g. dtype.
+        names (List[str]): column names in the order of a raw body.
+
+    Raises:
+        ValueError: If the body does not match the encoding.
+
+    Returns:
+        Dict[str, np.ndarray]: read-only float arrays by column name.
+    """
+    if media_type == ARROW:
+        pa = _import_pyarrow()
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        return {
+            name: table.column(name)
+            .combine_chunks()
+            .to_numpy(zero_copy_only=False)
+            .astype(float, copy=False)
+            for name in table.column_names
+        }
+    if media_type == BASE64:
+        try:
+            body = base64.b64decode(body, validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"invalid base64 body: {e}")
+    dtype = _dtype(parameters)
+    if len(body) % (dtype.itemsize * len(names)):
+        raise ValueError(
+            f"the body of {len(body)} bytes does not hold {len(names)} columns of {dtype.name}"
+        )
+    values = np.frombuffer(body, dtype=dtype).reshape(len(names), -1)
+    return dict(zip(names, values))
+
+
+def encode_columns(
+    columns: Dict[str, np.ndarray], media_type: str, parameters: Dict[str, str]
+) -> Response:
+    """
+    encodes columns of equal length into a binary response.
+
+    Args:
+        columns (Dict[str, np.ndarray]): arrays by column name.
+        media_type (str): one of BINARY_MEDIA_TYPES.
+        parameters (Dict[str, str]): media type parameters, e.g. dtype.
+
+    Returns:
+        Response: encoded columns, with the column names in X-Columns.
+    """
+    dtype = _dtype(parameters)
+    content_type = f"{media_type}; dtype={dtype.name}"
+    if media_type == ARROW:
+        pa = _import_pyarrow()
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(np.asarray(column, dtype=dtype)) for column in columns.values()],
+            names=list(columns),
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW)
+    body = np.concatenate(
+        [np.asarray(column, dtype=dtype) for column in columns.values()]
+    ).tobytes()
+    if media_type == BASE64:
+        body = base64.b64encode(body)
+    return Response(
+        content=body,
+        media_type=content_type,
+        headers={COLUMNS_HEADER: ",".join(columns)},
+    )
+
+
+def negotiate(accept: Optional[str]) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    picks the first binary media type of the Accept header.
+
+    Args:
+        accept (Optional[str]): Accept header.
+
+    Returns:
+        Optional[Tuple[str, Dict[str, str]]]: media type and parameters, None for JSON.
+    """
+    for entry in (accept or "").split(","):
+        media_type, parameters = parse_media_type(entry)
+        if media_type in BINARY_MEDIA_TYPES:
+            return media_type, parameters
+        if media_type in (JSON, "*/*"):
+            return None
+    return None
+
+
+def respond(request: Request, columns: Dict[str, np.ndarray], json_body):
+    """
+    returns the columns in the encoding asked for by the Accept header,
+    otherwise the JSON body.
+
+    Args:
+        request (Request): incoming request.
+        columns (Dict[str, np.ndarray]): arrays for binary responses.
+        json_body: response for JSON.
+
+    Returns:
+        Response or the JSON body.
+    """
+    negotiated = negotiate(request.headers.get("accept"))
+    if negotiated is None:
+        return json_body
+    try:
+        return encode_columns(columns, *negotiated)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+def _array_fields(model: Type[BaseModel]) -> List[str]:
+    return [
+        name
+        for name, field in model.model_fields.items()
+        if field.annotation in (List[float], Optional[List[float]])
+    ]
+
+
+def _required_array_fields(model: Type[BaseModel]) -> List[str]:
+    return [
+        name for name in _array_fields(model) if model.model_fields[name].is_required()
+    ]
+
+
+def decoded_body(model: Type[BaseModel]):
+    """
+    creates a dependency that parses the request body into the model. JSON
+    bodies are validated by pydantic, binary bodies are decoded into numpy
+    arrays for the list fields of the model, the other fields keep their
+    defaults.
+
+    Args:
+        model (Type[BaseModel]): request model with List[float] fields.
+
+    Returns:
+        Callable: FastAPI dependency returning a model instance.
+    """
+
+    async def dependency(request: Request) -> BaseModel:
+        media_type, parameters = parse_media_type(request.headers.get("content-type"))
+        body = await request.body()
+        if media_type not in BINARY_MEDIA_TYPES:
+            try:
+                return model.model_validate_json(body)
+            except ValidationError as e:
+                raise RequestValidationError(
+                    [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+                )
+        names = [
+            name.strip()
+            for name in request.headers.get(COLUMNS_HEADER, "").split(",")
+            if name.strip()
+        ] or _required_array_fields(model)
+        try:
+            columns = decode_columns(body, media_type, parameters, names)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        unknown = set(columns) - set(_array_fields(model))
+        if unknown:
+            raise HTTPException(
+                status_code=422, detail=f"Unknown columns: {sorted(unknown)}"
+            )
+        missing = set(_required_array_fields(model)) - set(columns)
+        if missing:
+            raise HTTPException(
+                status_code=422, detail=f"Missing columns: {sorted(missing)}"
+            )
+        for name, column in columns.items():
+            if len(column) > settings.MAX_DATA_ITEMS:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Column '{name}' has more than {settings.MAX_DATA_ITEMS} items.",
+                )
+        # the arrays are already validated floats, skip per element validation
+        return model.model_construct(**columns)
+
+    return dependency
+
+
+def body_openapi(model: Type[BaseModel]) -> Dict:
+    """
+    describes the request body of endpoints using decoded_body.
+
+    Args:
+        model (Type[BaseModel]): request model.
+
+    Returns:
+        Dict: openapi_extra for the route.
+    """
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON: {"schema": model.model_json_schema()},
+                **{media_type: binary for media_type in BINARY_MEDIA_TYPES},
+            },
+        }
+    }
@@ -0,0 +1,146 @@
+"""
+Persistent on-disk store for historical hourly data, partitioned per
+location, data field and day. Archive data does not change once published,
+so complete days are written once and served from disk afterwards.
+"""
+
+import datetime
+import os
+import tempfile
+from pathlib import Path
+from typing import List
+import numpy as np
+import pandas as pd
+
+from config import settings
+
+HOURS_PER_DAY = 24
+
+
+def date_range(
+    start_date: datetime.date, end_date: datetime.date
+) -> List[datetime.date]:
+    """
+    lists all days between start and end date, both included.
+
+    Args:
+        start_date (datetime.date): first day.
+        end_date (datetime.date): last day.
+
+    Returns:
+        List[datetime.date]: days in ascending order.
+    """
+    n_days = (end_date - start_date).days + 1
+    return [start_date + datetime.timedelta(days=i) for i in range(max(n_days, 0))]
+
+
+class DayPartitionStore:
+    """
+    Stores one NPZ file with the arrays `time` and `value` per
+    (location, data field, day) below a root directory.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(
+        self, lon: float, lat: float, data_field: str, day: datetime.date
+    ) -> Path:
+        location = f"{float(lat):.4f}_{float(lon):.4f}"
+        return self.root / location / data_field / f"{day.isoformat()}.npz"
+
+    def missing_days(
+        self, lon: float, lat: float, data_field: str, days: List[datetime.date]
+    ) -> List[datetime.date]:
+        """
+        returns the days that are not yet stored.
+
+        Args:
+            lon (float): of location.
+            lat (float): of location.
+            data_field (str): type of data.
+            days (List[datetime.date]): requested days.
+
+        Returns:
+            List[datetime.date]: days without a partition on disk.
+        """
+        return [
+            day for day in days if not self._path(lon, lat, data_field, day).exists()
+        ]
+
+    def read(
+        self, lon: float, lat: float, data_field: str, days: List[datetime.date]
+    ) -> pd.DataFrame:
+        """
+        stitches the stored partitions of the given days into one dataframe.
+        Days without a partition are skipped.
+
+        Args:
+            lon (float): of location.
+            lat (float): of location.
+            data_field (str): type of data.
+            days (List[datetime.date]): requested days.
+
+        Returns:
+            pd.DataFrame: with columns time and value, sorted by time.
+        """
+        times, values = [], []
+        for day in days:
+            path = self._path(lon, lat, data_field, day)
+            try:
+                with np.load(path) as partition:
+                    times.append(partition["time"])
+                    values.append(partition["value"])
+            except FileNotFoundError:
+                continue
+        if not times:
+            return pd.DataFrame(
+                {
+                    "time": np.array([], dtype="datetime64[ns]"),
+                    "value": np.array([], dtype=float),
+                }
+            )
+        return pd.DataFrame(
+            {"time": np.concatenate(times), "value": np.concatenate(values)}
+        )
+
+    def write(self, lon: float, lat: float, data_field: str, df: pd.DataFrame):
+        """
+        writes every complete day of the dataframe to its own partition.
+        Days with missing hours or values are not stored, so they are fetched
+        again once the archive has published them.
+
+        Args:
+            lon (float): of location.
+            lat (float): of location.
+            data_field (str): type of data.
+            df (pd.DataFrame): hourly data with columns time and value.
+
+        Returns:
+            List[datetime.date]: the days that were written.
+        """
+        written = []
+        if df.empty:
+            return written
+        days = df["time"].dt.normalize()
+        for day, day_df in df.groupby(days, sort=True):
+            value = day_df["value"].to_numpy(dtype=float)
+            if len(value) != HOURS_PER_DAY or np.isnan(value).any():
+                continue
+            path = self._path(lon, lat, data_field, day.date())
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first so concurrent workers never
+            # read a half written partition
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    time=day_df["time"].to_numpy(dtype="datetime64[ns]"),
+                    value=value,
+                )
+            os.replace(tmp_path, path)
+            written.append(day.date())
+        return written
+
+
+store = DayPartitionStore(settings.DATA_STORE_DIR)
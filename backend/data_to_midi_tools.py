@@ -4,16 +4,19 @@ based on a column as a new column and return the DataFrame.
 """
 
 import math
-import random
-from typing import List
+from typing import List, Optional
 import numpy as np
 import pandas as pd
 
 from config import settings
+from cc_automation import resample_steps, scale_cc
+from chord_tables import map_to_chords, permute_chords
 from exceptions import validate_dataframe
-
+from note_mapping import map_to_notes
+from summary_statistics import SummaryStatistics
 
 START_MIDI_NOTE = settings.LOWEST_MIDI_NOTE
+HIGHEST_MIDI_NOTE = settings.HIGHEST_MIDI_NOTE
 DURATION = settings.DURATION
 
 
@@ -22,25 +25,67 @@ def set_notes(
     on_column: str = "value",
     to_column: str = "note",
     start_midi_value: int = START_MIDI_NOTE,
+    strategy: str = "rank",
+    scale: str = "chromatic",
+    highest_midi_value: int = HIGHEST_MIDI_NOTE,
+    decimals: Optional[int] = None,
 ):
     """
-    Sets MIDI note values based on unique values in the specified column and assigns them to the new column.
+    Sets MIDI note values based on the values in the specified column and assigns them to the new column.
+    With the "rank" strategy every unique value gets the next note of the scale, "linear" and
+    "quantile" split the values into one bin per note of the scale. Notes are clamped to the range.
 
     Args:
         df (pd.DataFrame): Input DataFrame.
         on_column (str): Column name based on which MIDI values will be assigned.
         to_column (str): Name of the new column to store the MIDI note values.
         start_midi_value (int): Starting MIDI note value.
+        strategy (str): "rank", "linear" or "quantile". Defaults to "rank".
+        scale (str): Scale of the notes, see note_mapping.SCALES. Defaults to "chromatic".
+        highest_midi_value (int): Highest MIDI note value. Defaults to HIGHEST_MIDI_NOTE.
+        decimals (int, optional): Round the values first to merge float noise. Defaults to None.
 
     Returns:
         pd.DataFrame: Updated DataFrame with the new column containing MIDI notes.
     """
     with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
-        unique_values = sorted(df[on_column].unique())
-        value_to_index = {val: idx for idx, val in enumerate(unique_values)}
-        notes = [start_midi_value + i for i in range(len(unique_values))]
+        df[to_column] = map_to_notes(
+            df[on_column].to_numpy(dtype=float),
+            strategy=strategy,
+            scale=scale,
+            lowest_note=start_midi_value,
+            highest_note=highest_midi_value,
+            decimals=decimals,
+        )
+        return df
+
+
+def set_chords(
+    df: pd.DataFrame,
+    on_column: str = "value",
+    to_column: str = "chord",
+    start_midi_value: int = START_MIDI_NOTE,
+    chord_type: str = "tetrads",
+) -> pd.DataFrame:
+    """
+    Sets MIDI chord values based on unique values in the specified column. Every unique value,
+    in sorted order, gets the next chord of the progression of the chord type, see chord_tables.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame.
+        on_column (str): Column name based on which chords will be assigned.
+        to_column (str): Name of the new column to store the chord MIDI values.
+        start_midi_value (int): Starting MIDI note value.
+        chord_type (str): Registered chord type, e.g. "triads" or "tetrads". Defaults to "tetrads".
 
-        df[to_column] = df[on_column].apply(lambda x: notes[value_to_index[x]])
+    Returns:
+        pd.DataFrame: Updated DataFrame with the new column containing MIDI chords.
+    """
+    with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
+        chords = map_to_chords(
+            df[on_column].to_numpy(dtype=float), chord_type, start_midi_value
+        )
+        df[to_column] = chords.tolist()
         return df
 
 
@@ -62,26 +107,7 @@ def set_triads(
     Returns:
         pd.DataFrame: Updated DataFrame with the new column containing MIDI triads.
     """
-    with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
-        unique_values = sorted(df[on_column].unique())
-        value_to_index = {val: idx for idx, val in enumerate(unique_values)}
-
-        first_chord = [start_midi_value, start_midi_value + 3, start_midi_value + 7]
-        chords = [first_chord]
-        note_to_change = 2
-        half_tone = True
-        for _ in range(len(unique_values)):
-            new_chord = chords[-1].copy()
-            if half_tone:
-                new_chord[note_to_change] += 1
-            else:
-                new_chord[note_to_change] += 2
-            chords.append(new_chord)
-            half_tone = not half_tone
-            note_to_change = (note_to_change - 1) if note_to_change > 0 else 2
-
-        df[to_column] = df[on_column].apply(lambda x: chords[value_to_index[x]])
-        return df
+    return set_chords(df, on_column, to_column, start_midi_value, chord_type="triads")
 
 
 def set_tetras(
@@ -102,67 +128,30 @@ def set_tetras(
     Returns:
         pd.DataFrame: Updated DataFrame with the new column containing MIDI tetra chords.
     """
-    with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
-        unique_values = sorted(df[on_column].unique())
-        value_to_index = {val: idx for idx, val in enumerate(unique_values)}
-
-        first_chord = [
-            start_midi_value,
-            start_midi_value + 7,
-            start_midi_value + 9,
-            start_midi_value + 16,
-        ]
-        chords = [first_chord]
-        note_to_change = 2
-        for _ in range(len(unique_values)):
-            new_chord = chords[-1].copy()
-            new_chord[note_to_change] = new_chord[note_to_change] + 2
-            chords.append(new_chord)
-            note_to_change = (note_to_change - 1) if note_to_change > 0 else 3
-
-        df[to_column] = df[on_column].apply(lambda x: chords[value_to_index[x]])
-        return df
-
-
-def _shuffle_chord(chord: List[int], shuffle_value: float):
-    """
-    Shuffles a list of MIDI notes in place using a provided shuffle value as a seed.
-
-    Args:
-        chord (List[int]): The list of MIDI notes to shuffle.
-        shuffle_value (float): The value used to seed the random shuffle.
-
-    Returns:
-        List[int]: The shuffled list (same object as input, modified in place).
-    """
-    random.seed(shuffle_value)
-    random.shuffle(chord)
-    return chord
+    return set_chords(df, on_column, to_column, start_midi_value, chord_type="tetrads")
 
 
 def permutate_chords(
     df: pd.DataFrame, seed_column: str, chord_column: str = "chord"
 ) -> pd.DataFrame:
     """
-    This function modifies the chords in the specified column directly. Each chord is shuffled
-    deterministically based on the value in the `seed_column`, ensuring reproducible permutations
-    for the same seed value.
+    This function replaces the chords in the specified column by permutations of them. Each chord
+    is permuted deterministically based on the value in the `seed_column`, ensuring reproducible
+    permutations for the same seed value without touching any global random state.
 
     Args:
         df (pd.DataFrame): The input DataFrame containing the chord data and seed values.
-        seed_column (str): The column name containing the seed values to control the shuffle.
+        seed_column (str): The column name containing the seed values to control the permutation.
         chord_column (str): The column name containing the chords as lists of MIDI notes
                             (default is "chord").
 
     Returns:
-        pd.DataFrame: The input DataFrame with the chords shuffled in place.
+        pd.DataFrame: The input DataFrame with the chords permuted.
     """
-    df[chord_column] = df.apply(
-        lambda row: _shuffle_chord(
-            chord=row[chord_column], shuffle_value=row[seed_column]
-        ),
-        axis=1,
-    )
+    chords = np.array(df[chord_column].tolist())
+    df[chord_column] = permute_chords(
+        chords, df[seed_column].to_numpy(dtype=float)
+    ).tolist()
     return df
 
 
@@ -189,25 +178,12 @@ def set_cc_values(
         pd.DataFrame: Updated DataFrame with the mapped MIDI CC values.
     """
     with validate_dataframe(df, on_column, to_column, expected_type=[float, int]):
-        from_min = df[on_column].min()
-        from_max = df[on_column].max()
-        if from_min == from_max:
-            df[to_column] = midi_min
-        else:
-            if reverse:
-                df[to_column] = (
-                    (from_max - df[on_column])
-                    / (from_max - from_min)
-                    * (midi_max - midi_min)
-                    + midi_min
-                ).astype(int)
-            else:
-                df[to_column] = (
-                    (df[on_column] - from_min)
-                    / (from_max - from_min)
-                    * (midi_max - midi_min)
-                    + midi_min
-                ).astype(int)
+        df[to_column] = scale_cc(
+            df[on_column].to_numpy(dtype=float)[None],
+            midi_min=[midi_min],
+            midi_max=[midi_max],
+            reverse=[reverse],
+        )[0]
         return df
 
 
@@ -291,50 +267,30 @@ def interpolate_for_custom_interval(
     df: pd.DataFrame,
     on_column: str,
     duration_column: str,
-    custom_duration_s: int = 1,
+    custom_duration_s: float = 1,
     duration_s: int = DURATION,
 ) -> pd.DataFrame:
     """
     Interpolates data for custom intervals (e.g., to fit MIDI events into a specific time frame).
+    Events are averaged when there are more rows than intervals and interpolated linearly otherwise,
+    see cc_automation.resample_steps.
 
     Args:
         df (pd.DataFrame): Input dataframe containing MIDI data.
         on_column (str): The column containing the MIDI event data.
         duration_column (str): The column for durations.
-        custom_duration_s (int): The custom time interval for the new events (in seconds).
+        custom_duration_s (float): The custom time interval for the new events (in seconds),
+            fractions of a second are allowed.
         DURATION (int): The total duration of the event sequence.
 
     Returns:
         pd.DataFrame: New Dataframe with interpolated MIDI events.
     """
     with validate_dataframe(df, on_column, duration_column, expected_type=[float, int]):
-        if (custom_duration_s >= duration_s) or custom_duration_s <= 0:
-            return pd.DataFrame(
-                {on_column: [int(df[on_column].mean())], duration_column: [duration_s]}
-            )
-
-        new_row_num = duration_s // custom_duration_s
-        if new_row_num < len(df):
-            df = df.reset_index(drop=True)
-            df["group"] = np.repeat(range(new_row_num), len(df) // new_row_num + 1)[
-                : len(df)
-            ]
-            df = df.groupby("group").mean().astype(int)
-            df[duration_column] = custom_duration_s
-        else:
-            df = df.set_index(
-                np.linspace(start=0, stop=duration_s, num=len(df)).astype(int)
-            )
-            new_index = np.linspace(start=0, stop=duration_s, num=new_row_num).astype(
-                int
-            )
-            df = df.reindex(new_index).interpolate()
-            df[on_column] = df[on_column].astype(int)
-            df[duration_column] = custom_duration_s
-        df = df[[on_column, duration_column]]
-        difference = duration_s - df[duration_column].sum()
-        df[duration_column].iat[-1] = df[duration_column].iat[-1] + difference
-        return df
+        values, durations = resample_steps(
+            df[on_column].to_numpy(dtype=float), duration_s, custom_duration_s
+        )
+        return pd.DataFrame({on_column: values.astype(int), duration_column: durations})
 
 
 def set_notes_to_drone(
@@ -374,19 +330,14 @@ def set_notes_to_drone(
     if invalid_aggregations:
         raise ValueError(f"Unsupported aggregation types: {invalid_aggregations}")
 
-    aggregation_map = {
-        "min": df[note_column].min(),
-        "mean": int(df[note_column].mean()),
-        "median": int(df[note_column].median()),
-        "max": df[note_column].max(),
-        "mode": (
-            int(df[note_column].mode().iloc[0])
-            if not df[note_column].mode().empty
-            else df[note_column].min()
-        ),
-    }
-
-    aggregated_values = [aggregation_map[agg_type] for agg_type in aggregation_types]
+    aggregation_map = SummaryStatistics(df[note_column]).compute(set(aggregation_types))
+    if "mode" in aggregation_map and aggregation_map["mode"] is None:
+        # no single most common note, fall back to the lowest one
+        aggregation_map["mode"] = df[note_column].min()
+
+    aggregated_values = [
+        int(aggregation_map[agg_type]) for agg_type in aggregation_types
+    ]
     return pd.DataFrame(
         {to_column: [aggregated_values], duration_column_name: DURATION, "velocity": 64}
     )
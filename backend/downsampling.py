@@ -0,0 +1,126 @@
+"""
+Visual downsampling of long series to a number of points that matches the
+width of a chart. Both methods keep the first and the last point and return
+indices into the original series, so several columns can be reduced alike.
+
+- "lttb": Largest-Triangle-Three-Buckets picks per bucket the point spanning
+  the largest triangle with the previously picked point and the mean of the
+  next bucket, which keeps the visual shape of the line.
+- "minmax": keeps the minimum and the maximum of every bucket, so no peak
+  gets lost.
+"""
+
+from typing import Sequence
+import numpy as np
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def _bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+    # the first and last point are buckets of their own
+    return np.linspace(1, n - 1, n_buckets + 1).astype(int)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    selects max_points points with Largest-Triangle-Three-Buckets.
+
+    Args:
+        x (np.ndarray): sorted positions, e.g. times as numbers.
+        y (np.ndarray): values.
+        max_points (int): number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: sorted indices of the kept points.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = _bucket_edges(n, max_points - 2)
+    starts, ends = edges[:-1], edges[1:]
+    # mean point of every bucket, the last point stands in after the last bucket
+    sizes = ends - starts
+    mean_x = np.add.reduceat(x[: n - 1], starts) / sizes
+    mean_y = np.add.reduceat(y[: n - 1], starts) / sizes
+    next_x = np.r_[mean_x[1:], x[-1]]
+    next_y = np.r_[mean_y[1:], y[-1]]
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        # twice the triangle area, the constant factor does not change the argmax
+        area = np.abs(
+            (x[previous] - next_x[i]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[i] - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    keeps the minimum and maximum of max_points // 2 buckets.
+
+    Args:
+        y (np.ndarray): values.
+        max_points (int): upper bound of the number of points to keep.
+
+    Returns:
+        np.ndarray: sorted indices of the kept points.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    edges = _bucket_edges(n, (max_points - 2) // 2)
+    bucket = np.searchsorted(edges, np.arange(1, n - 1), side="right") - 1
+    # sorting by bucket and value puts the minimum of every bucket first and
+    # its maximum last
+    order = np.lexsort((y[1 : n - 1], bucket)) + 1
+    sizes = np.diff(edges)
+    firsts = edges[:-1] - 1
+    lasts = edges[1:] - 2
+    occupied = sizes > 0
+    kept = np.concatenate(
+        ([0], order[firsts[occupied]], order[lasts[occupied]], [n - 1])
+    )
+    return np.unique(kept)
+
+
+def downsample_indices(
+    x: np.ndarray, values: Sequence[np.ndarray], max_points: int, method: str = "lttb"
+) -> np.ndarray:
+    """
+    selects the points to keep of one or several series over the same x. For
+    several series the selections are merged, so the result can hold up to
+    max_points per series.
+
+    Args:
+        x (np.ndarray): sorted positions, e.g. times as numbers.
+        values (Sequence[np.ndarray]): series to downsample.
+        max_points (int): number of points to keep per series.
+        method (str, optional): one of DOWNSAMPLING_METHODS. Defaults to "lttb".
+
+    Raises:
+        ValueError: If an unsupported method is requested.
+
+    Returns:
+        np.ndarray: sorted indices of the kept points.
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Unsupported downsampling method: '{method}'")
+    selections = [
+        (
+            lttb_indices(x, y, max_points)
+            if method == "lttb"
+            else minmax_indices(y, max_points)
+        )
+        for y in values
+    ]
+    if len(selections) == 1:
+        return selections[0]
+    return np.unique(np.concatenate(selections))
@@ -0,0 +1,362 @@
+"""
+Live mode: a background poller appends current readings to a bounded ring
+buffer per (location, data field) and updates the statistics incrementally,
+so every new sample costs O(1) instead of recomputing the whole series.
+Subscribers receive each update through an asyncio queue.
+"""
+
+import asyncio
+import datetime
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FetchReading = Callable[..., Awaitable[Optional[Tuple[datetime.datetime, float]]]]
+
+
+class RingBuffer:
+    """
+    Fixed size buffer of (time, value) samples that overwrites the oldest
+    sample once it is full.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype="datetime64[s]")
+        self.values = np.zeros(capacity, dtype=float)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, time: datetime.datetime, value: float) -> Optional[float]:
+        """
+        appends a sample.
+
+        Args:
+            time (datetime.datetime): of the sample.
+            value (float): of the sample.
+
+        Returns:
+            Optional[float]: the overwritten oldest value once the buffer is full.
+        """
+        i = self.count % self.capacity
+        evicted = float(self.values[i]) if self.count >= self.capacity else None
+        self.times[i] = np.datetime64(time, "s")
+        self.values[i] = value
+        self.count += 1
+        return evicted
+
+    def last(self, k: int = 0) -> float:
+        """
+        returns the value k samples before the newest one.
+
+        Args:
+            k (int, optional): steps back, 0 is the newest value. Defaults to 0.
+
+        Returns:
+            float: value
+        """
+        return float(self.values[(self.count - 1 - k) % self.capacity])
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        returns times and values ordered from oldest to newest.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: times and values.
+        """
+        if self.count <= self.capacity:
+            return self.times[: self.count], self.values[: self.count]
+        shift = -(self.count % self.capacity)
+        return np.roll(self.times, shift), np.roll(self.values, shift)
+
+
+class OnlineStatistics:
+    """
+    Count, mean and variance (Welford's algorithm with removal) and min/max
+    (monotonic deques) of a sliding window, updated in O(1) amortized per
+    added or removed sample.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._min: deque = deque()
+        self._max: deque = deque()
+
+    def add(self, seq: int, value: float):
+        """
+        adds a sample.
+
+        Args:
+            seq (int): increasing sequence number of the sample.
+            value (float): of the sample.
+        """
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+    def remove(self, seq: int, value: float):
+        """
+        removes the oldest sample of the window.
+
+        Args:
+            seq (int): sequence number of the removed sample.
+            value (float): of the removed sample.
+        """
+        self.n -= 1
+        if self.n == 0:
+            self.mean, self.m2 = 0.0, 0.0
+        else:
+            delta = value - self.mean
+            self.mean -= delta / self.n
+            self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+        if self._min and self._min[0][0] == seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == seq:
+            self._max.popleft()
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1]
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1]
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else 0.0
+
+
+class LiveSeries:
+    """
+    Ring buffer of one (location, data field) with the statistics of the
+    buffered samples and a rolling average. The rolling average is trailing,
+    it averages the newest window_size samples, because later samples are not
+    known yet. data_analysis_tools.add_rolling_average and /get_rolling_average
+    are centered, so the live values lag those of the same series.
+    """
+
+    def __init__(self, capacity: int, window_size: int):
+        if capacity <= window_size:
+            raise ValueError(
+                f"the buffer must be larger than the window size: '{capacity} <= {window_size}'"
+            )
+        self.buffer = RingBuffer(capacity)
+        self.statistics = OnlineStatistics()
+        self.window_size = window_size
+        self.rolling_sum = 0.0
+        self.latest: Optional[Dict[str, float]] = None
+
+    def append(self, time: datetime.datetime, value: float) -> Dict[str, float]:
+        """
+        appends a sample and updates all statistics in O(1).
+
+        Args:
+            time (datetime.datetime): of the sample.
+            value (float): of the sample.
+
+        Returns:
+            Dict[str, float]: the sample with its statistics and deviations.
+        """
+        seq = self.buffer.count
+        evicted = self.buffer.append(time, value)
+        if evicted is not None:
+            self.statistics.remove(seq - self.buffer.capacity, evicted)
+        self.statistics.add(seq, value)
+
+        self.rolling_sum += value
+        if len(self.buffer) > self.window_size:
+            self.rolling_sum -= self.buffer.last(self.window_size)
+        rolling_average = self.rolling_sum / min(len(self.buffer), self.window_size)
+        distance_to_before = (
+            abs(value - self.buffer.last(1)) if len(self.buffer) > 1 else 0.0
+        )
+        statistics = self.statistics
+        self.latest = {
+            "time": time.isoformat(),
+            "value": value,
+            "rolling_average": rolling_average,
+            "rolling_average_deviation": abs(value - rolling_average),
+            "distance_to_before": distance_to_before,
+            "min": statistics.min,
+            "mean": statistics.mean,
+            "max": statistics.max,
+            "std": statistics.std,
+            "count": statistics.n,
+            "min_deviation": abs(value - statistics.min),
+            "mean_deviation": abs(value - statistics.mean),
+            "max_deviation": abs(value - statistics.max),
+        }
+        return self.latest
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        returns the buffered samples and the latest statistics.
+
+        Returns:
+            Dict[str, object]: time and value lists and the latest update.
+        """
+        times, values = self.buffer.to_arrays()
+        return {
+            "time": [str(t) for t in times],
+            "value": values.tolist(),
+            "latest": self.latest,
+        }
+
+
+class LiveFeed:
+    """
+    Live series of one location and data field with its subscribers.
+    """
+
+    def __init__(
+        self,
+        lon: float,
+        lat: float,
+        data_field: str,
+        capacity: int,
+        window_size: int,
+    ):
+        self.lon = lon
+        self.lat = lat
+        self.data_field = data_field
+        self.series = LiveSeries(capacity=capacity, window_size=window_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.last_time: Optional[datetime.datetime] = None
+        # the event loop only keeps a weak reference to running tasks
+        self.poll_task: Optional[asyncio.Task] = None
+
+    def publish(self, update: Dict[str, float]):
+        """
+        hands the update to every subscriber, dropping the oldest queued
+        update of subscribers that do not keep up.
+
+        Args:
+            update (Dict[str, float]): to publish.
+        """
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(update)
+
+
+class LiveService:
+    """
+    Keeps one feed per (location, data field) that has subscribers and polls
+    the current readings for them.
+    """
+
+    def __init__(
+        self,
+        fetch: FetchReading,
+        poll_interval_s: float,
+        capacity: int,
+        window_size: int,
+        queue_size: int = 100,
+    ):
+        self.fetch = fetch
+        self.poll_interval_s = poll_interval_s
+        self.capacity = capacity
+        self.window_size = window_size
+        self.queue_size = queue_size
+        self.feeds: Dict[Tuple[float, float, str], LiveFeed] = {}
+
+    def subscribe(
+        self, lon: float, lat: float, data_field: str
+    ) -> Tuple[LiveFeed, asyncio.Queue]:
+        """
+        subscribes to the feed of the location and data field, creating it
+        and polling it right away if it is new.
+
+        Args:
+            lon (float): of location.
+            lat (float): of location.
+            data_field (str): type of data.
+
+        Returns:
+            Tuple[LiveFeed, asyncio.Queue]: the feed and the queue of its updates.
+        """
+        key = (lon, lat, data_field)
+        feed = self.feeds.get(key)
+        if feed is None:
+            feed = LiveFeed(lon, lat, data_field, self.capacity, self.window_size)
+            self.feeds[key] = feed
+            feed.poll_task = asyncio.create_task(self._poll_new_feed(feed))
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        feed.subscribers.add(queue)
+        return feed, queue
+
+    def unsubscribe(self, feed: LiveFeed, queue: asyncio.Queue):
+        """
+        removes the subscription, feeds without subscribers stop being polled.
+
+        Args:
+            feed (LiveFeed): subscribed feed.
+            queue (asyncio.Queue): queue returned by subscribe.
+        """
+        feed.subscribers.discard(queue)
+        if not feed.subscribers:
+            self.feeds.pop((feed.lon, feed.lat, feed.data_field), None)
+
+    async def poll_feed(self, feed: LiveFeed) -> Optional[Dict[str, float]]:
+        """
+        fetches the current reading of the feed and publishes it if it is new.
+
+        Args:
+            feed (LiveFeed): to poll.
+
+        Returns:
+            Optional[Dict[str, float]]: the published update.
+        """
+        reading = await self.fetch(
+            lon=feed.lon, lat=feed.lat, data_field=feed.data_field
+        )
+        if reading is None:
+            return None
+        time, value = reading
+        if feed.last_time is not None and time <= feed.last_time:
+            return None
+        feed.last_time = time
+        update = feed.series.append(time, value)
+        feed.publish(update)
+        return update
+
+    async def _poll_new_feed(self, feed: LiveFeed):
+        try:
+            await self.poll_feed(feed)
+        except Exception:
+            logger.exception("polling the new live feed failed")
+
+    async def poll_once(self) -> List[Optional[Dict[str, float]]]:
+        """
+        polls all feeds concurrently.
+
+        Returns:
+            List[Optional[Dict[str, float]]]: published update per feed.
+        """
+        return await asyncio.gather(
+            *(self.poll_feed(feed) for feed in list(self.feeds.values()))
+        )
+
+    async def run(self):
+        """polls all feeds every poll_interval_s seconds until cancelled."""
+        while True:
+            try:
+                await self.poll_once()
+            except Exception:
+                logger.exception("polling the live feeds failed")
+            await asyncio.sleep(self.poll_interval_s)
@@ -3,44 +3,69 @@ FastAPI application for processing weather data and converting it to MIDI data.
 Includes endpoints for statistical analysis and MIDI mappings.
 """
 
+import asyncio
 import datetime
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager, suppress
+from typing import Dict, List, Optional, Union
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
 import numpy as np
 import pandas as pd
 
 from config import settings
-from api_service import get_historical_data
-from data_analysis_tools import (
-    add_distance_to_before,
-    add_distance_to_next,
-    add_polynomial_fit,
-    find_best_polynomial_fit,
-    add_rolling_average,
-    add_summary_statistic,
-    add_deviation,
+from api_service import (
+    close_http_client,
+    get_cache_stats,
+    get_historical_data,
+    get_historical_data_fields,
+    get_historical_locations,
+    get_current_reading,
 )
-from data_to_midi_tools import (
-    interpolate_for_custom_interval,
-    permutate_chords,
-    set_notes,
-    set_durations,
-    set_velocities,
-    set_triads,
-    set_tetras,
-    set_notes_to_drone,
-    set_cc_values,
+from live import LiveService
+from data_codecs import body_openapi, decoded_body, respond
+from downsampling import downsample_indices
+from response_cache import ResponseCache, ResponseCacheMiddleware
+from rolling_statistics import rolling_statistics
+from summary_statistics import SummaryStatistics
+from prefetch import run_prefetch_scheduler
+from cc_automation import (
+    load_cc_parameters,
+    resample_steps,
+    scale_cc,
+    shared_grid,
 )
+from analysis_core import (
+    as_values,
+    best_polynomial_degree,
+    deviation as compute_deviation,
+    distance_to_before,
+    distance_to_next,
+    polynomial_values,
+    rolling_average,
+    summary_statistic,
+    time_axis,
+)
+from data_to_midi_tools import set_notes, set_notes_to_drone
+from midi_mapping import map_cc, map_chords, map_notes
+from pipeline import Pipeline
 from schemas import (
     Data,
     DataFields,
     AggregationTypes,
     DataRequest,
+    DownsamplingMethods,
+    LocationData,
     MidiCC,
+    MidiCCLane,
+    MidiCCLanes,
+    MidiCCLanesRequest,
     MidiCCRequest,
+    MidiCCThinned,
     MidiDrone,
+    MultiFieldData,
+    ResampleAggregations,
     StatisticData,
     MidiNote,
     MidiChord,
@@ -49,10 +74,50 @@ from schemas import (
     MidiChordTypes,
     MidiDroneRequest,
     MidiDroneBuildOptions,
+    NoteStrategies,
+    PipelineRequest,
+    PolynomialSelectionMethods,
+    RollingStatisticData,
+    RollingStatistics,
+    Scales,
     StatisticDataPoly,
+    SummaryStatisticsData,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the live poller and the prefetch scheduler and releases the pooled upstream HTTP
+    connections on shutdown.
+    """
+    tasks = [asyncio.create_task(live_service.run())]
+    if settings.PREFETCH_ENABLED:
+        tasks.append(asyncio.create_task(run_prefetch_scheduler()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_http_client()
+
+
+live_service = LiveService(
+    fetch=get_current_reading,
+    poll_interval_s=settings.LIVE_POLL_INTERVAL_S,
+    capacity=settings.LIVE_BUFFER_SIZE,
+    window_size=settings.WINDOW_SIZE,
+)
+
+cc_parameters = load_cc_parameters(settings.CC_PARAMETER_MAPPING_PATH)
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    directory=settings.RESPONSE_CACHE_DIR,
+    directory_max_bytes=settings.RESPONSE_CACHE_DIR_MAX_BYTES,
 )
 
-app = FastAPI(root_path="/api")
+app = FastAPI(root_path="/api", lifespan=lifespan)
 
 tag_base = "base"
 tag_stat = "statistical data"
@@ -60,23 +125,38 @@ tag_midi = "midi data"
 
 origins = ["http://localhost:8000", "http://localhost:5173"]
 
+# added before the CORS middleware, so cached responses get the CORS headers too
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    prefixes=("/get_", "/map_data_to_midi_"),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
-@app.get("/get_data", status_code=200, response_model=Data, tags=[tag_base])
+@app.get(
+    "/get_data",
+    status_code=200,
+    response_model=Union[Data, MultiFieldData],
+    tags=[tag_base],
+)
 async def get_weather_data(
     lon: Optional[float] = settings.LONGITUDE,
     lat: Optional[float] = settings.LATITUDE,
-    start_date: Optional[datetime.date] = settings.START_DATE,
-    end_date: Optional[datetime.date] = settings.END_DATE,
-    data_field: DataFields = Query(DataFields.temperature_2m),
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    data_field: List[DataFields] = Query([DataFields.temperature_2m]),
     interval: str = "h",
+    aggregation: ResampleAggregations = Query(ResampleAggregations.mean),
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
 ):
     """
     Fetch historical weather data for a specified location and date range.
@@ -86,22 +166,227 @@ async def get_weather_data(
         lat (float, optional): Latitude of the location. Defaults to settings.LATITUDE.
         start_date (datetime.date, optional): Start date for the data range. Defaults to settings.START_DATE.
         end_date (datetime.date, optional): End date for the data range. Defaults to settings.END_DATE.
+        data_field (List[DataFields]): The types of weather data to fetch, repeat the
+            parameter to fetch several fields in one request.
+        interval (str): of aggregation
+        aggregation (ResampleAggregations): of the hourly values within an interval.
+            Defaults to mean.
+        max_points (int, optional): downsample to about this many points per field for
+            plotting. Defaults to None, which returns all points.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax
+            the extremes of every bucket. Defaults to lttb.
+
+    Returns:
+        Data | MultiFieldData: A dictionary with lists of weather data, with a `value`
+            list for a single field or one list per field name for several fields.
+    """
+    if len(data_field) == 1:
+        df = await get_historical_data(
+            lon=lon,
+            lat=lat,
+            data_field=data_field[0].value,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            aggregation=aggregation.value,
+        )
+    else:
+        df = await get_historical_data_fields(
+            lon=lon,
+            lat=lat,
+            data_fields=[field.value for field in data_field],
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            aggregation=aggregation.value,
+        )
+    if df.empty:
+        raise HTTPException(status_code=503, detail="weather data not available.")
+    if max_points is not None:
+        time = df["time"].to_numpy(dtype="datetime64[ns]").astype("int64")
+        values = [df[column].to_numpy(dtype=float) for column in df.columns[1:]]
+        df = df.iloc[
+            downsample_indices(time, values, max_points, method=downsampling.value)
+        ]
+    df = df.round(1)
+    return df.to_dict(orient="list")
+
+
+@app.get(
+    "/get_location_data",
+    status_code=200,
+    response_model=LocationData,
+    tags=[tag_base],
+)
+async def get_location_weather_data(
+    lon: List[float] = Query(...),
+    lat: List[float] = Query(...),
+    grid: bool = False,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    data_field: DataFields = Query(DataFields.temperature_2m),
+    interval: str = "h",
+):
+    """
+    Fetch historical weather data for several locations as a location x time matrix.
+
+    Args:
+        lon (List[float]): Longitudes, repeat the parameter for several locations.
+        lat (List[float]): Latitudes, repeat the parameter for several locations.
+        grid (bool): If True, every combination of the given longitudes and latitudes
+            is used, otherwise longitudes and latitudes are paired. Defaults to False.
+        start_date (datetime.date, optional): Start date for the data range. Defaults to settings.START_DATE.
+        end_date (datetime.date, optional): End date for the data range. Defaults to settings.END_DATE.
         data_field (DataFields): The type of weather data to fetch.
         interval (str): of aggregation
 
     Returns:
-        Data: A dictionary with lists of weather data.
+        LocationData: shared time axis, the locations and one value list per location.
     """
-    df = get_historical_data(
-        lon=lon,
-        lat=lat,
-        data_field=data_field,
+    if grid:
+        locations = [(x, y) for y in lat for x in lon]
+    elif len(lon) == len(lat):
+        locations = list(zip(lon, lat))
+    else:
+        raise HTTPException(
+            status_code=422, detail="lon and lat must have the same length."
+        )
+    if len(locations) > settings.MAX_LOCATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many locations, maximum is {settings.MAX_LOCATIONS}.",
+        )
+    matrix = await get_historical_locations(
+        locations=locations,
+        data_field=data_field.value,
         start_date=start_date,
         end_date=end_date,
         interval=interval,
     )
-    df = df.round(1)
-    return df.to_dict(orient="list")
+    if matrix is None:
+        raise HTTPException(status_code=503, detail="weather data not available.")
+    return {
+        "time": matrix.index.to_list(),
+        "locations": [{"lon": x, "lat": y} for x, y in locations],
+        "value": matrix.to_numpy().T.round(1).tolist(),
+    }
+
+
+@app.websocket("/live")
+async def live_weather_data(
+    websocket: WebSocket,
+    lon: float = settings.LONGITUDE,
+    lat: float = settings.LATITUDE,
+    data_field: DataFields = DataFields.temperature_2m,
+):
+    """
+    Stream current weather readings with incrementally updated statistics.
+
+    On connect a snapshot message with the buffered samples is sent, followed
+    by an update message with the sample, rolling average, distance to before,
+    min/mean/max/std and the deviations for every new reading.
+
+    Args:
+        websocket (WebSocket): connection to the client.
+        lon (float, optional): Longitude of the location. Defaults to settings.LONGITUDE.
+        lat (float, optional): Latitude of the location. Defaults to settings.LATITUDE.
+        data_field (DataFields): The type of weather data to stream.
+    """
+    await websocket.accept()
+    feed, queue = live_service.subscribe(lon, lat, data_field.value)
+    receiver, getter = None, None
+    try:
+        await websocket.send_json({"type": "snapshot", **feed.series.snapshot()})
+        receiver = asyncio.create_task(websocket.receive())
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(
+                {receiver, getter}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.create_task(websocket.receive())
+            if getter in done:
+                await websocket.send_json({"type": "update", **getter.result()})
+            else:
+                getter.cancel()
+    finally:
+        # also when sending fails because the client is gone
+        for task in (receiver, getter):
+            if task is not None:
+                task.cancel()
+        live_service.unsubscribe(feed, queue)
+
+
+@app.get(
+    "/get_cache_stats", status_code=200, response_model=Dict[str, int], tags=[tag_base]
+)
+async def get_cache_stats_data():
+    """
+    Report the counters of the in-memory historical data cache and, prefixed
+    with "response_", of the cache for the POST endpoint responses.
+
+    Returns:
+        Dict[str, int]: hits, misses, evictions, entries, bytes and max_bytes.
+    """
+    return {
+        **get_cache_stats(),
+        **{f"response_{k}": v for k, v in response_cache.stats().items()},
+    }
+
+
+def _statistic_columns(
+    duration_s: float,
+    values: np.ndarray,
+    max_points: Optional[int] = None,
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
+) -> Dict[str, np.ndarray]:
+    """
+    builds the columns of the statistical endpoints, rounded to one decimal.
+
+    Args:
+        duration_s (float): total duration of the data series in seconds.
+        values (np.ndarray): result per data point.
+        max_points (int, optional): downsample to this many points. Defaults to None.
+        downsampling (DownsamplingMethods): method of downsampling. Defaults to lttb.
+
+    Returns:
+        Dict[str, np.ndarray]: time and value arrays.
+    """
+    time = time_axis(len(values), duration_s)
+    if max_points is not None:
+        kept = downsample_indices(time, [values], max_points, method=downsampling.value)
+        time, values = time[kept], values[kept]
+    return {"time": time.round(1), "value": np.round(values, 1)}
+
+
+def _statistic_response(
+    http_request: Request,
+    duration_s: float,
+    values: np.ndarray,
+    max_points: Optional[int] = None,
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
+    **extra,
+):
+    """
+    returns the time and value columns as JSON, with the extra fields, or in
+    the binary encoding asked for by the Accept header.
+
+    Args:
+        http_request (Request): incoming request.
+        duration_s (float): total duration of the data series in seconds.
+        values (np.ndarray): result per data point.
+        max_points (int, optional): downsample to this many points. Defaults to None.
+        downsampling (DownsamplingMethods): method of downsampling. Defaults to lttb.
+        **extra: further fields of the JSON response.
+
+    Returns:
+        Dict or Response: time and value lists or the encoded columns.
+    """
+    columns = _statistic_columns(duration_s, values, max_points, downsampling)
+    json_body = {name: column.tolist() for name, column in columns.items()}
+    return respond(http_request, columns, {**json_body, **extra})
 
 
 @app.post(
@@ -109,30 +394,38 @@ async def get_weather_data(
     status_code=200,
     response_model=StatisticData,
     tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
 )
 async def get_distance_to_before_data(
-    request: DataRequest,
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
     duration_s: int = settings.DURATION,
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
 ):
     """
     Calculate the distance between consecutive data points (to the previous point).
 
     Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
         request (DataRequest): The input data request containing the data list.
         duration_s (int): The total duration of the data series in seconds.
+        max_points (int, optional): Downsample the result to this many points for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
 
     Returns:
         StatisticData: A dictionary with the distance-to-before calculations.
     """
     data = request.data
-    if len(data) > 1000:
+    if len(data) > settings.MAX_DATA_ITEMS:
         raise HTTPException(
-            status_code=400, detail="List too large, maximum size is 1000."
+            status_code=400,
+            detail=f"List too large, maximum size is {settings.MAX_DATA_ITEMS}.",
         )
-    df = pd.DataFrame({"time": np.linspace(0, duration_s, len(data)), "value": data})
-    df = add_distance_to_before(df=df, on_column="value", to_column="value")
-    df = df.round(1)
-    return df.to_dict(orient="list")
+    values = as_values(data)
+    return _statistic_response(
+        http_request, duration_s, distance_to_before(values), max_points, downsampling
+    )
 
 
 @app.post(
@@ -140,26 +433,32 @@ async def get_distance_to_before_data(
     status_code=200,
     response_model=StatisticData,
     tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
 )
 async def get_distance_to_next_data(
-    request: DataRequest,
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
     duration_s: int = settings.DURATION,
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
 ):
     """
     Calculate the distance between consecutive data points (to the next point).
 
     Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
         request (DataRequest): The input data request containing the data list.
         duration_s (int): The total duration of the data series in seconds.
+        max_points (int, optional): Downsample the result to this many points for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
 
     Returns:
         StatisticData: A dictionary with the distance-to-next calculations.
     """
-    data = request.data
-    df = pd.DataFrame({"time": np.linspace(0, duration_s, len(data)), "value": data})
-    df = add_distance_to_next(df=df, on_column="value", to_column="value")
-    df = df.round(1)
-    return df.to_dict(orient="list")
+    values = as_values(request.data)
+    return _statistic_response(
+        http_request, duration_s, distance_to_next(values), max_points, downsampling
+    )
 
 
 @app.post(
@@ -167,45 +466,60 @@ async def get_distance_to_next_data(
     status_code=200,
     response_model=StatisticDataPoly,
     tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
 )
 async def get_polynomial_fit_data(
-    request: DataRequest,
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
     duration_s: int = settings.DURATION,
     degree: int = None,
     deviation: bool = False,
+    selection: PolynomialSelectionMethods = PolynomialSelectionMethods.holdout,
+    folds: int = Query(5, ge=2),
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
 ):
     """
     Fit a polynomial to the data and optionally calculate deviations.
 
     Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
         request (DataRequest): The input data request containing the data list.
         duration_s (int): The total duration of the data series in seconds.
         degree (int, optional): Degree of the polynomial to fit. Defaults to None, which auto-selects the best degree.
         deviation (bool): Whether to calculate deviations from the polynomial fit.
+        selection (PolynomialSelectionMethods): Validation scheme used to auto-select the degree.
+        folds (int): Number of folds for k-fold cross-validation.
+        max_points (int, optional): Downsample the result to this many points for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
 
     Returns:
-        StatisticData: A dictionary with polynomial fit values or their deviations.
+        StatisticDataPoly: Polynomial fit values or their deviations, with the
+            training and validation MSE per degree if the degree was auto-selected.
     """
-    data = request.data
-    df = pd.DataFrame({"time": np.linspace(0, duration_s, len(data)), "value": data})
-    if (degree is None) or (degree >= len(df)):
-        degree = find_best_polynomial_fit(df=df, on_column="value")[2]
-    if not deviation:
-        df = add_polynomial_fit(
-            df=df, on_column="value", to_column="value", degree=degree
-        )
-    else:
-        df = add_polynomial_fit(
-            df=df, on_column="value", to_column="value_abs", degree=degree
+    values = as_values(request.data)
+    mse_train, mse_val = None, None
+    if (degree is None) or (degree >= len(values)):
+        # the fit runs in a worker thread, the event loop keeps serving
+        mse_train, mse_val, degree = await asyncio.to_thread(
+            best_polynomial_degree, values, method=selection.value, folds=folds
         )
-        df = add_deviation(
-            df=df,
-            reference_column="value_abs",
-            on_column="value",
-            to_column="value",
-        )
-    df = df.round(1)
-    return StatisticDataPoly(time=df["time"], value=df["value"], degree=degree)
+    fit = polynomial_values(values, degree)
+    if deviation:
+        fit = compute_deviation(values, fit)
+    response = _statistic_response(
+        http_request,
+        duration_s,
+        fit,
+        max_points,
+        downsampling,
+        degree=degree,
+        mse_train=mse_train,
+        mse_val=mse_val,
+    )
+    if isinstance(response, Response):
+        response.headers["X-Degree"] = str(degree)
+    return response
 
 
 @app.post(
@@ -213,46 +527,115 @@ async def get_polynomial_fit_data(
     status_code=200,
     response_model=StatisticData,
     tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
 )
 async def get_rolling_average_data(
-    request: DataRequest,
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
     duration_s: int = settings.DURATION,
     window_size: int = settings.WINDOW_SIZE,
     deviation: bool = False,
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
 ):
     """
     Calculate a rolling average of the data and optionally deviations.
 
     Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
         request (DataRequest): Request object containing the input data.
         duration_s (int): Duration of the dataset in seconds. Defaults to settings.DURATION.
         window_size (int): Window size for the rolling average. Defaults to settings.WINDOW_SIZE.
         deviation (bool): Whether to calculate deviations from the rolling average. Defaults to False.
+        max_points (int, optional): Downsample the result to this many points for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
 
     Returns:
         StatisticData: Data with rolling average or the deviation optionally.
     """
-    data = request.data
-    df = pd.DataFrame({"time": np.linspace(0, duration_s, len(data)), "value": data})
-    if not deviation:
-        df = add_rolling_average(
-            df=df, on_column="value", to_column="value", window_size=window_size
+    values = as_values(request.data)
+    if window_size > len(values):
+        raise ValueError(
+            f"the Dataframe is shorter than window size: '{len(values)} < {window_size}'"
         )
-    else:
-        df = add_rolling_average(
-            df=df,
-            on_column="value",
-            to_column="value_abs",
-            window_size=window_size,
+    average = rolling_average(values, window_size)
+    if deviation:
+        average = compute_deviation(values, average)
+    return _statistic_response(
+        http_request, duration_s, average, max_points, downsampling
+    )
+
+
+@app.post(
+    "/get_rolling_statistics",
+    status_code=200,
+    response_model=RollingStatisticData,
+    tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
+)
+async def get_rolling_statistics_data(
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
+    duration_s: int = settings.DURATION,
+    window_size: List[int] = Query([settings.WINDOW_SIZE]),
+    statistic: RollingStatistics = RollingStatistics.mean,
+    deviation: bool = False,
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
+):
+    """
+    Calculate a rolling statistic of the data for several window sizes at once
+    and optionally the deviations from it.
+
+    Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
+        request (DataRequest): Request object containing the input data.
+        duration_s (int): Duration of the dataset in seconds. Defaults to settings.DURATION.
+        window_size (List[int]): Window sizes, the span for "ema". Defaults to [settings.WINDOW_SIZE].
+        statistic (RollingStatistics): Rolling statistic to calculate. Defaults to mean.
+        deviation (bool): Whether to calculate deviations from the rolling statistic. Defaults to False.
+        max_points (int, optional): Downsample the result to about this many points per window size
+            for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
+
+    Returns:
+        RollingStatisticData: One row of values per window size, undefined
+            values (std of a single value) are None. Binary encodings hold
+            one column "value_<window size>" per window size instead.
+    """
+    if len(window_size) > settings.MAX_ROLLING_WINDOWS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"at most {settings.MAX_ROLLING_WINDOWS} window sizes are allowed",
         )
-        df = add_deviation(
-            df=df,
-            reference_column="value_abs",
-            on_column="value",
-            to_column="value",
+    values = np.asarray(request.data, dtype=float)
+    try:
+        result = rolling_statistics(values, window_size, statistic=statistic.value)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if deviation:
+        result = np.abs(values - result)
+    time = time_axis(len(values), duration_s)
+    if max_points is not None:
+        # undefined values do not take part in picking the points
+        kept = downsample_indices(
+            time, np.nan_to_num(result), max_points, method=downsampling.value
         )
-    df = df.round(1)
-    return df.to_dict(orient="list")
+        time, result = time[kept], result[:, kept]
+    time = time.round(1)
+    result = result.round(1)
+    columns = {
+        "time": time,
+        **{f"value_{size}": row for size, row in zip(window_size, result)},
+    }
+    json_result = result.astype(object)
+    json_result[np.isnan(result)] = None
+    json_body = RollingStatisticData(
+        time=time.tolist(),
+        window_size=window_size,
+        value=json_result.tolist(),
+    )
+    return respond(http_request, columns, json_body)
 
 
 @app.post(
@@ -260,53 +643,135 @@ async def get_rolling_average_data(
     status_code=200,
     response_model=StatisticData,
     tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
 )
 async def get_summary_statistic_data(
-    request: DataRequest,
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
     duration_s: int = settings.DURATION,
     aggregation_type: AggregationTypes = Query(AggregationTypes.min),
     percentile: float = None,
     deviation: bool = False,
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
 ):
     """
     Calculate a summary statistic (e.g., min, max, mean) for the data.
 
     Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
         request (DataRequest): Request object containing the input data.
         duration_s (int): Duration of the dataset in seconds. Defaults to settings.DURATION.
         aggregation_type (AggregationTypes): Type of aggregation to apply. Defaults to min.
         percentile (float): Percentile to calculate (if applicable). Defaults to None.
         deviation (bool): Whether to calculate deviations from the statistic. Defaults to False.
+        max_points (int, optional): Downsample the result to this many points for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
 
     Returns:
         StatisticData: Data with summary statistic or the deviation.
     """
-    data = request.data
-    df = pd.DataFrame({"time": np.linspace(0, duration_s, len(data)), "value": data})
-    if not deviation:
-        df = add_summary_statistic(
-            df=df,
-            aggregation_type=aggregation_type,
-            on_column="value",
-            to_column="value",
-            percentile=percentile,
-        )
-    else:
-        df = add_summary_statistic(
-            df=df,
-            aggregation_type=aggregation_type,
-            on_column="value",
-            to_column="value_abs",
-            percentile=percentile,
+    values = as_values(request.data)
+    statistic = summary_statistic(values, aggregation_type, percentile)
+    result = np.full(len(values), statistic, dtype=float)
+    if deviation:
+        result = compute_deviation(values, result)
+    return _statistic_response(
+        http_request, duration_s, result, max_points, downsampling
+    )
+
+
+@app.post(
+    "/get_summary_statistics",
+    status_code=200,
+    response_model=SummaryStatisticsData,
+    tags=[tag_stat],
+    openapi_extra=body_openapi(DataRequest),
+)
+async def get_summary_statistics_data(
+    http_request: Request,
+    request: DataRequest = Depends(decoded_body(DataRequest)),
+    duration_s: int = settings.DURATION,
+    aggregation_type: List[AggregationTypes] = Query(
+        [AggregationTypes.min, AggregationTypes.mean, AggregationTypes.max]
+    ),
+    percentile: float = None,
+    deviation: bool = False,
+    max_points: Optional[int] = Query(None, ge=4),
+    downsampling: DownsamplingMethods = DownsamplingMethods.lttb,
+):
+    """
+    Calculate several summary statistics of the data in one request, sharing
+    the work between them, and optionally the deviation of the data from each.
+
+    Args:
+        http_request (Request): The incoming request, its Accept header selects the response encoding.
+        request (DataRequest): Request object containing the input data.
+        duration_s (int): Duration of the dataset in seconds. Defaults to settings.DURATION.
+        aggregation_type (List[AggregationTypes]): Statistics to calculate. Defaults to min, mean and max.
+        percentile (float): Percentile to calculate (if requested). Defaults to None.
+        deviation (bool): Whether to calculate the deviations from each statistic. Defaults to False.
+        max_points (int, optional): Downsample the time axis and the deviation series to about
+            this many points per series for plotting. Defaults to None.
+        downsampling (DownsamplingMethods): lttb keeps the shape of the line, minmax the extremes. Defaults to lttb.
+
+    Returns:
+        SummaryStatisticsData: The statistics by name and, if requested, the
+            deviation series by name. Statistics that are undefined for the
+            data (e.g. std of a single value) are left out. Binary encodings
+            hold one column per statistic, repeated along the time axis, and
+            one column "deviation_<statistic>" per deviation series instead.
+    """
+    values = np.asarray(request.data, dtype=float)
+    if len(values) == 0:
+        raise HTTPException(status_code=422, detail="data must not be empty")
+    try:
+        statistics = SummaryStatistics(values).compute(
+            [statistic.value for statistic in aggregation_type], percentile=percentile
         )
-        df = add_deviation(
-            df=df,
-            reference_column="value_abs",
-            on_column="value",
-            to_column="value",
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    statistics = {
+        name: value
+        for name, value in statistics.items()
+        if value is not None and not np.isnan(value)
+    }
+    time = np.linspace(0, duration_s, len(values))
+    deviations = None
+    if deviation:
+        deviations = {
+            name: np.abs(values - value) for name, value in statistics.items()
+        }
+    if max_points is not None:
+        # without deviations the time axis follows the data itself
+        kept = downsample_indices(
+            time,
+            list(deviations.values()) if deviations else [values],
+            max_points,
+            method=downsampling.value,
         )
-    df = df.round(1)
-    return df.to_dict(orient="list")
+        time = time[kept]
+        if deviations:
+            deviations = {name: series[kept] for name, series in deviations.items()}
+    time = time.round(1)
+    statistics = {name: round(value, 1) for name, value in statistics.items()}
+    if deviations is not None:
+        deviations = {name: series.round(1) for name, series in deviations.items()}
+    columns = {
+        "time": time,
+        **{name: np.full(len(time), value) for name, value in statistics.items()},
+        **{f"deviation_{name}": series for name, series in (deviations or {}).items()},
+    }
+    json_body = SummaryStatisticsData(
+        time=time.tolist(),
+        statistics=statistics,
+        deviations=(
+            None
+            if deviations is None
+            else {name: series.tolist() for name, series in deviations.items()}
+        ),
+    )
+    return respond(http_request, columns, json_body)
 
 
 @app.post(
@@ -314,14 +779,19 @@ async def get_summary_statistic_data(
     status_code=200,
     response_model=List[MidiNote],
     tags=[tag_midi],
+    openapi_extra=body_openapi(MidiNotesRequest),
 )
 async def get_midi_notes_data(
-    request: MidiNotesRequest,
+    request: MidiNotesRequest = Depends(decoded_body(MidiNotesRequest)),
     duration_s: int = settings.DURATION,
     start_midi_notes: int = settings.LOWEST_MIDI_NOTE,
     velocity_midi_min: int = 0,
     velocity_midi_max: int = 127,
     velocity_mapping_reversed: bool = False,
+    note_strategy: NoteStrategies = NoteStrategies.rank,
+    scale: Scales = Scales.chromatic,
+    highest_midi_note: int = Query(settings.HIGHEST_MIDI_NOTE, ge=0, le=127),
+    note_decimals: Optional[int] = None,
 ):
     """
     Map data to MIDI notes, velocities, and durations.
@@ -333,43 +803,32 @@ async def get_midi_notes_data(
         velocity_midi_min (int): Minimum MIDI velocity value. Defaults to 0.
         velocity_midi_max (int): Maximum MIDI velocity value. Defaults to 127.
         velocity_mapping_reversed (bool): Whether to reverse velocity mapping. Defaults to False.
+        note_strategy (NoteStrategies): rank gives every distinct value the next note, linear and
+            quantile split the values into one bin per note of the scale. Defaults to rank.
+        scale (Scales): Scale of the notes, rooted at start_midi_notes. Defaults to chromatic.
+        highest_midi_note (int): Highest MIDI note, higher notes are clamped. Defaults to settings.HIGHEST_MIDI_NOTE.
+        note_decimals (int, optional): Round the note data to this many decimals first. Defaults to None.
 
     Returns:
         MidiNotes: MIDI note data with notes, velocities, and durations.
     """
-    data_notes = request.data_for_notes
-    data_velocities = request.data_for_velocity
-    data_durations = request.data_for_duration
-    if not (len(data_notes) == len(data_durations) == len(data_velocities)):
-        raise HTTPException(
-            status_code=422, detail="the three lists must have the same length."
+    try:
+        return map_notes(
+            request.data_for_notes,
+            request.data_for_velocity,
+            request.data_for_duration,
+            duration_s=duration_s,
+            start_midi_notes=start_midi_notes,
+            velocity_midi_min=velocity_midi_min,
+            velocity_midi_max=velocity_midi_max,
+            velocity_mapping_reversed=velocity_mapping_reversed,
+            note_strategy=note_strategy.value,
+            scale=scale.value,
+            highest_midi_note=highest_midi_note,
+            note_decimals=note_decimals,
         )
-    df = pd.DataFrame(
-        {
-            "time": np.linspace(0, duration_s, len(data_notes)),
-            "value_notes": data_notes,
-            "value_velocities": data_velocities,
-            "value_durations": data_durations,
-        }
-    )
-    df = set_durations(
-        df=df, on_column="value_durations", to_column="duration", duration=duration_s
-    )
-    df = set_velocities(
-        df=df,
-        on_column="value_velocities",
-        to_column="velocity",
-        midi_min=velocity_midi_min,
-        midi_max=velocity_midi_max,
-        reverse=velocity_mapping_reversed,
-    )
-    df = set_notes(
-        df=df,
-        on_column="value_notes",
-        to_column="note",
-        start_midi_value=start_midi_notes,
-    )
-    return df.to_dict(orient="records")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @app.post(
@@ -377,9 +836,10 @@ async def get_midi_notes_data(
     status_code=200,
     response_model=List[MidiChord],
     tags=[tag_midi],
+    openapi_extra=body_openapi(MidiChordsRequest),
 )
 async def get_midi_chords_data(
-    request: MidiChordsRequest,
+    request: MidiChordsRequest = Depends(decoded_body(MidiChordsRequest)),
     duration_s: int = settings.DURATION,
     start_midi_notes: int = settings.LOWEST_MIDI_NOTE,
     velocity_midi_min: int = 0,
@@ -397,55 +857,25 @@ async def get_midi_chords_data(
         velocity_midi_min (int): Minimum MIDI velocity value. Defaults to 0.
         velocity_midi_max (int): Maximum MIDI velocity value. Defaults to 127.
         velocity_mapping_reversed (bool): Whether to reverse velocity mapping. Defaults to False.
-        chord_type (MidiChordTypes): Type of chords to generate (triads or tetrads). Defaults to tetrads.
+        chord_type (MidiChordTypes): Type of chords to generate, one of the registered chord tables (triads, tetrads, sus4, sevenths, clusters). Defaults to tetrads.
 
     Returns:
         MidiChords: MIDI chord data with chords, velocities, and durations.
     """
-    data_chords = request.data_for_chords
-    data_velocities = request.data_for_velocity
-    data_durations = request.data_for_duration
-    if not (len(data_chords) == len(data_durations) == len(data_velocities)):
-        raise HTTPException(
-            status_code=422, detail="the three lists must have the same length."
-        )
-    df = pd.DataFrame(
-        {
-            "time": np.linspace(0, duration_s, len(data_chords)),
-            "value_chords": data_chords,
-            "value_velocities": data_velocities,
-            "value_durations": data_durations,
-        }
-    )
-    df = set_durations(
-        df=df, on_column="value_durations", to_column="duration", duration=duration_s
-    )
-    df = set_velocities(
-        df=df,
-        on_column="value_velocities",
-        to_column="velocity",
-        midi_min=velocity_midi_min,
-        midi_max=velocity_midi_max,
-        reverse=velocity_mapping_reversed,
-    )
-    if chord_type == MidiChordTypes.tetrads:
-        df = set_tetras(
-            df=df,
-            on_column="value_chords",
-            to_column="chord",
-            start_midi_value=start_midi_notes,
-        )
-    elif chord_type == MidiChordTypes.triads:
-        df = set_triads(
-            df=df,
-            on_column="value_chords",
-            to_column="chord",
-            start_midi_value=start_midi_notes,
+    try:
+        return map_chords(
+            request.data_for_chords,
+            request.data_for_velocity,
+            request.data_for_duration,
+            duration_s=duration_s,
+            start_midi_notes=start_midi_notes,
+            velocity_midi_min=velocity_midi_min,
+            velocity_midi_max=velocity_midi_max,
+            velocity_mapping_reversed=velocity_mapping_reversed,
+            chord_type=chord_type.value,
         )
-    else:
-        raise HTTPException(status_code=422, detail="chord type invalid")
-    df = permutate_chords(df=df, seed_column="value_chords", chord_column="chord")
-    return df.to_dict(orient="records")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @app.post(
@@ -453,9 +883,10 @@ async def get_midi_chords_data(
     status_code=200,
     response_model=MidiDrone,
     tags=[tag_midi],
+    openapi_extra=body_openapi(MidiDroneRequest),
 )
 async def get_midi_drone_data(
-    request: MidiDroneRequest,
+    request: MidiDroneRequest = Depends(decoded_body(MidiDroneRequest)),
     duration_s: int = settings.DURATION,
     start_midi_notes: int = settings.LOWEST_MIDI_NOTE,
 ):
@@ -498,16 +929,18 @@ async def get_midi_drone_data(
 @app.post(
     "/map_data_to_midi_cc",
     status_code=200,
-    response_model=List[MidiCC],
+    response_model=Union[List[MidiCC], MidiCCThinned],
     tags=[tag_midi],
+    openapi_extra=body_openapi(MidiCCRequest),
 )
 async def get_midi_cc_data(
-    request: MidiCCRequest,
+    request: MidiCCRequest = Depends(decoded_body(MidiCCRequest)),
     duration_s: int = settings.DURATION,
     midi_min: int = 0,
     midi_max: int = 127,
     mapping_reversed: bool = False,
-    duration_per_cc_value: int = None,
+    duration_per_cc_value: Optional[float] = Query(None, ge=settings.MIN_CC_STEP_S),
+    max_cc_error: Optional[int] = Query(None, ge=0, le=127),
 ):
     """
     Map data to MIDI control change (CC) messages.
@@ -518,50 +951,183 @@ async def get_midi_cc_data(
         midi_min (int): Minimum MIDI CC value. Defaults to 0.
         midi_max (int): Maximum MIDI CC value. Defaults to 127.
         mapping_reversed (bool): Whether to reverse mapping. Defaults to False.
-        duration_per_cc_value (int): Duration per CC value (if provided). Defaults to None.
+        duration_per_cc_value (float): Duration per CC value in seconds (if provided), fractions
+            of a second such as 0.01 give smooth automation, at least settings.MIN_CC_STEP_S and
+            at most settings.MAX_DATA_ITEMS steps. Defaults to None.
+        max_cc_error (int, optional): Merge consecutive events into longer ones while the sent
+            value deviates at most this many CC steps from the merged values, 0 merges only
+            repeated values. Defaults to None, which keeps every event.
 
     Returns:
-        MidiCC: MIDI CC data with control change messages and durations.
+        MidiCC | MidiCCThinned: MIDI CC data with control change messages and durations, with
+            max_cc_error as the remaining events and the number of removed events.
     """
-    data_cc = request.data_for_cc
-    data_durations = request.data_for_durations
-    if data_durations and not (len(data_cc) == len(data_durations)):
-        raise HTTPException(
-            status_code=422, detail="the two lists must have the same length."
+    try:
+        return map_cc(
+            request.data_for_cc,
+            request.data_for_durations,
+            duration_s=duration_s,
+            midi_min=midi_min,
+            midi_max=midi_max,
+            mapping_reversed=mapping_reversed,
+            duration_per_cc_value=duration_per_cc_value,
+            max_cc_error=max_cc_error,
         )
-    if not data_durations and not duration_per_cc_value:
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get(
+    "/get_cc_parameters",
+    status_code=200,
+    response_model=Dict[str, int],
+    tags=[tag_midi],
+)
+async def get_cc_parameters_data():
+    """
+    List the synthesizer parameters available for CC lanes.
+
+    Returns:
+        Dict[str, int]: CC number by parameter name, from cc_parameter_mapping.json.
+    """
+    return cc_parameters
+
+
+@app.post(
+    "/map_data_to_midi_cc_lanes",
+    status_code=200,
+    response_model=MidiCCLanes,
+    tags=[tag_midi],
+)
+async def get_midi_cc_lanes_data(
+    request: MidiCCLanesRequest,
+    duration_s: int = settings.DURATION,
+    duration_per_cc_value: Optional[float] = Query(None, ge=settings.MIN_CC_STEP_S),
+):
+    """
+    Map several data series to CC automation lanes of named synthesizer parameters at once.
+
+    Every lane assigns one of the posted series to a parameter of
+    cc_parameter_mapping.json and scales it like /map_data_to_midi_cc to its
+    MIDI range. Series of different length are interpolated to the length of
+    the longest one, or all resampled to steps of duration_per_cc_value, so all
+    lanes share one time grid.
+
+    Args:
+        request (MidiCCLanesRequest): series by name and the lane of every parameter.
+        duration_s (int): Duration of the dataset in seconds. Defaults to settings.DURATION.
+        duration_per_cc_value (float, optional): Duration of a step in seconds, fractions of a
+            second down to settings.MIN_CC_STEP_S are allowed, at most settings.MAX_DATA_ITEMS
+            steps. Defaults to None, which keeps the steps of the longest series.
+
+    Returns:
+        MidiCCLanes: start time and duration of every step and the CC values per lane.
+    """
+    unknown = set(request.lanes) - set(cc_parameters)
+    if unknown:
         raise HTTPException(
             status_code=422,
-            detail="must give data for duration per cc message or custom duration interval.",
+            detail=f"Unknown parameters {sorted(unknown)}, use one of {sorted(cc_parameters)}.",
         )
-    df = pd.DataFrame(
-        {
-            "time": np.linspace(0, duration_s, len(data_cc)),
-            "value_cc": data_cc,
-            "duration_cc": data_durations,
-        }
-    )
-    df = set_cc_values(
-        df=df,
-        on_column="value_cc",
-        to_column="cc_message",
-        midi_min=midi_min,
-        midi_max=midi_max,
-        reverse=mapping_reversed,
-    )
+    missing = {lane.data for lane in request.lanes.values()} - set(request.data)
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing data: {sorted(missing)}")
+    lanes = list(request.lanes.items())
+    series = [np.asarray(request.data[lane.data], dtype=float) for _, lane in lanes]
     if duration_per_cc_value is None:
-        df = set_durations(
-            df=df, on_column="duration_cc", to_column="duration", duration=duration_s
-        )
+        n_steps = max(len(values) for values in series)
+        grid = shared_grid(series, n_steps)
+        durations = np.full(n_steps, duration_s / n_steps)
     else:
-        df = interpolate_for_custom_interval(
-            df=df,
-            on_column="cc_message",
-            duration_column="duration",
-            custom_duration_s=duration_per_cc_value,
+        try:
+            resampled = [
+                resample_steps(
+                    values, duration_s, duration_per_cc_value, settings.MAX_DATA_ITEMS
+                )
+                for values in series
+            ]
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        grid = np.array([values for values, _ in resampled])
+        durations = resampled[0][1]
+    cc_messages = scale_cc(
+        grid,
+        midi_min=[lane.midi_min for _, lane in lanes],
+        midi_max=[lane.midi_max for _, lane in lanes],
+        reverse=[lane.reversed for _, lane in lanes],
+        from_min=np.array([values.min() for values in series]),
+        from_max=np.array([values.max() for values in series]),
+    )
+    return MidiCCLanes(
+        time=np.concatenate(([0.0], durations.cumsum()[:-1])).tolist(),
+        duration=durations.tolist(),
+        lanes=[
+            MidiCCLane(
+                parameter=parameter,
+                cc_number=cc_parameters[parameter],
+                cc_message=row.tolist(),
+            )
+            for (parameter, _), row in zip(lanes, cc_messages)
+        ],
+    )
+
+
+@app.post(
+    "/pipeline",
+    status_code=200,
+    response_model=Union[List[MidiNote], List[MidiChord], List[MidiCC], MidiCCThinned],
+    tags=[tag_midi],
+)
+async def run_pipeline(
+    request: PipelineRequest,
+    duration_s: int = settings.DURATION,
+):
+    """
+    Run a chain of analysis operations and a MIDI mapping in one request.
+
+    The nodes form a DAG: every node applies an operation to the series of
+    another node or to a posted series, "fetch" nodes load historical weather
+    data with the parameters of /get_data. The output maps up to three node
+    series to MIDI events with the parameters of the matching MIDI endpoint.
+    Identical nodes are computed once and only the nodes the output depends
+    on are run. For example, notes from the deviation of the rolling average,
+    velocities from the distance to the next value and durations from a
+    polynomial fit:
+
+        {
+            "nodes": {
+                "raw": {"op": "fetch", "params": {"data_field": "temperature_2m"}},
+                "notes": {"op": "rolling_average", "input": "raw", "deviation": true},
+                "velocity": {"op": "distance_to_next", "input": "raw"},
+                "duration": {"op": "polynomial_fit", "input": "raw"}
+            },
+            "output": {
+                "type": "notes",
+                "inputs": {"notes": "notes", "velocity": "velocity", "duration": "duration"}
+            }
+        }
+
+    Args:
+        request (PipelineRequest): posted series, nodes and output.
+        duration_s (int): Duration of the MIDI events in seconds. Defaults to settings.DURATION.
+
+    Returns:
+        List[MidiNote] | List[MidiChord] | List[MidiCC] | MidiCCThinned: the MIDI events of
+            the output, CC events with max_cc_error as on /map_data_to_midi_cc.
+    """
+    try:
+        pipeline = Pipeline(
+            data=request.data,
+            nodes={
+                name: node.model_dump(mode="json")
+                for name, node in request.nodes.items()
+            },
+            output=request.output.model_dump(mode="json"),
             duration_s=duration_s,
         )
-    return df.to_dict(orient="records")
+        return await pipeline.run()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 app.mount("/", StaticFiles(directory="dist/", html=True), name="dist")
@@ -0,0 +1,296 @@
+"""
+Maps data series to lists of MIDI events, shared by the MIDI endpoints and
+the pipeline endpoint. Every function takes the series as arrays of equal
+length, builds the DataFrame of the data_to_midi_tools operations once and
+returns the events as records.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from cc_automation import resample_steps, scale_cc, thin_cc
+from chord_tables import map_to_chords, permute_chords
+from config import settings
+from data_to_midi_tools import (
+    set_cc_values,
+    set_durations,
+    set_notes,
+    set_velocities,
+)
+
+
+def _timed_frame(duration_s: float, **columns) -> pd.DataFrame:
+    if len({len(column) for column in columns.values()}) > 1:
+        raise ValueError("the three lists must have the same length.")
+    n = len(next(iter(columns.values())))
+    return pd.DataFrame({"time": np.linspace(0, duration_s, n), **columns})
+
+
+def _velocity_durations(
+    df: pd.DataFrame,
+    duration_s: float,
+    velocity_midi_min: int,
+    velocity_midi_max: int,
+    velocity_mapping_reversed: bool,
+) -> pd.DataFrame:
+    df = set_durations(
+        df=df, on_column="value_durations", to_column="duration", duration=duration_s
+    )
+    return set_velocities(
+        df=df,
+        on_column="value_velocities",
+        to_column="velocity",
+        midi_min=velocity_midi_min,
+        midi_max=velocity_midi_max,
+        reverse=velocity_mapping_reversed,
+    )
+
+
+def map_notes(
+    data_notes,
+    data_velocities,
+    data_durations,
+    duration_s: float = settings.DURATION,
+    start_midi_notes: int = settings.LOWEST_MIDI_NOTE,
+    velocity_midi_min: int = 0,
+    velocity_midi_max: int = 127,
+    velocity_mapping_reversed: bool = False,
+    note_strategy: str = "rank",
+    scale: str = "chromatic",
+    highest_midi_note: int = settings.HIGHEST_MIDI_NOTE,
+    note_decimals: Optional[int] = None,
+) -> List[Dict]:
+    """
+    maps three series to MIDI notes, velocities and durations.
+
+    Args:
+        data_notes (array_like): values for the notes.
+        data_velocities (array_like): values for the velocities.
+        data_durations (array_like): values for the durations.
+        duration_s (float, optional): total duration in seconds. Defaults to settings.DURATION.
+        start_midi_notes (int, optional): lowest MIDI note. Defaults to settings.LOWEST_MIDI_NOTE.
+        velocity_midi_min (int, optional): minimum velocity. Defaults to 0.
+        velocity_midi_max (int, optional): maximum velocity. Defaults to 127.
+        velocity_mapping_reversed (bool, optional): reverse the velocities. Defaults to False.
+        note_strategy (str, optional): "rank", "linear" or "quantile". Defaults to "rank".
+        scale (str, optional): scale of the notes, see note_mapping.SCALES. Defaults to "chromatic".
+        highest_midi_note (int, optional): highest MIDI note. Defaults to settings.HIGHEST_MIDI_NOTE.
+        note_decimals (int, optional): round the note values first. Defaults to None.
+
+    Raises:
+        ValueError: If the series differ in length or are empty.
+        ValueError: If the note strategy or scale is unsupported.
+
+    Returns:
+        List[Dict]: note, velocity and duration per event.
+    """
+    df = _timed_frame(
+        duration_s,
+        value_notes=data_notes,
+        value_velocities=data_velocities,
+        value_durations=data_durations,
+    )
+    df = _velocity_durations(
+        df, duration_s, velocity_midi_min, velocity_midi_max, velocity_mapping_reversed
+    )
+    df = set_notes(
+        df=df,
+        on_column="value_notes",
+        to_column="note",
+        start_midi_value=start_midi_notes,
+        strategy=note_strategy,
+        scale=scale,
+        highest_midi_value=highest_midi_note,
+        decimals=note_decimals,
+    )
+    return df.to_dict(orient="records")
+
+
+def map_chords(
+    data_chords,
+    data_velocities,
+    data_durations,
+    duration_s: float = settings.DURATION,
+    start_midi_notes: int = settings.LOWEST_MIDI_NOTE,
+    velocity_midi_min: int = 0,
+    velocity_midi_max: int = 127,
+    velocity_mapping_reversed: bool = False,
+    chord_type: str = "tetrads",
+) -> List[Dict]:
+    """
+    maps three series to MIDI chords, velocities and durations.
+
+    Args:
+        data_chords (array_like): values for the chords.
+        data_velocities (array_like): values for the velocities.
+        data_durations (array_like): values for the durations.
+        duration_s (float, optional): total duration in seconds. Defaults to settings.DURATION.
+        start_midi_notes (int, optional): lowest MIDI note. Defaults to settings.LOWEST_MIDI_NOTE.
+        velocity_midi_min (int, optional): minimum velocity. Defaults to 0.
+        velocity_midi_max (int, optional): maximum velocity. Defaults to 127.
+        velocity_mapping_reversed (bool, optional): reverse the velocities. Defaults to False.
+        chord_type (str, optional): registered chord type, see chord_tables. Defaults to "tetrads".
+
+    Raises:
+        ValueError: If the series differ in length or are empty.
+        ValueError: If the chord type is not registered.
+
+    Returns:
+        List[Dict]: chord, velocity and duration per event.
+    """
+    df = _timed_frame(
+        duration_s,
+        value_chords=data_chords,
+        value_velocities=data_velocities,
+        value_durations=data_durations,
+    )
+    df = _velocity_durations(
+        df, duration_s, velocity_midi_min, velocity_midi_max, velocity_mapping_reversed
+    )
+    # like set_chords followed by permutate_chords, without a list column in between
+    values = df["value_chords"].to_numpy(dtype=float)
+    chords = map_to_chords(values, chord_type, start_midi_notes)
+    df["chord"] = permute_chords(chords, values).tolist()
+    return df.to_dict(orient="records")
+
+
+def cc_events(
+    data_cc,
+    data_durations=None,
+    duration_s: float = settings.DURATION,
+    midi_min: int = 0,
+    midi_max: int = 127,
+    mapping_reversed: bool = False,
+    duration_per_cc_value: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    maps a series to MIDI CC values, with durations from a second series or
+    resampled to a fixed duration per CC value.
+
+    Args:
+        data_cc (array_like): values for the CC messages.
+        data_durations (array_like, optional): values for the durations. Defaults to None.
+        duration_s (float, optional): total duration in seconds. Defaults to settings.DURATION.
+        midi_min (int, optional): minimum CC value. Defaults to 0.
+        midi_max (int, optional): maximum CC value. Defaults to 127.
+        mapping_reversed (bool, optional): reverse the mapping. Defaults to False.
+        duration_per_cc_value (float, optional): fixed duration per CC value in
+            seconds, fractions of a second are allowed. Defaults to None.
+
+    Raises:
+        ValueError: If the series differ in length or are empty.
+        ValueError: If neither durations nor a duration per CC value are given.
+        ValueError: If the steps would exceed settings.MAX_DATA_ITEMS.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: CC value and duration per event.
+    """
+    if data_durations is not None and len(data_durations) == 0:
+        data_durations = None
+    if data_durations is not None and len(data_cc) != len(data_durations):
+        raise ValueError("the two lists must have the same length.")
+    if data_durations is None and not duration_per_cc_value:
+        raise ValueError(
+            "must give data for duration per cc message or custom duration interval."
+        )
+    if duration_per_cc_value is not None:
+        values = np.asarray(data_cc, dtype=float)
+        if len(values) == 0:
+            raise ValueError("The input data is empty.")
+        # resample the data first, so the CC values keep the resolution of the steps
+        resampled, durations = resample_steps(
+            values, duration_s, duration_per_cc_value, settings.MAX_DATA_ITEMS
+        )
+        cc_messages = scale_cc(
+            resampled[None],
+            midi_min=[midi_min],
+            midi_max=[midi_max],
+            reverse=[mapping_reversed],
+            from_min=values.min(keepdims=True),
+            from_max=values.max(keepdims=True),
+        )[0]
+        return cc_messages, durations
+    df = _timed_frame(duration_s, value_cc=data_cc, duration_cc=data_durations)
+    df = set_cc_values(
+        df=df,
+        on_column="value_cc",
+        to_column="cc_message",
+        midi_min=midi_min,
+        midi_max=midi_max,
+        reverse=mapping_reversed,
+    )
+    df = set_durations(
+        df=df, on_column="duration_cc", to_column="duration", duration=duration_s
+    )
+    return df["cc_message"].to_numpy(dtype=int), df["duration"].to_numpy(dtype=float)
+
+
+def cc_records(cc_messages: np.ndarray, durations: np.ndarray) -> List[Dict]:
+    """
+    returns CC events as records.
+
+    Args:
+        cc_messages (np.ndarray): CC value per event.
+        durations (np.ndarray): duration per event.
+
+    Returns:
+        List[Dict]: cc_message and duration per event.
+    """
+    return [
+        {"cc_message": cc_message, "duration": duration}
+        for cc_message, duration in zip(cc_messages.tolist(), durations.tolist())
+    ]
+
+
+def map_cc(
+    data_cc,
+    data_durations=None,
+    duration_s: float = settings.DURATION,
+    midi_min: int = 0,
+    midi_max: int = 127,
+    mapping_reversed: bool = False,
+    duration_per_cc_value: Optional[float] = None,
+    max_cc_error: Optional[int] = None,
+) -> Union[List[Dict], Dict]:
+    """
+    maps a series to MIDI CC events, see cc_events, and optionally merges
+    consecutive events, see cc_automation.thin_cc.
+
+    Args:
+        data_cc (array_like): values for the CC messages.
+        data_durations (array_like, optional): values for the durations. Defaults to None.
+        duration_s (float, optional): total duration in seconds. Defaults to settings.DURATION.
+        midi_min (int, optional): minimum CC value. Defaults to 0.
+        midi_max (int, optional): maximum CC value. Defaults to 127.
+        mapping_reversed (bool, optional): reverse the mapping. Defaults to False.
+        duration_per_cc_value (float, optional): fixed duration per CC value in
+            seconds. Defaults to None.
+        max_cc_error (int, optional): merge events that deviate at most this
+            many CC steps. Defaults to None, which keeps every event.
+
+    Raises:
+        ValueError: If the series differ in length or are empty.
+        ValueError: If neither durations nor a duration per CC value are given.
+        ValueError: If the steps would exceed settings.MAX_DATA_ITEMS.
+
+    Returns:
+        List[Dict] | Dict: cc_message and duration per event, with max_cc_error
+            the remaining events and the number of removed events.
+    """
+    cc_messages, durations = cc_events(
+        data_cc,
+        data_durations,
+        duration_s=duration_s,
+        midi_min=midi_min,
+        midi_max=midi_max,
+        mapping_reversed=mapping_reversed,
+        duration_per_cc_value=duration_per_cc_value,
+    )
+    if max_cc_error is None:
+        return cc_records(cc_messages, durations)
+    thinned_messages, thinned_durations = thin_cc(cc_messages, durations, max_cc_error)
+    return {
+        "events": cc_records(thinned_messages, thinned_durations),
+        "removed": len(cc_messages) - len(thinned_messages),
+    }
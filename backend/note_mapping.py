@@ -0,0 +1,141 @@
+"""
+Vectorized mapping of values to MIDI notes. Values are first turned into
+scale degrees by one of the strategies, then looked up in a table of the
+notes of a scale within the allowed note range, so every result is a valid
+MIDI note of the scale.
+
+- "rank": every distinct value gets the next degree, in sorted order.
+- "linear": the value range is split into bins of equal width, one per degree.
+- "quantile": the values are split into bins holding equally many values.
+"""
+
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+NOTE_STRATEGIES = ("rank", "linear", "quantile")
+
+# semitones of the scale steps above the root
+SCALES: Dict[str, Tuple[int, ...]] = {
+    "chromatic": tuple(range(12)),
+    "major": (0, 2, 4, 5, 7, 9, 11),
+    "minor": (0, 2, 3, 5, 7, 8, 10),
+    "harmonic_minor": (0, 2, 3, 5, 7, 8, 11),
+    "dorian": (0, 2, 3, 5, 7, 9, 10),
+    "major_pentatonic": (0, 2, 4, 7, 9),
+    "minor_pentatonic": (0, 3, 5, 7, 10),
+    "blues": (0, 3, 5, 6, 7, 10),
+    "whole_tone": (0, 2, 4, 6, 8, 10),
+}
+
+
+def _midi_scale(steps: Tuple[int, ...]) -> np.ndarray:
+    # the steps repeated over all octaves, with the root on every C
+    notes = np.arange(128, dtype=np.uint8)
+    table = notes[np.isin(notes % 12, steps)]
+    table.flags.writeable = False
+    return table
+
+
+SCALE_TABLES: Dict[str, np.ndarray] = {
+    name: _midi_scale(steps) for name, steps in SCALES.items()
+}
+
+
+def scale_notes(scale: str, lowest_note: int, highest_note: int) -> np.ndarray:
+    """
+    returns the notes of the scale within the note range, rooted at the
+    lowest note.
+
+    Args:
+        scale (str): one of SCALES.
+        lowest_note (int): lowest MIDI note, the root of the scale.
+        highest_note (int): highest MIDI note.
+
+    Raises:
+        ValueError: If the scale is unknown or the range holds no note.
+
+    Returns:
+        np.ndarray: ascending MIDI notes.
+    """
+    if scale not in SCALE_TABLES:
+        raise ValueError(f"Unsupported scale: '{scale}'")
+    lowest_note, highest_note = max(lowest_note, 0), min(highest_note, 127)
+    # transpose the table of C so its root falls on the lowest note
+    shift = lowest_note % 12
+    table = SCALE_TABLES[scale].astype(int) + shift
+    notes = table[(table >= lowest_note) & (table <= highest_note)]
+    if len(notes) == 0:
+        raise ValueError(f"no MIDI note between {lowest_note} and {highest_note}")
+    return notes
+
+
+def note_degrees(
+    values: np.ndarray,
+    strategy: str = "rank",
+    n_degrees: Optional[int] = None,
+    decimals: Optional[int] = None,
+) -> np.ndarray:
+    """
+    assigns a scale degree to every value.
+
+    Args:
+        values (np.ndarray): values without missing values.
+        strategy (str, optional): one of NOTE_STRATEGIES. Defaults to "rank".
+        n_degrees (int, optional): number of degrees of "linear" and
+            "quantile". Defaults to None, which uses the number of distinct values.
+        decimals (int, optional): round the values first, so float noise
+            does not create distinct values. Defaults to None.
+
+    Raises:
+        ValueError: If an unsupported strategy is requested.
+
+    Returns:
+        np.ndarray: degree per value, starting at 0.
+    """
+    if strategy not in NOTE_STRATEGIES:
+        raise ValueError(f"Unsupported note strategy: '{strategy}'")
+    values = np.asarray(values, dtype=float)
+    if decimals is not None:
+        values = values.round(decimals)
+    uniques, ranks = np.unique(values, return_inverse=True)
+    if strategy == "rank" or len(uniques) < 2:
+        return ranks
+    n_degrees = n_degrees or len(uniques)
+    if strategy == "linear":
+        low, high = uniques[0], uniques[-1]
+        bins = ((values - low) / (high - low) * n_degrees).astype(int)
+    else:
+        edges = np.quantile(values, np.linspace(0, 1, n_degrees + 1)[1:-1])
+        bins = np.searchsorted(edges, values, side="right")
+    return np.minimum(bins, n_degrees - 1)
+
+
+def map_to_notes(
+    values: np.ndarray,
+    strategy: str = "rank",
+    scale: str = "chromatic",
+    lowest_note: int = 0,
+    highest_note: int = 127,
+    decimals: Optional[int] = None,
+) -> np.ndarray:
+    """
+    maps values to notes of a scale within the note range. Degrees beyond
+    the range are clamped to the highest note of the scale.
+
+    Args:
+        values (np.ndarray): values without missing values.
+        strategy (str, optional): one of NOTE_STRATEGIES. Defaults to "rank".
+        scale (str, optional): one of SCALES. Defaults to "chromatic".
+        lowest_note (int, optional): lowest MIDI note. Defaults to 0.
+        highest_note (int, optional): highest MIDI note. Defaults to 127.
+        decimals (int, optional): round the values first. Defaults to None.
+
+    Raises:
+        ValueError: If the strategy or scale is unsupported or the range is empty.
+
+    Returns:
+        np.ndarray: MIDI note per value.
+    """
+    notes = scale_notes(scale, lowest_note, highest_note)
+    degrees = note_degrees(values, strategy, n_degrees=len(notes), decimals=decimals)
+    return notes[np.minimum(degrees, len(notes) - 1)]
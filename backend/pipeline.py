@@ -0,0 +1,343 @@
+"""
+Executes a declarative pipeline of analysis operations that ends in a MIDI
+mapping, so a client can go from raw series to MIDI events in one request.
+
+The pipeline is a DAG of named nodes. Every node applies one operation to
+the output of another node or to one of the series posted with the request,
+"fetch" nodes load historical weather data instead. Identical nodes (same
+operation, input and parameters) are computed once per request, fetches run
+concurrently before the analysis. Like the responses of the statistical
+endpoints, every node result is rounded to one decimal, so a pipeline maps
+the same values as posting those responses to the MIDI endpoints.
+"""
+
+import asyncio
+import datetime
+from typing import Callable, Dict, List, Tuple, Union
+import numpy as np
+from fastapi import HTTPException
+
+from config import settings
+from api_service import get_historical_data
+from analysis_core import (
+    best_polynomial_degree,
+    deviation,
+    distance_to_before,
+    distance_to_next,
+    polynomial_values,
+    rolling_average,
+    summary_statistic,
+)
+from midi_mapping import map_cc, map_chords, map_notes
+from rolling_statistics import rolling_statistics
+
+# parameter name -> (conversion, default) per operation
+_FETCH_PARAMS = {
+    "lon": (float, settings.LONGITUDE),
+    "lat": (float, settings.LATITUDE),
+    "data_field": (str, "temperature_2m"),
+    "start_date": (datetime.date.fromisoformat, None),
+    "end_date": (datetime.date.fromisoformat, None),
+    "interval": (str, "h"),
+    "aggregation": (str, "mean"),
+}
+
+
+def _int(value) -> int:
+    if isinstance(value, bool) or int(value) != value:
+        raise ValueError(f"'{value}' is not an integer")
+    return int(value)
+
+
+def _bool(value) -> bool:
+    if not isinstance(value, bool):
+        raise ValueError(f"'{value}' is not a boolean")
+    return value
+
+
+def _cc_step(value) -> float:
+    step = float(value)
+    if not step >= settings.MIN_CC_STEP_S:
+        raise ValueError(f"'{value}' is shorter than {settings.MIN_CC_STEP_S} s")
+    return step
+
+
+OPERATION_PARAMS = {
+    "fetch": _FETCH_PARAMS,
+    "distance_to_before": {},
+    "distance_to_next": {},
+    "rolling_average": {"window_size": (_int, settings.WINDOW_SIZE)},
+    "rolling_statistic": {
+        "window_size": (_int, settings.WINDOW_SIZE),
+        "statistic": (str, "mean"),
+    },
+    "polynomial_fit": {
+        "degree": (_int, None),
+        "selection": (str, "holdout"),
+        "folds": (_int, 5),
+    },
+    "summary_statistic": {
+        "aggregation_type": (str, "min"),
+        "percentile": (float, None),
+    },
+}
+
+OUTPUT_INPUTS = {
+    "notes": (("notes", "velocity", "duration"), ()),
+    "chords": (("chords", "velocity", "duration"), ()),
+    "cc": (("cc",), ("duration",)),
+}
+
+OUTPUT_PARAMS = {
+    "notes": {
+        "start_midi_notes": (_int, settings.LOWEST_MIDI_NOTE),
+        "velocity_midi_min": (_int, 0),
+        "velocity_midi_max": (_int, 127),
+        "velocity_mapping_reversed": (_bool, False),
+        "note_strategy": (str, "rank"),
+        "scale": (str, "chromatic"),
+        "highest_midi_note": (_int, settings.HIGHEST_MIDI_NOTE),
+        "note_decimals": (_int, None),
+    },
+    "chords": {
+        "start_midi_notes": (_int, settings.LOWEST_MIDI_NOTE),
+        "velocity_midi_min": (_int, 0),
+        "velocity_midi_max": (_int, 127),
+        "velocity_mapping_reversed": (_bool, False),
+        "chord_type": (str, "tetrads"),
+    },
+    "cc": {
+        "midi_min": (_int, 0),
+        "midi_max": (_int, 127),
+        "mapping_reversed": (_bool, False),
+        "duration_per_cc_value": (_cc_step, None),
+        "max_cc_error": (_int, None),
+    },
+}
+
+
+def read_params(name: str, params: Dict, spec: Dict[str, Tuple[Callable, object]]):
+    """
+    converts the parameters of a node and fills in the defaults.
+
+    Args:
+        name (str): node name for error messages.
+        params (Dict): given parameters.
+        spec (Dict[str, Tuple[Callable, object]]): conversion and default per parameter.
+
+    Raises:
+        ValueError: If a parameter is unknown or has an invalid value.
+
+    Returns:
+        Dict: all parameters of the spec.
+    """
+    unknown = set(params) - set(spec)
+    if unknown:
+        raise ValueError(f"node '{name}': unknown parameters {sorted(unknown)}")
+    result = {}
+    for key, (convert, default) in spec.items():
+        value = params.get(key)
+        try:
+            result[key] = default if value is None else convert(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"node '{name}': invalid value for '{key}': {e}")
+    return result
+
+
+def _apply(op: str, values: np.ndarray, params: Dict) -> np.ndarray:
+    if op == "distance_to_before":
+        return distance_to_before(values)
+    if op == "distance_to_next":
+        return distance_to_next(values)
+    if op == "rolling_average":
+        return rolling_average(values, params["window_size"])
+    if op == "rolling_statistic":
+        return rolling_statistics(
+            values, [params["window_size"]], statistic=params["statistic"]
+        )[0]
+    if op == "polynomial_fit":
+        degree = params["degree"]
+        if degree is None or degree >= len(values):
+            degree = best_polynomial_degree(
+                values, method=params["selection"], folds=params["folds"]
+            )[2]
+        return polynomial_values(values, degree)
+    if op == "summary_statistic":
+        statistic = summary_statistic(
+            values, params["aggregation_type"], params["percentile"]
+        )
+        return np.full(len(values), statistic, dtype=float)
+    raise ValueError(f"Unsupported operation: '{op}'")
+
+
+async def _fetch(params: Dict) -> np.ndarray:
+    df = await get_historical_data(
+        lon=params["lon"],
+        lat=params["lat"],
+        data_field=params["data_field"],
+        start_date=params["start_date"],
+        end_date=params["end_date"],
+        interval=params["interval"],
+        aggregation=params["aggregation"],
+    )
+    if df.empty:
+        raise HTTPException(status_code=503, detail="weather data not available.")
+    return df["value"].to_numpy(dtype=float).round(1)
+
+
+class Pipeline:
+    """
+    Resolved pipeline of one request.
+
+    Args:
+        data (Dict[str, List[float]]): series posted with the request.
+        nodes (Dict[str, Dict]): node name -> op, input, params and deviation.
+        output (Dict): type, inputs (role -> node or series name) and params.
+        duration_s (float, optional): total duration of the MIDI events in
+            seconds. Defaults to settings.DURATION.
+
+    Raises:
+        ValueError: If the pipeline references unknown names, has a cycle or
+            invalid parameters.
+    """
+
+    def __init__(
+        self,
+        data: Dict[str, List[float]],
+        nodes: Dict[str, Dict],
+        output: Dict,
+        duration_s: float = settings.DURATION,
+    ):
+        overlap = set(data) & set(nodes)
+        if overlap:
+            raise ValueError(f"names used for data and nodes: {sorted(overlap)}")
+        self.data = {
+            name: np.asarray(values, dtype=float) for name, values in data.items()
+        }
+        self.nodes = nodes
+        self.duration_s = duration_s
+        self.output_type = output["type"]
+        if self.output_type not in OUTPUT_INPUTS:
+            raise ValueError(f"Unsupported output type: '{self.output_type}'")
+        required, optional = OUTPUT_INPUTS[self.output_type]
+        inputs = output.get("inputs", {})
+        missing = set(required) - set(inputs)
+        unknown = set(inputs) - set(required) - set(optional)
+        if missing or unknown:
+            raise ValueError(
+                f"output '{self.output_type}' needs the inputs {list(required)}"
+                + (f" and optionally {list(optional)}" if optional else "")
+            )
+        self.output_inputs = inputs
+        self.output_params = read_params(
+            "output", output.get("params", {}), OUTPUT_PARAMS[self.output_type]
+        )
+        # canonical key per name, equal keys mean equal results
+        self.keys: Dict[str, Tuple] = {name: ("data", name) for name in self.data}
+        self.params: Dict[str, Dict] = {}
+        self.order: List[str] = []
+        for name in inputs.values():
+            self._resolve(name, ())
+
+    def _resolve(self, name: str, path: Tuple[str, ...]) -> Tuple:
+        if name in self.keys:
+            return self.keys[name]
+        if name in path:
+            raise ValueError(f"cycle in pipeline: {' -> '.join(path + (name,))}")
+        if name not in self.nodes:
+            raise ValueError(f"unknown node or data: '{name}'")
+        node = self.nodes[name]
+        op = node["op"]
+        if op not in OPERATION_PARAMS:
+            raise ValueError(f"node '{name}': unsupported operation '{op}'")
+        params = read_params(name, node.get("params", {}), OPERATION_PARAMS[op])
+        if op == "fetch":
+            if node.get("input") is not None or node.get("deviation"):
+                raise ValueError(f"node '{name}': fetch takes no input or deviation")
+            input_key = None
+        else:
+            if node.get("input") is None:
+                raise ValueError(f"node '{name}': input missing")
+            input_key = self._resolve(node["input"], path + (name,))
+        key = (
+            op,
+            input_key,
+            bool(node.get("deviation")),
+            tuple(sorted((k, str(v)) for k, v in params.items())),
+        )
+        self.keys[name] = key
+        self.order.append(name)
+        self.params[name] = params
+        return key
+
+    async def run(self) -> Union[List[Dict], Dict]:
+        """
+        computes the nodes needed for the output and maps them to MIDI events.
+
+        Raises:
+            ValueError: If an operation fails or the output series are invalid.
+
+        Returns:
+            List[Dict] | Dict: MIDI events of the output type, see midi_mapping.map_cc
+                for CC events with max_cc_error.
+        """
+        results: Dict[Tuple, np.ndarray] = {
+            self.keys[name]: values for name, values in self.data.items()
+        }
+        fetches = {}
+        for name in self.order:
+            key = self.keys[name]
+            if key[0] == "fetch" and key not in fetches:
+                fetches[key] = self.params[name]
+        fetched = await asyncio.gather(*(_fetch(params) for params in fetches.values()))
+        results.update(zip(fetches, fetched))
+
+        for name in self.order:
+            key = self.keys[name]
+            if key in results:
+                continue
+            values = results[key[1]]
+            if len(values) == 0:
+                raise ValueError(f"node '{name}': the input data is empty.")
+            try:
+                # off the event loop, the degree selection may take a while
+                result = await asyncio.to_thread(
+                    _apply, key[0], values, self.params[name]
+                )
+            except ValueError as e:
+                raise ValueError(f"node '{name}': {e}")
+            if key[2]:
+                result = deviation(values, result)
+            results[key] = np.round(result, 1)
+
+        series = {}
+        for role, name in self.output_inputs.items():
+            values = results[self.keys[name]]
+            if np.isnan(values).any():
+                raise ValueError(f"'{name}' has undefined values, cannot map to MIDI")
+            series[role] = values
+        return self._map(series)
+
+    def _map(self, series: Dict[str, np.ndarray]) -> Union[List[Dict], Dict]:
+        if self.output_type == "notes":
+            return map_notes(
+                series["notes"],
+                series["velocity"],
+                series["duration"],
+                duration_s=self.duration_s,
+                **self.output_params,
+            )
+        if self.output_type == "chords":
+            return map_chords(
+                series["chords"],
+                series["velocity"],
+                series["duration"],
+                duration_s=self.duration_s,
+                **self.output_params,
+            )
+        return map_cc(
+            series["cc"],
+            series.get("duration"),
+            duration_s=self.duration_s,
+            **self.output_params,
+        )
@@ -0,0 +1,173 @@
+"""
+Polynomial fitting engine. Sample positions are scaled to [-1, 1] and
+expressed in the Legendre basis, which keeps the Vandermonde matrix well
+conditioned at high degrees. One QR factorization of the Vandermonde matrix
+yields the least squares fits of all degrees: because the columns of Q are
+orthonormal, every extra degree only adds one term to the fit and its error.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import numpy as np
+from numpy.polynomial import legendre
+from scipy.linalg import solve_triangular
+
+from config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CV_MAX_WORKERS, thread_name_prefix="cv"
+        )
+    return _executor
+
+
+def scaled_positions(n: int) -> np.ndarray:
+    """
+    returns n equally spaced sample positions scaled to [-1, 1].
+
+    Args:
+        n (int): number of samples.
+
+    Returns:
+        np.ndarray: positions
+    """
+    if n == 1:
+        return np.zeros(1)
+    return np.linspace(-1.0, 1.0, n)
+
+
+def fit_all_degrees(
+    x_train: np.ndarray,
+    y_train: np.ndarray,
+    x_val: np.ndarray,
+    y_val: np.ndarray,
+    max_degree: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    computes the training and validation MSE of the least squares polynomial
+    fits of every degree from 1 to max_degree.
+
+    Args:
+        x_train (np.ndarray): training positions in [-1, 1].
+        y_train (np.ndarray): training values.
+        x_val (np.ndarray): validation positions in [-1, 1].
+        y_val (np.ndarray): validation values.
+        max_degree (int): highest degree, capped at len(x_train) - 1.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: training and validation MSE per degree.
+    """
+    max_degree = min(max_degree, len(x_train) - 1)
+    q, r = np.linalg.qr(legendre.legvander(x_train, max_degree))
+    coefficients = q.T @ y_train
+    # basis functions that are orthonormal on the training positions,
+    # evaluated at the validation positions
+    q_val = solve_triangular(
+        r, legendre.legvander(x_val, max_degree).T, trans="T", lower=False
+    ).T
+
+    train_residual = y_train @ y_train - np.cumsum(coefficients**2)
+    mse_train = np.maximum(train_residual, 0.0) / len(y_train)
+    val_predictions = np.cumsum(q_val * coefficients, axis=1)
+    mse_val = np.mean((val_predictions - y_val[:, None]) ** 2, axis=0)
+    return mse_train[1:], mse_val[1:]
+
+
+def polynomial_fit(y: np.ndarray, degree: int) -> np.ndarray:
+    """
+    returns the least squares polynomial fit of equally spaced values.
+
+    Args:
+        y (np.ndarray): values.
+        degree (int): of the polynomial, capped at len(y) - 1.
+
+    Returns:
+        np.ndarray: fitted values
+    """
+    degree = min(degree, len(y) - 1)
+    x = scaled_positions(len(y))
+    q, _ = np.linalg.qr(legendre.legvander(x, degree))
+    return q @ (q.T @ y)
+
+
+def kfold_all_degrees(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_degree: int,
+    folds: int = 5,
+    random_state: int = 42,
+    work_budget: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    computes the k-fold cross-validated training and validation MSE of every
+    degree from 1 to max_degree. The folds run in a bounded thread pool, each
+    evaluating all degrees with fit_all_degrees. The number of folds is
+    capped up front so their estimated cost of len(x) * (max_degree + 1)^2
+    operations each fits the work budget, so the result only depends on the
+    input and not on how fast the folds finish.
+
+    Args:
+        x (np.ndarray): positions in [-1, 1].
+        y (np.ndarray): values.
+        max_degree (int): highest degree, capped so every training fold can be fitted.
+        folds (int, optional): number of folds, capped at len(x) and by the work budget, at least 2. Defaults to 5.
+        random_state (int, optional): seed of the fold assignment. Defaults to 42.
+        work_budget (Optional[int], optional): Defaults to settings.CV_WORK_BUDGET.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: mean training and validation MSE per degree.
+    """
+    if work_budget is None:
+        work_budget = settings.CV_WORK_BUDGET
+    fold_cost = len(x) * (max_degree + 1) ** 2
+    folds = max(2, min(folds, len(x), work_budget // max(fold_cost, 1)))
+    order = np.random.default_rng(random_state).permutation(len(x))
+    splits = np.array_split(order, folds)
+    smallest_train = len(x) - max(len(split) for split in splits)
+    max_degree = min(max_degree, smallest_train - 1)
+
+    def evaluate(val_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        train_mask = np.ones(len(x), dtype=bool)
+        train_mask[val_index] = False
+        return fit_all_degrees(
+            x[train_mask], y[train_mask], x[val_index], y[val_index], max_degree
+        )
+
+    # average in fold order, so equal inputs give bit-identical results
+    results = list(_get_executor().map(evaluate, splits))
+    mse_train = np.mean([result[0] for result in results], axis=0)
+    mse_val = np.mean([result[1] for result in results], axis=0)
+    return mse_train, mse_val
+
+
+def loo_all_degrees(
+    x: np.ndarray, y: np.ndarray, max_degree: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    computes the training and leave-one-out MSE of every degree from 1 to
+    max_degree without refitting: the leave-one-out residual of a linear
+    least squares fit is e_i / (1 - h_ii), and the hat matrix diagonal h_ii
+    of degree d is the cumulative sum of the squared Q entries up to d.
+
+    Args:
+        x (np.ndarray): positions in [-1, 1].
+        y (np.ndarray): values.
+        max_degree (int): highest degree, capped at len(x) - 2 so no point is
+            interpolated exactly (h_ii < 1).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: training and leave-one-out MSE per degree.
+    """
+    max_degree = min(max_degree, len(x) - 2)
+    q, _ = np.linalg.qr(legendre.legvander(x, max_degree))
+    coefficients = q.T @ y
+    residuals = y[:, None] - np.cumsum(q * coefficients, axis=1)
+    leverage = np.cumsum(q**2, axis=1)
+    mse_train = np.mean(residuals**2, axis=0)
+    mse_val = np.mean((residuals / (1.0 - leverage)) ** 2, axis=0)
+    return mse_train[1:], mse_val[1:]
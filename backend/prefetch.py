@@ -0,0 +1,87 @@
+"""
+Background scheduler that rolls the default date range over when the day
+changes and pre-warms the caches for the default view, so the first page
+load after a restart or a date change does not wait for the upstream API.
+"""
+
+import asyncio
+import logging
+from typing import List, Tuple
+
+from api_service import (
+    BASE_URL_HIST,
+    evict_historical_data,
+    get_historical_data_fields,
+)
+from config import settings
+from data_store import date_range, store
+from schemas import DataFields
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = "h"
+
+
+def _prefetch_locations() -> List[Tuple[float, float]]:
+    locations = [(settings.LONGITUDE, settings.LATITUDE)]
+    locations += [
+        location
+        for location in settings.PREFETCH_LOCATIONS
+        if tuple(location) not in locations
+    ]
+    return locations
+
+
+async def prefetch_defaults() -> bool:
+    """
+    warms the caches for the default date range, all data fields and the
+    default plus configured extra locations. Locations whose days are not all
+    archived yet are dropped from the in-memory caches, with the intervals
+    derived from them, and fetched again, so newly published archive data
+    replaces incomplete entries.
+
+    Returns:
+        bool: True if every requested day is in the on-disk store.
+    """
+    data_fields = [field.value for field in DataFields]
+    days = date_range(settings.START_DATE, settings.END_DATE)
+    complete = True
+    for lon, lat in _prefetch_locations():
+        incomplete_fields = [
+            data_field
+            for data_field in data_fields
+            if await asyncio.to_thread(store.missing_days, lon, lat, data_field, days)
+        ]
+        for data_field in incomplete_fields:
+            evict_historical_data(
+                BASE_URL_HIST,
+                lon,
+                lat,
+                data_field,
+                settings.START_DATE,
+                settings.END_DATE,
+            )
+        await get_historical_data_fields(
+            lon=lon, lat=lat, data_fields=data_fields, interval=DEFAULT_INTERVAL
+        )
+        for data_field in data_fields:
+            if await asyncio.to_thread(store.missing_days, lon, lat, data_field, days):
+                complete = False
+    return complete
+
+
+async def run_prefetch_scheduler():
+    """
+    rolls the default dates over and pre-warms the caches, then checks every
+    settings.PREFETCH_CHECK_INTERVAL_S seconds until the task is cancelled.
+    A new day or a default range that was not completely archived at the last
+    check triggers another prefetch.
+    """
+    complete = False
+    while True:
+        try:
+            if settings.roll_default_dates() or not complete:
+                complete = await prefetch_defaults()
+        except Exception:
+            logger.exception("prefetch of the default view failed")
+        await asyncio.sleep(settings.PREFETCH_CHECK_INTERVAL_S)
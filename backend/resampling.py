@@ -0,0 +1,103 @@
+"""
+Resampling engine that aggregates hourly base data to coarser intervals.
+All aggregates of an interval are computed together from contiguous numpy
+arrays, so switching between intervals or aggregates does not touch the
+upstream API or pandas groupby.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+
+AGGREGATES = ("min", "mean", "max", "std", "count")
+
+
+def is_base_interval(interval: str) -> bool:
+    """
+    checks if the interval is the hourly resolution of the base data.
+
+    Args:
+        interval (str): pandas frequency string, e.g. "h", "3h", "D", "MS".
+
+    Returns:
+        bool: True for empty and hourly intervals.
+    """
+    return not interval or to_offset(interval) == to_offset("h")
+
+
+def _bin_edges(time: np.ndarray, interval: str) -> np.ndarray:
+    """
+    returns the left bin edges covering all times. Fixed intervals start at
+    the first time, calendar intervals (e.g. "MS", "YS", "W") at their anchor.
+    """
+    offset = to_offset(interval)
+    first, last = pd.Timestamp(time[0]), pd.Timestamp(time[-1])
+    if isinstance(offset, Tick):
+        step = offset.nanos
+        n_bins = (time[-1] - time[0]).astype("int64") // step + 1
+        return time[0] + np.arange(n_bins) * np.timedelta64(step, "ns")
+    start = offset.rollback(first.normalize())
+    return pd.date_range(start=start, end=last, freq=offset).to_numpy()
+
+
+def resample_aggregates(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    aggregates a sorted series to the interval, computing min, mean, max,
+    std (ddof=1 like pandas) and count of every bin in one vectorized pass.
+    Bins are closed and labeled on the left, empty bins are dropped.
+
+    Args:
+        df (pd.DataFrame): with columns time (sorted) and value.
+        interval (str): pandas frequency string, e.g. "3h", "D", "W", "MS".
+
+    Returns:
+        pd.DataFrame: with columns time, min, mean, max, std and count.
+    """
+    time = df["time"].to_numpy(dtype="datetime64[ns]")
+    value = df["value"].to_numpy(dtype=float)
+    if len(time) == 0:
+        return pd.DataFrame(
+            {"time": time, **{name: np.array([], dtype=float) for name in AGGREGATES}}
+        )
+    edges = _bin_edges(time, interval)
+    bins = np.searchsorted(edges, time, side="right") - 1
+    # time is sorted, so every bin is one contiguous segment of the arrays
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(bins)]))
+    count = np.bincount(segment).astype(float)
+    mean = np.bincount(segment, weights=value) / count
+    squared = np.bincount(segment, weights=(value - mean[segment]) ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(squared / (count - 1))
+    return pd.DataFrame(
+        {
+            "time": edges[bins[starts]],
+            "min": np.minimum.reduceat(value, starts),
+            "mean": mean,
+            "max": np.maximum.reduceat(value, starts),
+            "std": std,
+            "count": count,
+        }
+    )
+
+
+def select_aggregate(aggregates: pd.DataFrame, aggregation: str) -> pd.DataFrame:
+    """
+    picks one aggregate as value column without copying.
+
+    Args:
+        aggregates (pd.DataFrame): result of resample_aggregates.
+        aggregation (str): one of AGGREGATES.
+
+    Returns:
+        pd.DataFrame: with columns time and value, bins without value are dropped.
+    """
+    if aggregation not in AGGREGATES:
+        raise ValueError(f"Unsupported aggregation type: '{aggregation}'")
+    df = pd.DataFrame(
+        {"time": aggregates["time"], "value": aggregates[aggregation]}, copy=False
+    )
+    if aggregation == "std":
+        df = df.dropna()
+    return df
@@ -0,0 +1,197 @@
+"""
+Building blocks that keep upstream incidents from dominating response times:
+jittered retry delays, a circuit breaker, a token bucket rate limiter and an
+in-memory fallback store for when the upstream API is not available.
+"""
+
+import asyncio
+import datetime
+import random
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+
+def backoff_delay(attempt: int, base_delay_s: float, max_delay_s: float) -> float:
+    """
+    returns a "full jitter" exponential backoff delay, uniformly drawn between
+    0 and base_delay_s * 2**attempt capped at max_delay_s.
+
+    Args:
+        attempt (int): number of the failed attempt, starting at 0.
+        base_delay_s (float): delay scale in seconds.
+        max_delay_s (float): upper bound of the delay in seconds.
+
+    Returns:
+        float: delay in seconds.
+    """
+    return random.uniform(0, min(max_delay_s, base_delay_s * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout_s` seconds. Afterwards a single trial call is let
+    through (half open): its success closes the breaker, its failure opens
+    it again. Every admitted call holds a ticket, only the ticket of the
+    trial can end the trial.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial: Optional[object] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> Optional[object]:
+        """
+        checks if a call may be made now.
+
+        Returns:
+            Optional[object]: ticket of the admitted call, None while the
+                breaker is open or a half open trial is running.
+        """
+        state = self.state
+        if state == "closed":
+            return object()
+        if state == "half_open" and self._trial is None:
+            self._trial = object()
+            return self._trial
+        return None
+
+    def record_success(self, ticket: object):
+        """closes the breaker."""
+        self.failures = 0
+        self.opened_at = None
+        self._trial = None
+
+    def release_trial(self, ticket: object):
+        """ends the half open trial if the ticket owns it, without deciding it."""
+        if ticket is self._trial:
+            self._trial = None
+
+    def record_failure(self, ticket: object):
+        """counts a failure, opens the breaker at the threshold or on a failed trial."""
+        self.failures += 1
+        if ticket is self._trial or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.release_trial(ticket)
+
+
+class TokenBucket:
+    """
+    Rate limiter that refills `rate` tokens per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self, max_wait_s: float) -> bool:
+        """
+        takes one token, waiting for the refill if necessary. The token is
+        reserved before the wait, so waiting callers do not hold the lock.
+
+        Args:
+            max_wait_s (float): longest acceptable wait in seconds.
+
+        Returns:
+            bool: False if no token becomes available within max_wait_s.
+        """
+        async with self._lock:
+            self._refill()
+            wait_s = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait_s > max_wait_s:
+                return False
+            # reserve the token now, tokens below zero are owed to the callers
+            # still sleeping, so every caller sees the wait of its own turn
+            self.tokens -= 1
+        if wait_s > 0:
+            await asyncio.sleep(wait_s)
+        return True
+
+
+class FallbackStore:
+    """
+    Backup data loaded into memory once. `<data_field>.csv` files in the
+    directory hold one data field each, `df.csv` holds the temperature.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._data: Optional[Dict[str, pd.DataFrame]] = None
+
+    def _load(self) -> Dict[str, pd.DataFrame]:
+        if self._data is None:
+            data = {}
+            for path in sorted(self.directory.glob("*.csv")):
+                data_field = "temperature_2m" if path.stem == "df" else path.stem
+                df = pd.read_csv(path, parse_dates=["time"])
+                data[data_field] = df.dropna().sort_values("time", ignore_index=True)
+            self._data = data
+        return self._data
+
+    def get(
+        self,
+        data_field: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        interval: Optional[str],
+    ) -> pd.DataFrame:
+        """
+        returns the backup data sliced to the requested range and aggregated
+        to the interval.
+
+        Args:
+            data_field (str): type of data.
+            start_date (datetime.date): first day.
+            end_date (datetime.date): last day.
+            interval (Optional[str]): pandas frequency string, "h" keeps hourly data.
+
+        Returns:
+            pd.DataFrame: with columns time and value, empty if there is no
+                backup for the data field or the backup does not cover the range.
+        """
+        backup = self._load().get(data_field)
+        if backup is None or backup.empty:
+            return pd.DataFrame(
+                {
+                    "time": np.array([], dtype="datetime64[ns]"),
+                    "value": np.array([], dtype=float),
+                }
+            )
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        mask = (backup["time"] >= start) & (backup["time"] < end)
+        df = backup[mask]
+        df = df[df["time"] <= datetime.datetime.now()]
+        if interval and (interval != "h") and not df.empty:
+            df = (
+                df.set_index("time")
+                .resample(interval, origin=df["time"].min())
+                .mean()
+                .dropna()
+                .reset_index()
+            )
+        return df.reset_index(drop=True)
@@ -0,0 +1,308 @@
+"""
+Content-addressed cache for the responses of the POST analysis and MIDI
+endpoints. Results are keyed by a hash of the path, the query parameters and
+the request body, so re-posting the same data is answered without
+recomputing it. Every cached response carries an ETag, a matching
+If-None-Match is answered with 304 Not Modified and an empty body.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+CachedResponse = Tuple[bytes, str, str]
+
+
+def content_hash(*parts: bytes) -> str:
+    """
+    hashes the parts with BLAKE2b, a length prefix keeps the parts apart.
+
+    Args:
+        *parts (bytes): data to hash.
+
+    Returns:
+        str: 32 hex digits.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def request_key(
+    path: str, query: str, body: bytes, content_type: str = "", accept: str = ""
+) -> str:
+    """
+    returns the cache key of a request. Query parameters are sorted, so
+    their order in the URL does not matter. The encodings of body and
+    response are part of the key, see data_codecs.
+
+    Args:
+        path (str): endpoint path.
+        query (str): raw query string.
+        body (bytes): raw request body.
+        content_type (str, optional): Content-Type header. Defaults to "".
+        accept (str, optional): Accept header. Defaults to "".
+
+    Returns:
+        str: cache key.
+    """
+    params = sorted(parse_qsl(query, keep_blank_values=True))
+    canonical_query = "&".join(f"{k}={v}" for k, v in params)
+    return content_hash(
+        path.encode(),
+        canonical_query.encode(),
+        body,
+        content_type.encode(),
+        accept.encode(),
+    )
+
+
+def _etag(body: bytes) -> str:
+    return f'"{content_hash(body)}"'
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses bounded by `max_bytes`. If a directory
+    is given, responses are also written there, so all workers pointing at the
+    same directory share their results. The directory is pruned to
+    `directory_max_bytes` by removing the least recently used files. The
+    directory is only accessed in worker threads, off the event loop.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        directory: Optional[str] = None,
+        directory_max_bytes: int = 0,
+    ):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.directory_max_bytes = directory_max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _put_memory(self, key: str, entry: CachedResponse):
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old[0])
+            self._entries[key] = entry
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (old_body, _, _) = self._entries.popitem(last=False)
+                self.current_bytes -= len(old_body)
+                self.evictions += 1
+
+    def _read_shared(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        media_type, _, body = data.partition(b"\n")
+        return body, _etag(body), media_type.decode()
+
+    def _write_shared(self, key: str, body: bytes, media_type: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(media_type.encode() + b"\n" + body)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= 100
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self.prune_directory()
+
+    def prune_directory(self):
+        """
+        removes the least recently used files of the shared directory until
+        it fits into directory_max_bytes.
+        """
+        if self.directory is None:
+            return
+        files = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.directory_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        returns the cached response, looking into the shared directory on a
+        miss in memory.
+
+        Args:
+            key (str): result of request_key.
+
+        Returns:
+            Optional[CachedResponse]: body, ETag and media type or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        if self.directory is not None:
+            try:
+                entry = await asyncio.to_thread(self._read_shared, key)
+            except OSError:
+                logger.exception("reading the shared response cache failed")
+                entry = None
+            if entry is not None:
+                self._put_memory(key, entry)
+                with self._lock:
+                    self.hits += 1
+                return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def put(self, key: str, body: bytes, media_type: str) -> str:
+        """
+        stores the response.
+
+        Args:
+            key (str): result of request_key.
+            body (bytes): serialized response.
+            media_type (str): content type of the response.
+
+        Returns:
+            str: ETag of the response.
+        """
+        etag = _etag(body)
+        self._put_memory(key, (body, etag, media_type))
+        if self.directory is not None:
+            try:
+                await asyncio.to_thread(self._write_shared, key, body, media_type)
+            except OSError:
+                logger.exception("writing the shared response cache failed")
+        return etag
+
+    def record_not_modified(self):
+        """counts a response answered with 304 Not Modified."""
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        """removes all entries from memory, the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        returns the cache counters.
+
+        Returns:
+            Dict[str, int]: hits, misses, evictions, not_modified, entries,
+                bytes and max_bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Answers POST requests to the endpoints starting with one of `prefixes`
+    from the response cache and stores successful JSON responses in it.
+    """
+
+    def __init__(self, app, cache: ResponseCache, prefixes: Tuple[str, ...]):
+        super().__init__(app)
+        self.cache = cache
+        self.prefixes = prefixes
+
+    def _endpoint(self, request: Request) -> str:
+        path = request.scope["path"]
+        root_path = request.scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+        return path
+
+    def _respond(
+        self, request: Request, body: bytes, etag: str, media_type: str
+    ) -> Response:
+        headers = {"ETag": etag}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.cache.record_not_modified()
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        path = self._endpoint(request)
+        if request.method != "POST" or not path.startswith(self.prefixes):
+            return await call_next(request)
+        key = request_key(
+            path,
+            request.url.query,
+            await request.body(),
+            content_type=request.headers.get("content-type", ""),
+            accept=request.headers.get("accept", ""),
+        )
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return self._respond(request, *cached)
+
+        response = await call_next(request)
+        media_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not media_type.startswith("application/json"):
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = await self.cache.put(key, body, media_type)
+        return self._respond(request, body, etag, media_type)
@@ -0,0 +1,121 @@
+"""
+Rolling statistics engine that evaluates many window sizes of a series in
+one call. Windows are centered like pandas `.rolling(center=True,
+min_periods=1)` and shrink at the edges of the series. Means and standard
+deviations come from prefix sums computed once, so every window size costs
+O(n). Min and max use the monotonic deque filters of scipy.ndimage, the
+median a sorted window, and the exponential moving average is a first order
+recursive filter.
+"""
+
+from typing import Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+from scipy.signal import lfilter
+
+ROLLING_STATISTICS = ("mean", "median", "min", "max", "std", "ema")
+
+
+def _window_bounds(n: int, window_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    returns the first and the one past last index of the centered window at
+    every position, clipped to the series. Even windows reach one step
+    further to the left, like pandas.
+    """
+    ends = np.arange(n) + (window_size - 1) // 2 + 1
+    starts = np.clip(ends - window_size, 0, n)
+    return starts, np.clip(ends, 0, n)
+
+
+class _PrefixSums:
+    """
+    Prefix sums of a series and of its squares, shared by all window sizes.
+    The series is centered on its mean first, which keeps the sums of
+    squares accurate.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.offset = values.mean() if len(values) else 0.0
+        centered = values - self.offset
+        self.sums = np.concatenate(([0.0], np.cumsum(centered)))
+        self.squares = np.concatenate(([0.0], np.cumsum(centered**2)))
+
+    def mean_std(self, window_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        starts, ends = _window_bounds(len(self.sums) - 1, window_size)
+        count = ends - starts
+        window_sum = self.sums[ends] - self.sums[starts]
+        window_squares = self.squares[ends] - self.squares[starts]
+        mean = window_sum / count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.maximum(window_squares - window_sum * mean, 0.0) / (count - 1)
+        var[count < 2] = np.nan
+        return mean + self.offset, np.sqrt(var)
+
+
+def _rolling_median(values: np.ndarray, window_size: int) -> np.ndarray:
+    # pandas keeps a sorted skiplist of the window, O(n log(window_size))
+    return (
+        pd.Series(values)
+        .rolling(window=window_size, center=True, min_periods=1)
+        .median()
+        .to_numpy()
+    )
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    # weighted average with weights (1 - alpha)**k, like pandas ewm(adjust=True)
+    decay = 1.0 - 2.0 / (span + 1.0)
+    weighted_sum = lfilter([1.0], [1.0, -decay], values)
+    total_weight = lfilter([1.0], [1.0, -decay], np.ones_like(values))
+    return weighted_sum / total_weight
+
+
+def rolling_statistics(
+    values: np.ndarray, window_sizes: Sequence[int], statistic: str = "mean"
+) -> np.ndarray:
+    """
+    computes a rolling statistic for several window sizes.
+
+    Args:
+        values (np.ndarray): series without missing values.
+        window_sizes (Sequence[int]): window sizes between 1 and len(values).
+            For "ema" the window size is the span of the average.
+        statistic (str, optional): one of ROLLING_STATISTICS. Defaults to "mean".
+
+    Raises:
+        ValueError: If an unsupported statistic is requested.
+        ValueError: If a window size is not between 1 and len(values).
+
+    Returns:
+        np.ndarray: window × time matrix, "std" is NaN for windows of one value.
+    """
+    if statistic not in ROLLING_STATISTICS:
+        raise ValueError(f"Unsupported rolling statistic: '{statistic}'")
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    result = np.empty((len(window_sizes), n))
+    prefix_sums = _PrefixSums(values) if statistic in ("mean", "std") else None
+    for i, window_size in enumerate(window_sizes):
+        if window_size > n:
+            raise ValueError(
+                f"the Dataframe is shorter than window size: '{n} < {window_size}'"
+            )
+        if window_size < 1:
+            raise ValueError(f"the window size must be positive: '{window_size}'")
+        if statistic == "mean":
+            result[i] = prefix_sums.mean_std(window_size)[0]
+        elif statistic == "std":
+            result[i] = prefix_sums.mean_std(window_size)[1]
+        elif statistic == "median":
+            result[i] = _rolling_median(values, window_size)
+        elif statistic == "ema":
+            result[i] = _ema(values, window_size)
+        else:
+            rolling_filter = (
+                minimum_filter1d if statistic == "min" else maximum_filter1d
+            )
+            # "nearest" repeats the edge values, which leaves min and max of
+            # the clipped windows unchanged
+            result[i] = rolling_filter(values, size=window_size, mode="nearest")
+    return result
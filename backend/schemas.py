@@ -1,7 +1,11 @@
 import datetime
 from enum import Enum
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field
+
+from chord_tables import CHORD_GENERATORS
+from config import settings
+from note_mapping import SCALES
 
 
 class AggregationTypes(str, Enum):
@@ -17,9 +21,64 @@ class AggregationTypes(str, Enum):
     percentile = "percentile"
 
 
-class MidiChordTypes(str, Enum):
-    triads = "triads"
-    tetrads = "tetrads"
+class ResampleAggregations(str, Enum):
+    min = "min"
+    mean = "mean"
+    max = "max"
+    std = "std"
+    count = "count"
+
+
+class RollingStatistics(str, Enum):
+    mean = "mean"
+    median = "median"
+    min = "min"
+    max = "max"
+    std = "std"
+    ema = "ema"
+
+
+class DownsamplingMethods(str, Enum):
+    lttb = "lttb"
+    minmax = "minmax"
+
+
+class PolynomialSelectionMethods(str, Enum):
+    holdout = "holdout"
+    kfold = "kfold"
+    loo = "loo"
+
+
+class PipelineOperations(str, Enum):
+    fetch = "fetch"
+    distance_to_before = "distance_to_before"
+    distance_to_next = "distance_to_next"
+    rolling_average = "rolling_average"
+    rolling_statistic = "rolling_statistic"
+    polynomial_fit = "polynomial_fit"
+    summary_statistic = "summary_statistic"
+
+
+class PipelineOutputTypes(str, Enum):
+    notes = "notes"
+    chords = "chords"
+    cc = "cc"
+
+
+class NoteStrategies(str, Enum):
+    rank = "rank"
+    linear = "linear"
+    quantile = "quantile"
+
+
+# every scale of note_mapping is available to the endpoints
+Scales = Enum("Scales", {name: name for name in SCALES}, type=str)
+
+
+# every registered chord table generator is a chord type
+MidiChordTypes = Enum(
+    "MidiChordTypes", {name: name for name in CHORD_GENERATORS}, type=str
+)
 
 
 class MidiDroneBuildOptions(str, Enum):
@@ -31,23 +90,23 @@ class MidiDroneBuildOptions(str, Enum):
 
 
 class DataRequest(BaseModel):
-    data: List[float] = Field(..., max_items=1000)
+    data: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
 
 
 class MidiNotesRequest(BaseModel):
-    data_for_notes: List[float] = Field(..., max_items=1000)
-    data_for_velocity: List[float] = Field(..., max_items=1000)
-    data_for_duration: List[float] = Field(..., max_items=1000)
+    data_for_notes: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
+    data_for_velocity: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
+    data_for_duration: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
 
 
 class MidiChordsRequest(BaseModel):
-    data_for_chords: List[float] = Field(..., max_items=1000)
-    data_for_velocity: List[float] = Field(..., max_items=1000)
-    data_for_duration: List[float] = Field(..., max_items=1000)
+    data_for_chords: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
+    data_for_velocity: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
+    data_for_duration: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
 
 
 class MidiDroneRequest(BaseModel):
-    data_for_drone: List[float] = Field(..., max_items=1000)
+    data_for_drone: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
     drone_build_options: List[str] = Field(
         default=[
             MidiDroneBuildOptions.min,
@@ -58,8 +117,53 @@ class MidiDroneRequest(BaseModel):
 
 
 class MidiCCRequest(BaseModel):
-    data_for_cc: List[float] = Field(..., max_items=1000)
-    data_for_durations: Optional[List[float]] = Field(default=None, max_items=1000)
+    data_for_cc: List[float] = Field(..., max_items=settings.MAX_DATA_ITEMS)
+    data_for_durations: Optional[List[float]] = Field(
+        default=None, max_items=settings.MAX_DATA_ITEMS
+    )
+
+
+PipelineParams = Dict[str, Optional[Union[bool, int, float, str]]]
+
+
+class PipelineNode(BaseModel):
+    op: PipelineOperations
+    input: Optional[str] = None
+    params: PipelineParams = {}
+    deviation: bool = False
+
+
+class PipelineOutput(BaseModel):
+    type: PipelineOutputTypes
+    inputs: Dict[str, str]
+    params: PipelineParams = {}
+
+
+class PipelineRequest(BaseModel):
+    data: Dict[
+        str, Annotated[List[float], Field(max_length=settings.MAX_DATA_ITEMS)]
+    ] = Field(default={}, max_length=settings.MAX_PIPELINE_NODES)
+    nodes: Dict[str, PipelineNode] = Field(
+        default={}, max_length=settings.MAX_PIPELINE_NODES
+    )
+    output: PipelineOutput
+
+
+class CCLane(BaseModel):
+    data: str
+    midi_min: int = Field(default=0, ge=0, le=127)
+    midi_max: int = Field(default=127, ge=0, le=127)
+    reversed: bool = False
+
+
+class MidiCCLanesRequest(BaseModel):
+    data: Dict[
+        str,
+        Annotated[List[float], Field(min_length=1, max_length=settings.MAX_DATA_ITEMS)],
+    ] = Field(..., max_length=settings.MAX_CC_LANES)
+    lanes: Dict[str, CCLane] = Field(
+        ..., min_length=1, max_length=settings.MAX_CC_LANES
+    )
 
 
 class DataFields(str, Enum):
@@ -73,15 +177,46 @@ class Data(BaseModel):
     value: List[float]
 
 
+class MultiFieldData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    time: List[datetime.datetime]
+
+
+class Location(BaseModel):
+    lon: float
+    lat: float
+
+
+class LocationData(BaseModel):
+    time: List[datetime.datetime]
+    locations: List[Location]
+    value: List[List[float]]
+
+
 class StatisticData(BaseModel):
     time: List[float]
     value: List[float]
 
 
+class RollingStatisticData(BaseModel):
+    time: List[float]
+    window_size: List[int]
+    value: List[List[Optional[float]]]
+
+
+class SummaryStatisticsData(BaseModel):
+    time: List[float]
+    statistics: Dict[str, float]
+    deviations: Optional[Dict[str, List[float]]] = None
+
+
 class StatisticDataPoly(BaseModel):
     time: List[float]
     value: List[float]
     degree: int
+    mse_train: Optional[List[float]] = None
+    mse_val: Optional[List[float]] = None
 
 
 class MidiNote(BaseModel):
@@ -105,3 +240,20 @@ class MidiDrone(BaseModel):
 class MidiCC(BaseModel):
     cc_message: int
     duration: float
+
+
+class MidiCCThinned(BaseModel):
+    events: List[MidiCC]
+    removed: int
+
+
+class MidiCCLane(BaseModel):
+    parameter: str
+    cc_number: int
+    cc_message: List[int]
+
+
+class MidiCCLanes(BaseModel):
+    time: List[float]
+    duration: List[float]
+    lanes: List[MidiCCLane]
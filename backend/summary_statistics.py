@@ -0,0 +1,124 @@
+"""
+Lazy summary statistics kernel. Statistics are computed on first request
+only, and statistics that need the same intermediate share it: median,
+percentiles and mode come from one sort, and sum, mean, var and std from one
+set of moments. Missing values are skipped like in pandas.
+"""
+
+from functools import cached_property
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+STATISTICS = (
+    "min",
+    "mean",
+    "median",
+    "max",
+    "std",
+    "var",
+    "sum",
+    "count",
+    "mode",
+    "percentile",
+)
+
+
+class SummaryStatistics:
+    """
+    Summary statistics of one series, see STATISTICS for the supported names.
+    """
+
+    def __init__(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float)
+        self.values = values[~np.isnan(values)]
+
+    @cached_property
+    def _sorted(self) -> np.ndarray:
+        return np.sort(self.values)
+
+    @cached_property
+    def _moments(self) -> Dict[str, float]:
+        n = len(self.values)
+        total = float(np.sum(self.values))
+        mean = total / n if n else np.nan
+        if n > 1:
+            centered = self.values - mean
+            var = float(centered @ centered) / (n - 1)
+        else:
+            var = np.nan
+        return {"count": n, "sum": total, "mean": mean, "var": var}
+
+    def _quantile(self, q: float) -> float:
+        # linear interpolation between the closest ranks, like pandas
+        values = self._sorted
+        if len(values) == 0:
+            return np.nan
+        position = q * (len(values) - 1)
+        lower = int(np.floor(position))
+        upper = min(lower + 1, len(values) - 1)
+        return float(
+            values[lower] + (values[upper] - values[lower]) * (position - lower)
+        )
+
+    def _mode(self) -> Optional[float]:
+        # smallest of the most frequent values, like pandas
+        values = self._sorted
+        if len(values) == 0:
+            return None
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        run_lengths = np.diff(np.r_[starts, len(values)])
+        return float(values[starts[np.argmax(run_lengths)]])
+
+    def get(self, statistic: str, percentile: Optional[float] = None) -> float:
+        """
+        returns one statistic, computing shared intermediates on first use.
+
+        Args:
+            statistic (str): one of STATISTICS.
+            percentile (Optional[float], optional): between 0 and 1, required
+                for "percentile". Defaults to None.
+
+        Raises:
+            ValueError: If `percentile` is missing or not between 0 and 1.
+            ValueError: If an unsupported statistic is requested.
+
+        Returns:
+            float: the statistic, None for the mode of an empty series.
+        """
+        if statistic == "percentile":
+            if percentile is None or not (0 <= percentile <= 1):
+                raise ValueError("Percentile must be specified and between 0 and 1.")
+            return self._quantile(percentile)
+        if statistic in ("min", "max"):
+            if len(self.values) == 0:
+                return np.nan
+            return float(
+                np.min(self.values) if statistic == "min" else np.max(self.values)
+            )
+        if statistic == "median":
+            return self._quantile(0.5)
+        if statistic == "mode":
+            return self._mode()
+        if statistic == "std":
+            return float(np.sqrt(self._moments["var"]))
+        if statistic in self._moments:
+            return self._moments[statistic]
+        raise ValueError(f"Unsupported aggregation type: '{statistic}'")
+
+    def compute(
+        self, statistics: Iterable[str], percentile: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        returns several statistics at once.
+
+        Args:
+            statistics (Iterable[str]): names out of STATISTICS.
+            percentile (Optional[float], optional): see get. Defaults to None.
+
+        Returns:
+            Dict[str, float]: statistic per name.
+        """
+        return {
+            statistic: self.get(statistic, percentile=percentile)
+            for statistic in statistics
+        }
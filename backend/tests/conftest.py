@@ -0,0 +1,12 @@
+"""
+Shared setup of the backend tests.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+# the backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
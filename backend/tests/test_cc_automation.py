@@ -0,0 +1,111 @@
+"""
+CC resampling, scaling and thinning against straightforward references.
+"""
+
+import numpy as np
+import pytest
+
+from cc_automation import resample_steps, scale_cc, shared_grid, thin_cc
+
+
+@pytest.mark.parametrize(
+    "duration_s, step_s, n_steps",
+    [(300, 1, 300), (300, 0.01, 30000), (300, 0.3, 1000), (10, 3, 3), (10, 0, 1)],
+)
+def test_step_counts_and_durations(duration_s, step_s, n_steps):
+    values, durations = resample_steps(np.arange(50.0), duration_s, step_s)
+    assert len(values) == len(durations) == n_steps
+    assert durations.sum() == pytest.approx(duration_s)
+
+
+def test_last_step_takes_the_remainder():
+    _, durations = resample_steps(np.arange(50.0), 10, 3)
+    np.testing.assert_allclose(durations, [3, 3, 4])
+
+
+def test_downsampling_averages_every_step():
+    values = np.random.default_rng(0).normal(size=100)
+    resampled, _ = resample_steps(values, 99, 10)
+    # one value per second, the last step holds the remaining 19 seconds
+    expected = [values[i : i + 10].mean() for i in range(0, 80, 10)]
+    expected.append(values[80:].mean())
+    np.testing.assert_allclose(resampled, expected)
+
+
+def test_upsampling_interpolates_at_every_step_start():
+    resampled, durations = resample_steps(np.array([0.0, 10.0, 0.0]), 2, 0.25)
+    assert len(durations) == 8
+    np.testing.assert_allclose(resampled, [0, 2.5, 5, 7.5, 10, 7.5, 5, 2.5])
+
+
+def test_too_many_steps_are_rejected():
+    with pytest.raises(ValueError):
+        resample_steps(np.arange(10.0), 300, 0.001, max_steps=100_000)
+
+
+def _set_cc_values(values, midi_min, midi_max, reverse):
+    # the scaling set_cc_values did one column at a time
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.full(len(values), midi_min)
+    position = (high - values if reverse else values - low) / (high - low)
+    return (position * (midi_max - midi_min) + midi_min).astype(int)
+
+
+def test_scale_cc_scales_every_lane_like_set_cc_values():
+    rng = np.random.default_rng(1)
+    values = np.vstack([rng.normal(size=40), rng.uniform(-5, 5, 40), np.full(40, 2.0)])
+    lanes = [(0, 127, False), (20, 90, True), (10, 60, False)]
+    scaled = scale_cc(values, *map(list, zip(*lanes)))
+    for row, lane, expected in zip(values, lanes, scaled):
+        np.testing.assert_array_equal(expected, _set_cc_values(row, *lane))
+
+
+def test_scale_cc_with_a_given_value_range():
+    scaled = scale_cc(
+        np.array([[0.0, 5.0, 10.0]]),
+        [0],
+        [100],
+        [False],
+        from_min=np.array([0.0]),
+        from_max=np.array([20.0]),
+    )
+    assert scaled.tolist() == [[0, 25, 50]]
+
+
+def test_shared_grid_keeps_the_ends_of_every_series():
+    grid = shared_grid([np.array([0.0, 4.0]), np.arange(5.0), np.arange(9.0)], 5)
+    np.testing.assert_allclose(
+        grid, [[0, 1, 2, 3, 4], [0, 1, 2, 3, 4], [0, 2, 4, 6, 8]]
+    )
+
+
+def _thin_sequentially(cc_messages, durations, max_error):
+    kept, held = [], []
+    for value, duration in zip(cc_messages, durations):
+        if kept and abs(value - kept[-1]) <= max_error:
+            held[-1] += duration
+        else:
+            kept.append(value)
+            held.append(duration)
+    return kept, held
+
+
+@pytest.mark.parametrize("max_error", [0, 1, 3, 10])
+def test_thin_cc_matches_a_sequential_reference(max_error):
+    rng = np.random.default_rng(max_error)
+    for size in (1, 2, 17, 500):
+        cc_messages = np.clip(rng.integers(-4, 5, size).cumsum() + 64, 0, 127)
+        durations = rng.uniform(0.1, 1.0, size)
+        values, held = thin_cc(cc_messages, durations, max_error)
+        expected_values, expected_held = _thin_sequentially(
+            cc_messages, durations, max_error
+        )
+        assert values.tolist() == expected_values
+        np.testing.assert_allclose(held, expected_held)
+        assert held.sum() == pytest.approx(durations.sum())
+
+
+def test_thin_cc_of_no_events():
+    values, durations = thin_cc(np.array([]), np.array([]), 2)
+    assert len(values) == len(durations) == 0
@@ -0,0 +1,131 @@
+"""
+Chord tables against the chord progressions set_triads and set_tetras built
+before, and the deterministic permutation of chord notes.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import chord_tables
+from chord_tables import (
+    CHORD_GENERATORS,
+    chord_table,
+    map_to_chords,
+    permutation_table,
+    permute_chords,
+    register_chord_type,
+    stable_hash,
+    voice_leading,
+)
+from data_to_midi_tools import permutate_chords, set_chords
+
+
+def _baseline_triads(start, length):
+    chords = [[start, start + 3, start + 7]]
+    note_to_change, half_tone = 2, True
+    for _ in range(length):
+        new_chord = chords[-1].copy()
+        new_chord[note_to_change] += 1 if half_tone else 2
+        chords.append(new_chord)
+        half_tone = not half_tone
+        note_to_change = (note_to_change - 1) if note_to_change > 0 else 2
+    return chords[:length]
+
+
+def _baseline_tetrads(start, length):
+    chords = [[start, start + 7, start + 9, start + 16]]
+    note_to_change = 2
+    for _ in range(length):
+        new_chord = chords[-1].copy()
+        new_chord[note_to_change] += 2
+        chords.append(new_chord)
+        note_to_change = (note_to_change - 1) if note_to_change > 0 else 3
+    return chords[:length]
+
+
+@pytest.mark.parametrize(
+    "chord_type, baseline",
+    [("triads", _baseline_triads), ("tetrads", _baseline_tetrads)],
+)
+@pytest.mark.parametrize("start", [0, 36, 60])
+def test_tables_match_the_baseline_progressions(chord_type, baseline, start):
+    expected = np.clip(baseline(start, 60), 0, 127)
+    np.testing.assert_array_equal(chord_table(chord_type, start, 60), expected)
+
+
+@pytest.mark.parametrize("chord_type", sorted(CHORD_GENERATORS))
+def test_tables_are_cached_read_only_midi_notes(chord_type):
+    table = chord_table(chord_type, 36, 100)
+    assert table.dtype == np.uint8 and not table.flags.writeable
+    assert table.shape[0] == 100
+    assert table[0, 0] == 36
+    assert table.max() <= 127
+    assert chord_table(chord_type, 36, 100) is table
+
+
+def test_values_are_mapped_to_chords_by_rank():
+    values = np.array([5.0, -1.0, 5.0, 2.5, -1.0])
+    chords = map_to_chords(values, "triads", 48)
+    expected = _baseline_triads(48, 3)
+    assert chords.tolist() == [expected[i] for i in (2, 0, 2, 1, 0)]
+
+
+def test_unknown_chord_type_is_rejected():
+    with pytest.raises(ValueError):
+        chord_table("ninths", 36, 4)
+
+
+def test_registered_chord_types_are_available():
+    @register_chord_type("test_fifths")
+    def _fifths(start_note, length):
+        return voice_leading(
+            [start_note, start_note + 7], voices=(1, 0), steps=(1,), length=length
+        )
+
+    try:
+        assert chord_table("test_fifths", 40, 3).tolist() == [
+            [40, 47],
+            [40, 48],
+            [41, 48],
+        ]
+    finally:
+        del chord_tables.CHORD_GENERATORS["test_fifths"]
+        chord_table.cache_clear()
+
+
+def test_permutation_table():
+    assert permutation_table(3).tolist() == [
+        [0, 1, 2],
+        [0, 2, 1],
+        [1, 0, 2],
+        [1, 2, 0],
+        [2, 0, 1],
+        [2, 1, 0],
+    ]
+
+
+def test_stable_hash_is_pinned():
+    # equal in every process and on every platform, -0.0 hashes like 0.0
+    hashes = stable_hash(np.array([0.0, -0.0, 1.0, -2.5]))
+    assert hashes.tolist() == [0, 0, 3035652100526550566, 4700886180178471262]
+
+
+def test_permutations_keep_the_notes_and_depend_only_on_the_seed():
+    chords = chord_table("tetrads", 36, 50)
+    seeds = np.random.default_rng(0).normal(size=50).round(1)
+    permuted = permute_chords(chords, seeds)
+    np.testing.assert_array_equal(np.sort(permuted, axis=1), np.sort(chords, axis=1))
+    np.testing.assert_array_equal(permute_chords(chords, seeds), permuted)
+    same = np.full(4, 3.7)
+    rows = permute_chords(np.tile([1, 2, 3, 4], (4, 1)), same)
+    assert all(row == rows[0].tolist() for row in rows.tolist())
+
+
+def test_permutate_chords_leaves_other_rows_alone():
+    df = pd.DataFrame({"value": [1.0, 2.0, 1.0]})
+    df = set_chords(df, on_column="value", to_column="chord", chord_type="triads")
+    chords = df["chord"].tolist()
+    df = permutate_chords(df, seed_column="value")
+    assert [sorted(chord) for chord in df["chord"]] == [sorted(c) for c in chords]
+    assert df["chord"][0] == df["chord"][2]
@@ -0,0 +1,113 @@
+"""
+Live mode driven by a local stand-in for the upstream API, checked against
+numpy over the buffered samples.
+"""
+
+import asyncio
+import datetime
+import numpy as np
+import pytest
+
+from live import LiveService, OnlineStatistics, RingBuffer
+
+START = datetime.datetime(2025, 1, 1)
+
+
+class FakeUpstream:
+    """Returns one new reading per call, like the current data endpoint."""
+
+    def __init__(self, values):
+        self.values = list(values)
+        self.calls = 0
+
+    async def fetch(self, lon, lat, data_field):
+        if self.calls >= len(self.values):
+            return None
+        value = self.values[self.calls]
+        self.calls += 1
+        return START + datetime.timedelta(minutes=15 * self.calls), value
+
+
+def test_ring_buffer_keeps_the_newest_samples_in_order():
+    buffer = RingBuffer(4)
+    evicted = [
+        buffer.append(START + datetime.timedelta(hours=i), float(i)) for i in range(7)
+    ]
+    assert evicted == [None, None, None, None, 0.0, 1.0, 2.0]
+    times, values = buffer.to_arrays()
+    np.testing.assert_array_equal(values, [3.0, 4.0, 5.0, 6.0])
+    assert np.all(np.diff(times) > np.timedelta64(0))
+    assert buffer.last() == 6.0 and buffer.last(3) == 3.0
+
+
+def test_online_statistics_match_numpy_over_a_sliding_window():
+    values = np.random.default_rng(0).normal(10, 3, 200)
+    window = 25
+    statistics = OnlineStatistics()
+    for seq, value in enumerate(values):
+        statistics.add(seq, value)
+        if seq >= window:
+            statistics.remove(seq - window, values[seq - window])
+        current = values[max(0, seq - window + 1) : seq + 1]
+        assert statistics.n == len(current)
+        assert statistics.mean == pytest.approx(current.mean())
+        assert statistics.min == current.min()
+        assert statistics.max == current.max()
+        expected_std = current.std(ddof=1) if len(current) > 1 else 0.0
+        assert statistics.std == pytest.approx(expected_std)
+
+
+def test_live_feed_with_fake_upstream_matches_numpy_after_eviction():
+    capacity, window_size = 8, 3
+    readings = np.random.default_rng(1).normal(5, 2, 20).round(2)
+    upstream = FakeUpstream(readings)
+    service = LiveService(
+        fetch=upstream.fetch,
+        poll_interval_s=0,
+        capacity=capacity,
+        window_size=window_size,
+    )
+
+    async def run():
+        feed, queue = service.subscribe(1.0, 2.0, "temperature_2m")
+        await feed.poll_task
+        for _ in range(len(readings) - 1):
+            await service.poll_once()
+        # nothing new upstream, nothing is published
+        assert await service.poll_once() == [None]
+        return feed, [queue.get_nowait() for _ in range(queue.qsize())]
+
+    feed, updates = asyncio.run(run())
+    assert len(updates) == len(readings)
+
+    for i, update in enumerate(updates):
+        buffered = readings[max(0, i - capacity + 1) : i + 1]
+        trailing = readings[max(0, i - window_size + 1) : i + 1]
+        assert update["value"] == readings[i]
+        assert update["count"] == len(buffered)
+        assert update["min"] == buffered.min()
+        assert update["max"] == buffered.max()
+        assert update["mean"] == pytest.approx(buffered.mean())
+        expected_std = buffered.std(ddof=1) if len(buffered) > 1 else 0.0
+        assert update["std"] == pytest.approx(expected_std)
+        assert update["rolling_average"] == pytest.approx(trailing.mean())
+        expected_distance = abs(readings[i] - readings[i - 1]) if i else 0.0
+        assert update["distance_to_before"] == pytest.approx(expected_distance)
+
+    snapshot = feed.series.snapshot()
+    np.testing.assert_array_equal(snapshot["value"], readings[-capacity:])
+    assert snapshot["latest"] == updates[-1]
+
+
+def test_unsubscribe_drops_the_feed():
+    service = LiveService(
+        fetch=FakeUpstream([1.0]).fetch, poll_interval_s=0, capacity=4, window_size=2
+    )
+
+    async def run():
+        feed, queue = service.subscribe(1.0, 2.0, "temperature_2m")
+        await feed.poll_task
+        service.unsubscribe(feed, queue)
+
+    asyncio.run(run())
+    assert service.feeds == {}
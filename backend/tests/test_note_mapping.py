@@ -0,0 +1,94 @@
+"""
+Note strategies and scale tables of note_mapping, the rank strategy against
+the dictionary lookup set_notes used before.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_to_midi_tools import set_notes
+from note_mapping import (
+    SCALE_TABLES,
+    SCALES,
+    map_to_notes,
+    note_degrees,
+    scale_notes,
+)
+
+
+def _baseline_notes(values, start_midi_value):
+    unique_values = sorted(set(values))
+    value_to_index = {value: i for i, value in enumerate(unique_values)}
+    return [start_midi_value + value_to_index[value] for value in values]
+
+
+def test_rank_matches_the_baseline_within_the_midi_range():
+    values = np.random.default_rng(0).integers(-20, 20, 300).astype(float)
+    notes = map_to_notes(values, lowest_note=36)
+    assert notes.tolist() == _baseline_notes(values.tolist(), 36)
+
+
+def test_rank_clamps_to_the_highest_note():
+    values = np.arange(200, dtype=float)
+    notes = map_to_notes(values, lowest_note=36, highest_note=127)
+    expected = np.minimum(_baseline_notes(values.tolist(), 36), 127)
+    np.testing.assert_array_equal(notes, expected)
+
+
+@pytest.mark.parametrize("scale", sorted(SCALES))
+def test_scale_tables_hold_the_scale_steps(scale):
+    table = SCALE_TABLES[scale]
+    assert table.dtype == np.uint8 and not table.flags.writeable
+    assert set(np.unique(table % 12)) == set(SCALES[scale])
+    assert table.min() >= 0 and table.max() <= 127
+    assert np.all(np.diff(table.astype(int)) > 0)
+
+
+@pytest.mark.parametrize("scale", sorted(SCALES))
+def test_scale_notes_are_rooted_at_the_lowest_note(scale):
+    notes = scale_notes(scale, 38, 80)
+    assert notes[0] == 38 and notes.max() <= 80
+    assert set((notes - 38) % 12) == set(SCALES[scale])
+
+
+def test_major_scale_notes():
+    assert scale_notes("major", 60, 72).tolist() == [60, 62, 64, 65, 67, 69, 71, 72]
+
+
+def test_linear_bins_have_equal_width():
+    values = np.array([0.0, 0.9, 1.0, 5.0, 9.99, 10.0])
+    degrees = note_degrees(values, "linear", n_degrees=10)
+    assert degrees.tolist() == [0, 0, 1, 5, 9, 9]
+
+
+def test_quantile_bins_hold_equally_many_values():
+    values = np.random.default_rng(1).exponential(size=1000)
+    degrees = note_degrees(values, "quantile", n_degrees=4)
+    np.testing.assert_array_equal(np.bincount(degrees), [250, 250, 250, 250])
+
+
+def test_decimals_merge_float_noise():
+    values = np.array([0.1 + 0.2, 0.3, 0.5])
+    assert note_degrees(values).tolist() == [1, 0, 2]
+    assert note_degrees(values, decimals=6).tolist() == [0, 0, 1]
+
+
+def test_constant_values_get_the_lowest_note():
+    notes = map_to_notes(np.full(5, 3.0), strategy="linear", lowest_note=40)
+    assert notes.tolist() == [40] * 5
+
+
+def test_unsupported_strategy_scale_and_empty_range_are_rejected():
+    with pytest.raises(ValueError):
+        note_degrees(np.arange(3.0), "random")
+    with pytest.raises(ValueError):
+        scale_notes("lydian_dominant", 36, 127)
+    with pytest.raises(ValueError):
+        scale_notes("major", 70, 60)
+
+
+def test_set_notes_uses_the_vectorized_mapping():
+    df = pd.DataFrame({"value": [3.0, 1.0, 2.0, 3.0]})
+    df = set_notes(df, on_column="value", to_column="note", start_midi_value=48)
+    assert df["note"].tolist() == [50, 48, 49, 50]
@@ -0,0 +1,122 @@
+"""
+The Legendre/QR polynomial engine against per-degree scikit-learn fits, the
+way data_analysis_tools fitted every degree before.
+"""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import PolynomialFeatures
+
+from analysis_core import best_polynomial_degree
+from polynomial_fitting import (
+    fit_all_degrees,
+    kfold_all_degrees,
+    loo_all_degrees,
+    polynomial_fit,
+    scaled_positions,
+)
+
+
+def _series(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 3, n)
+    return 10 + 4 * np.sin(x) + x**2 + rng.normal(0, 0.5, n)
+
+
+def _sklearn_model(x: np.ndarray, y: np.ndarray, degree: int):
+    poly = PolynomialFeatures(degree=degree)
+    model = LinearRegression().fit(poly.fit_transform(x.reshape(-1, 1)), y)
+    return lambda x_new: model.predict(poly.transform(x_new.reshape(-1, 1)))
+
+
+@pytest.mark.parametrize("degree", [1, 2, 3, 4, 5])
+def test_polynomial_fit_matches_sklearn(degree):
+    y = _series(200)
+    index = np.arange(len(y), dtype=float)
+    expected = _sklearn_model(index, y, degree)(index)
+    np.testing.assert_allclose(polynomial_fit(y, degree), expected, rtol=1e-7)
+
+
+def test_fit_all_degrees_matches_sklearn_refits_on_a_holdout_split():
+    y = _series(150, seed=1)
+    x = scaled_positions(len(y))
+    x_train, x_test, y_train, y_test = train_test_split(
+        x, y, test_size=0.2, random_state=42
+    )
+    mse_train, mse_val = fit_all_degrees(x_train, y_train, x_test, y_test, 5)
+    for degree in range(1, 6):
+        predict = _sklearn_model(x_train, y_train, degree)
+        assert mse_train[degree - 1] == pytest.approx(
+            mean_squared_error(y_train, predict(x_train)), rel=1e-7
+        )
+        assert mse_val[degree - 1] == pytest.approx(
+            mean_squared_error(y_test, predict(x_test)), rel=1e-7
+        )
+
+
+def test_best_degree_holdout_matches_the_per_degree_search():
+    y = _series(120, seed=2)
+    index = np.arange(len(y), dtype=float)
+    x_train, x_test, y_train, y_test = train_test_split(
+        index, y, test_size=0.2, random_state=42
+    )
+    expected_val = [
+        mean_squared_error(y_test, _sklearn_model(x_train, y_train, d)(x_test))
+        for d in range(1, 6)
+    ]
+    _, mse_val, degree = best_polynomial_degree(y, max_degree=5)
+    np.testing.assert_allclose(mse_val, expected_val, rtol=1e-6)
+    assert degree == int(np.argmin(expected_val)) + 1
+
+
+def test_high_degrees_stay_well_conditioned():
+    y = _series(1000, seed=3)
+    x = scaled_positions(len(y))
+    mse_train, mse_val = fit_all_degrees(x, y, x, y, 24)
+    assert np.isfinite(mse_train).all()
+    # nested fits: a higher degree never fits the training data worse
+    assert np.all(np.diff(mse_train) <= 1e-9)
+    np.testing.assert_allclose(mse_train, mse_val, rtol=1e-6, atol=1e-12)
+
+
+def test_loo_matches_explicit_refits():
+    y = _series(30, seed=4)
+    x = scaled_positions(len(y))
+    _, mse_val = loo_all_degrees(x, y, 4)
+    for degree in range(1, 5):
+        errors = []
+        for i in range(len(y)):
+            keep = np.arange(len(y)) != i
+            predict = _sklearn_model(x[keep], y[keep], degree)
+            errors.append((predict(x[i : i + 1])[0] - y[i]) ** 2)
+        assert mse_val[degree - 1] == pytest.approx(np.mean(errors), rel=1e-6)
+
+
+def test_kfold_is_deterministic_and_matches_explicit_folds():
+    y = _series(100, seed=5)
+    x = scaled_positions(len(y))
+    first = kfold_all_degrees(x, y, 4, folds=5)
+    second = kfold_all_degrees(x, y, 4, folds=5)
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[1], second[1])
+
+    splits = np.array_split(np.random.default_rng(42).permutation(len(y)), 5)
+    expected = []
+    for split in splits:
+        keep = np.ones(len(y), dtype=bool)
+        keep[split] = False
+        predict = [_sklearn_model(x[keep], y[keep], d) for d in range(1, 5)]
+        expected.append([mean_squared_error(y[split], p(x[split])) for p in predict])
+    np.testing.assert_allclose(first[1], np.mean(expected, axis=0), rtol=1e-6)
+
+
+def test_kfold_folds_are_capped_by_the_work_budget():
+    y = _series(100, seed=6)
+    x = scaled_positions(len(y))
+    # room for exactly two folds of len(x) * (max_degree + 1)**2 operations
+    capped = kfold_all_degrees(x, y, 4, folds=10, work_budget=2 * 100 * 25)
+    two_folds = kfold_all_degrees(x, y, 4, folds=2)
+    np.testing.assert_array_equal(capped[1], two_folds[1])
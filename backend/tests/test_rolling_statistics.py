@@ -0,0 +1,61 @@
+"""
+The prefix-sum rolling statistics engine against pandas, which the rolling
+average was computed with before.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_statistics import ROLLING_STATISTICS, rolling_statistics
+
+WINDOW_SIZES = [1, 2, 3, 4, 7, 50, 101]
+
+
+def _series(n: int = 101) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    # a large offset checks that the sums of squares stay accurate
+    return 1e4 + rng.normal(0, 1, n).cumsum()
+
+
+def _pandas(values: np.ndarray, window_size: int, statistic: str) -> np.ndarray:
+    series = pd.Series(values)
+    if statistic == "ema":
+        return series.ewm(span=window_size, adjust=True).mean().to_numpy()
+    rolling = series.rolling(window=window_size, center=True, min_periods=1)
+    return getattr(rolling, statistic)().to_numpy()
+
+
+@pytest.mark.parametrize("statistic", ROLLING_STATISTICS)
+def test_rolling_statistics_match_pandas(statistic):
+    values = _series()
+    result = rolling_statistics(values, WINDOW_SIZES, statistic=statistic)
+    assert result.shape == (len(WINDOW_SIZES), len(values))
+    for row, window_size in zip(result, WINDOW_SIZES):
+        np.testing.assert_allclose(
+            row, _pandas(values, window_size, statistic), rtol=1e-9, atol=1e-7
+        )
+
+
+def test_std_of_single_values_is_undefined():
+    result = rolling_statistics(_series(10), [1], statistic="std")
+    assert np.isnan(result).all()
+
+
+def test_short_series():
+    values = np.array([3.0, 1.0])
+    np.testing.assert_allclose(
+        rolling_statistics(values, [2], statistic="mean")[0],
+        _pandas(values, 2, "mean"),
+    )
+
+
+@pytest.mark.parametrize("window_size", [0, 11])
+def test_window_sizes_out_of_range_are_rejected(window_size):
+    with pytest.raises(ValueError):
+        rolling_statistics(_series(10), [window_size])
+
+
+def test_unsupported_statistic_is_rejected():
+    with pytest.raises(ValueError):
+        rolling_statistics(_series(10), [3], statistic="sum")